@@ -1,8 +1,8 @@
-import streamlit as st, os, tempfile
-from scripts.ocr import extract_text
-from scripts.processing import  \
-        (structure_data, categorize_results, explain_results_batch, generate_summary_bullet_points)
-from scripts.utils import configure_llm, apply_custom_css
+import streamlit as st
+import pandas as pd
+from scripts.batch import ReportJob, ReportProgress, analyze_batch
+from scripts.utils import configure_llm, apply_custom_css, enter_page, get_result_store, select_report, ANALYSIS_KEYS
+from scripts.result_store import file_content_hash
 from scripts.config import get_logger
 
 logger = get_logger(__name__)
@@ -10,6 +10,7 @@ logger = get_logger(__name__)
 st.set_page_config(page_title="Medical Report Analyzer", page_icon="🩺", layout="wide")
 
 apply_custom_css()
+enter_page("home")
 
 st.sidebar.subheader("🏠 Home Page Overview")
 st.sidebar.markdown("""
@@ -22,10 +23,6 @@ if "uploaded_files" not in st.session_state:
 uploaded_files = st.sidebar.file_uploader('', type=["pdf"], accept_multiple_files=True, key="global_uploader")
 if uploaded_files:
     st.session_state.uploaded_files = uploaded_files
-    # Clear previous analysis results when new files are uploaded
-    for key in ["metadata", "test_results", "explanation", "summary_bullets", "categorized_data"]:
-        if key in st.session_state:
-            del st.session_state[key]
 
 configure_llm()
 st.sidebar.subheader("⏳ Processing Status")
@@ -80,49 +77,76 @@ st.markdown("</div>", unsafe_allow_html=True)
 
 # Process uploaded files
 if uploaded_files:
-    with st.spinner("🔄 Analyzing your report... 🕒"):
-        try:
-            if len(uploaded_files) > 1:
-                st.warning("⚠️ Using only the first uploaded file for analysis.")
-            uploaded_file = uploaded_files[0]
-            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp_file:
-                tmp_file.write(uploaded_file.read())
-                tmp_file_path = tmp_file.name
-
-            raw_text = extract_text(tmp_file_path)
-            if not raw_text:
-                st.warning("⚠️ No text extracted from the file.")
-                raise ValueError("Text extraction failed")
-
-            structured_data = structure_data(raw_text)
-            if not structured_data:
-                st.warning("⚠️ No structured data extracted.")
-                raise ValueError("Data structuring failed")
-
-            categorized_data = categorize_results(structured_data)
-            if not categorized_data:
-                st.warning("⚠️ No categorized data generated.")
-                raise ValueError("Categorization failed")
-
-            test_results = [r for r in categorized_data if "test_name" in r or "Test" in r]
-            metadata = [r for r in categorized_data if "test_name" not in r and "Test" not in r]
-            explanation = explain_results_batch(test_results) if test_results else None
-            summary_bullets = generate_summary_bullet_points(explanation) if explanation and test_results else None
-
-            # Store results in session state
-            st.session_state.metadata = metadata
-            st.session_state.test_results = test_results
-            st.session_state.explanation = explanation
-            st.session_state.summary_bullets = summary_bullets
-            st.session_state.categorized_data = categorized_data
-
-            os.unlink(tmp_file_path)
-            logger.info(f"✅ Temporary file deleted: {tmp_file_path}")
-            status_placeholder.markdown("<p style='color:#00ff99'>✅ Report processed successfully!</p>", unsafe_allow_html=True)
-            st.info("✅ Analysis complete! Please navigate to the Analyze tab to view detailed results or the Assistant tab to ask questions about your report.")
-        except Exception as e:
-            st.markdown(f'<p class="warning">❌ Error: {str(e)}</p>', unsafe_allow_html=True)
-            logger.error(f"❌ Error processing file: {str(e)}")
-            status_placeholder.markdown("<p style='color:#ff5252'>❌ Processing failed! ⚠️</p>", unsafe_allow_html=True)
+    jobs = {}
+    for uploaded_file in uploaded_files:
+        data = uploaded_file.getvalue()
+        jobs.setdefault(file_content_hash(data), ReportJob(uploaded_file.name, data))
+
+    reports = st.session_state.setdefault("reports", {})
+    report_errors = st.session_state.setdefault("report_errors", {})
+    for results in (reports, report_errors):
+        for report_hash in list(results):
+            if report_hash not in jobs:
+                del results[report_hash]
+    st.session_state.report_order = list(jobs)
+
+    # A failed report stays failed across reruns until the user retries it (or removes and re-uploads it)
+    failed = [report_hash for report_hash in jobs if report_hash in report_errors]
+    if failed and st.sidebar.button(f"🔁 Retry {len(failed)} failed report(s)", key="retry_failed_reports"):
+        for report_hash in failed:
+            del report_errors[report_hash]
+
+    # Reruns with the same uploads keep the results already in session state
+    pending = [job for report_hash, job in jobs.items() if report_hash not in reports and report_hash not in report_errors]
+    if pending:
+        # Live preview: the table appears once tests are categorized, explanation and summary stream in
+        previews = {}
+        def get_preview(progress: ReportProgress) -> dict:
+            if progress.report_hash not in previews:
+                with st.container():
+                    st.markdown(f"<h3 style='color:#ffd700'>🔄 {progress.name}</h3>", unsafe_allow_html=True)
+                    previews[progress.report_hash] = {event: st.empty() for event in ("tests", "explanation", "summary")}
+            return previews[progress.report_hash]
+
+        with st.spinner(f"🔄 Analyzing {len(pending)} report(s)... 🕒"):
+            done = 0
+            for outcome in analyze_batch(pending, result_store=get_result_store(), progress=True):
+                if isinstance(outcome, ReportProgress):
+                    placeholder = get_preview(outcome)[outcome.event]
+                    if outcome.event == "tests":
+                        placeholder.dataframe(pd.DataFrame(outcome.payload["test_results"]), use_container_width=True)
+                    else:
+                        placeholder.markdown(outcome.payload)
+                    continue
+                done += 1
+                if outcome.error:
+                    report_errors[outcome.report_hash] = (outcome.name, outcome.error)
+                    status_icon = "❌"
+                else:
+                    reports[outcome.report_hash] = {"name": outcome.name, **outcome.result}
+                    status_icon = "✅"
+                status_placeholder.markdown(
+                    f"<p style='color:#00ff99'>⏳ {done}/{len(pending)} processed — {status_icon} {outcome.name}</p>",
+                    unsafe_allow_html=True
+                )
+
+    for report_hash in jobs:
+        if report_hash in report_errors:
+            name, error = report_errors[report_hash]
+            st.markdown(f'<p class="warning">❌ Error in {name}: {error}</p>', unsafe_allow_html=True)
+
+    if reports:
+        if st.session_state.get("selected_report") not in reports:
+            select_report(next(h for h in st.session_state.report_order if h in reports))
+        status_placeholder.markdown(
+            f"<p style='color:#00ff99'>✅ {len(reports)}/{len(jobs)} report(s) processed successfully!</p>",
+            unsafe_allow_html=True
+        )
+        st.info("✅ Analysis complete! Please navigate to the Analyze tab to view detailed results or the Assistant tab to ask questions about your report.")
+    else:
+        for key in ANALYSIS_KEYS:
+            st.session_state.pop(key, None)
+        status_placeholder.markdown("<p style='color:#ff5252'>❌ Processing failed! ⚠️</p>", unsafe_allow_html=True)
 else:
+    st.session_state.pop("report_errors", None)
     st.sidebar.info("📢 Please upload a medical report using the sidebar to start analyzing! 🚀")
\ No newline at end of file
@@ -0,0 +1,109 @@
+import argparse, glob, json, os, subprocess, sys, tempfile, time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["EMBEDDING_CACHE_MAX_ENTRIES"] = "0"  # measure the model, not cache hits
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BACKENDS = ["torch", "onnx", "onnx-int8"]
+QUESTIONS = [
+    "What is the hemoglobin level?",
+    "Is the blood sugar within the normal range?",
+    "What do the cholesterol results show?",
+    "Are there any abnormal liver function values?",
+    "What is the patient's diagnosis?",
+    "Which medications were prescribed?",
+    "What are the thyroid test results?",
+    "Is the white blood cell count normal?",
+]
+
+def rss_mb() -> float:
+    """Resident set size of this process in MB (Linux /proc)."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+def load_chunks(chunk_size: int, chunk_overlap: int) -> list:
+    """Chunk the bundled assets the same way SessionIndexManager does."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from scripts.ocr import extract_text
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "assets", "*.pdf"))):
+        chunks.extend(splitter.split_text(extract_text(path)))
+    return chunks
+
+def worker(backend: str, out_dir: str, chunk_size: int, chunk_overlap: int, repeat: int):
+    """Measure one backend in a fresh process so RSS reflects only that runtime."""
+    chunks = load_chunks(chunk_size, chunk_overlap)
+    baseline_rss = rss_mb()
+    from scripts.embeddings import load_local_embedding_model
+    start = time.perf_counter()
+    model = load_local_embedding_model(backend)
+    load_s = time.perf_counter() - start
+    model.embed_documents(chunks[:2])  # warm-up
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        vectors = np.asarray(model.embed_documents(chunks), dtype=np.float32)
+    embed_s = time.perf_counter() - start
+    queries = np.asarray([model.embed_query(q) for q in QUESTIONS], dtype=np.float32)
+
+    np.save(os.path.join(out_dir, f"{backend}_docs.npy"), vectors)
+    np.save(os.path.join(out_dir, f"{backend}_queries.npy"), queries)
+    with open(os.path.join(out_dir, f"{backend}.json"), "w") as f:
+        json.dump({"chunks": len(chunks), "load_s": load_s, "docs_per_s": len(chunks) * repeat / embed_s,
+                   "rss_mb": rss_mb(), "model_rss_mb": rss_mb() - baseline_rss}, f)
+
+def top_k(docs: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k most cosine-similar chunks for each query."""
+    docs = docs / np.linalg.norm(docs, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return np.argsort(-(queries @ docs.T), axis=1)[:, :k]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding backends (docs/sec, RSS, retrieval agreement with torch) on the bundled assets.")
+    parser.add_argument("--backends", nargs="+", default=DEFAULT_BACKENDS, choices=DEFAULT_BACKENDS, help="backends to measure")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="splitter chunk size")
+    parser.add_argument("--chunk-overlap", type=int, default=200, help="splitter chunk overlap")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the chunks when timing throughput")
+    parser.add_argument("-k", type=int, default=3, help="top-k used for retrieval agreement")
+    parser.add_argument("--worker", choices=DEFAULT_BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.out, args.chunk_size, args.chunk_overlap, args.repeat)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as out_dir:
+        for backend in args.backends:
+            cmd = [sys.executable, os.path.abspath(__file__), "--worker", backend, "--out", out_dir,
+                   "--chunk-size", str(args.chunk_size), "--chunk-overlap", str(args.chunk_overlap), "--repeat", str(args.repeat)]
+            if subprocess.run(cmd).returncode != 0:
+                print(f"{backend}: failed, skipped")
+                continue
+            with open(os.path.join(out_dir, f"{backend}.json")) as f:
+                results[backend] = json.load(f)
+            results[backend]["docs"] = np.load(os.path.join(out_dir, f"{backend}_docs.npy"))
+            results[backend]["queries"] = np.load(os.path.join(out_dir, f"{backend}_queries.npy"))
+
+    if not results:
+        return
+    reference = results.get("torch")
+    chunks = next(iter(results.values()))["chunks"]
+    print(f"\n{chunks} chunk(s) from assets/*.pdf, {args.repeat} pass(es), {len(QUESTIONS)} question(s), top-{args.k}\n")
+    print(f"{'backend':<11}{'load (s)':>10}{'docs/s':>10}{'RSS (MB)':>10}{'model (MB)':>12}{'cosine':>9}{'top-k agree':>13}")
+    for backend, r in results.items():
+        cosine = agreement = float("nan")
+        if reference is not None:
+            a, b = r["docs"], reference["docs"]
+            cosine = float(np.mean(np.sum(a * b, axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))))
+            ours, theirs = top_k(r["docs"], r["queries"], args.k), top_k(b, reference["queries"], args.k)
+            agreement = float(np.mean([len(set(x) & set(y)) / args.k for x, y in zip(ours, theirs)]))
+        print(f"{backend:<11}{r['load_s']:>10.2f}{r['docs_per_s']:>10.1f}{r['rss_mb']:>10.0f}{r['model_rss_mb']:>12.0f}{cosine:>9.4f}{agreement:>13.2f}")
+
+if __name__ == "__main__":
+    main()
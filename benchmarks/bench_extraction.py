@@ -0,0 +1,58 @@
+import argparse, os, statistics, sys, time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["LLM_CACHE_MAX_ENTRIES"] = "0"  # measure real LLM calls, not cache hits
+from langchain_core.callbacks import get_usage_metadata_callback
+from scripts.ocr import extract_text
+from scripts.processing import structure_data, categorize_results, format_results_for_table, extract_report_single_pass
+
+DEFAULT_REPORT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "sample_report.pdf")
+
+def run_multi(text: str) -> list:
+    """Three-call path: structure → categorize → format."""
+    return format_results_for_table(categorize_results(structure_data(text)))
+
+def run_single(text: str) -> list:
+    """Single-pass path."""
+    extracted = extract_report_single_pass(text)
+    return extracted[0] if extracted else []
+
+def measure(fn, text: str, runs: int) -> dict:
+    """Run `fn` `runs` times and collect wall time, token usage and row counts."""
+    times, input_tokens, output_tokens, rows = [], [], [], []
+    for _ in range(runs):
+        with get_usage_metadata_callback() as usage_cb:
+            start = time.perf_counter()
+            table = fn(text)
+            times.append(time.perf_counter() - start)
+        usage = usage_cb.usage_metadata.values()
+        input_tokens.append(sum(u.get("input_tokens", 0) for u in usage))
+        output_tokens.append(sum(u.get("output_tokens", 0) for u in usage))
+        rows.append(len(table))
+    return {
+        "wall_s": statistics.median(times),
+        "input_tokens": statistics.median(input_tokens),
+        "output_tokens": statistics.median(output_tokens),
+        "rows": statistics.median(rows),
+        "names": {str(r.get("test_name", "")).lower() for r in table},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-pass and three-call extraction (tokens and wall time).")
+    parser.add_argument("--report", default=DEFAULT_REPORT, help="PDF report to extract")
+    parser.add_argument("--runs", type=int, default=3, help="runs per mode (median is reported)")
+    args = parser.parse_args()
+
+    text = extract_text(args.report)
+    results = {"multi": measure(run_multi, text, args.runs), "single": measure(run_single, text, args.runs)}
+
+    print(f"Report: {args.report} ({len(text)} chars), {args.runs} run(s) per mode, medians\n")
+    print(f"{'mode':<8}{'wall (s)':>10}{'input tok':>12}{'output tok':>12}{'total tok':>12}{'rows':>7}")
+    for mode, r in results.items():
+        total = r["input_tokens"] + r["output_tokens"]
+        print(f"{mode:<8}{r['wall_s']:>10.2f}{r['input_tokens']:>12.0f}{r['output_tokens']:>12.0f}{total:>12.0f}{r['rows']:>7.0f}")
+    multi, single = results["multi"]["names"], results["single"]["names"]
+    if multi | single:
+        print(f"\nTest-name agreement (Jaccard): {len(multi & single) / len(multi | single):.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse, json, os, statistics, sys, time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["LLM_CACHE_MAX_ENTRIES"] = "0"  # measure real LLM calls, not cache hits
+from langchain_core.messages import AIMessage, AIMessageChunk
+from scripts import llm
+from scripts.ocr import extract_text
+from scripts.processing import analyze_report
+
+DEFAULT_REPORT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "sample_report.pdf")
+
+class SimulatedLLM:
+    """
+    Offline stand-in for ChatGroq: each call sleeps `latency` seconds plus `per_kchar` seconds per 1000
+    prompt characters (longer prompts, longer answers), and extraction prompts return `tests` result rows.
+    """
+    model_name = "simulated"
+    temperature = 0
+
+    def __init__(self, latency: float, per_kchar: float, tests: int):
+        self.latency = latency
+        self.per_kchar = per_kchar
+        self.report = {
+            "metadata": [{"patient_name": "Jane Doe"}],
+            "test_results": [{"test_name": f"Test {i}", "value": str(10 + i), "unit": "mg/dL",
+                              "normal_range": "5-20", "status": "Unknown"} for i in range(tests)],
+        }
+
+    def _reply(self, messages) -> str:
+        prompt = "".join(str(m.content) for m in messages)
+        time.sleep(self.latency + self.per_kchar * len(prompt) / 1000)
+        if "extraction" in str(messages[0].content):
+            return json.dumps(self.report)
+        return "Simulated answer.\n- point one\n- point two"
+
+    def invoke(self, messages):
+        return AIMessage(content=self._reply(messages))
+
+    def stream(self, messages):
+        yield AIMessageChunk(content=self._reply(messages))
+
+def measure(text: str, mode: str, runs: int) -> float:
+    """Median wall time of `analyze_report` in `mode`."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        analyze_report(text, mode=mode)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serial and dag pipeline wall time for one report analysis.")
+    parser.add_argument("--report", default=DEFAULT_REPORT, help="PDF report to analyze")
+    parser.add_argument("--runs", type=int, default=3, help="runs per mode (median is reported)")
+    parser.add_argument("--simulate", action="store_true", help="use a sleeping fake LLM instead of Groq (no API key needed)")
+    parser.add_argument("--latency", type=float, default=0.5, help="simulated seconds per call")
+    parser.add_argument("--per-kchar", type=float, default=0.2, help="simulated seconds per 1000 prompt characters")
+    parser.add_argument("--tests", type=int, default=20, help="simulated test rows per report")
+    args = parser.parse_args()
+
+    text = extract_text(args.report)
+    if args.simulate:
+        llm._llm_instance = SimulatedLLM(args.latency, args.per_kchar, args.tests)
+    results = {mode: measure(text, mode, args.runs) for mode in ("serial", "dag")}
+
+    source = f"simulated LLM ({args.latency}s + {args.per_kchar}s/kchar, {args.tests} tests)" if args.simulate else "Groq"
+    print(f"Report: {args.report} ({len(text)} chars), {source}, {args.runs} run(s) per mode, medians\n")
+    print(f"{'mode':<8}{'wall (s)':>10}")
+    for mode, wall in results.items():
+        print(f"{mode:<8}{wall:>10.2f}")
+    print(f"\ndag saves {1 - results['dag'] / results['serial']:.0%} of serial wall time")
+
+if __name__ == "__main__":
+    main()
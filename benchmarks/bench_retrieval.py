@@ -0,0 +1,86 @@
+import argparse, json, os, statistics, sys, time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.embeddings import load_local_embedding_model
+from scripts.hybrid_retrieval import CrossEncoderReranker, HybridRetriever
+from scripts.index_manager import SessionIndexManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_REPORT = os.path.join(ROOT, "assets", "sample_report.pdf")
+DEFAULT_FIXTURE = os.path.join(ROOT, "benchmarks", "fixtures", "retrieval_questions.json")
+
+class LocalFile:
+    """Minimal stand-in for a Streamlit UploadedFile."""
+    def __init__(self, path: str):
+        self.name = os.path.basename(path)
+        with open(path, "rb") as f:
+            self.data = f.read()
+
+    def getvalue(self) -> bytes:
+        return self.data
+
+def normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+def build_retrievers(manager: SessionIndexManager, files, k: int, fetch_k: int, reranker_model: str) -> dict:
+    """Vector-only, keyword-only, MMR and hybrid retrievers over the same chunks."""
+    vector_db = manager.get_vector_db(files)
+    index = manager.keyword_index
+    retrievers = {
+        "mmr": vector_db.as_retriever(search_type="mmr", search_kwargs={"k": k, "fetch_k": fetch_k}),
+        "vector": lambda q: vector_db.similarity_search(q, k=k),
+        "bm25": lambda q: [index.documents[doc_id] for doc_id, _ in index.search(q, k)],
+        "hybrid": HybridRetriever(vector_db=vector_db, keyword_index=index, k=k, fetch_k=fetch_k),
+    }
+    if reranker_model:
+        retrievers["hybrid+rerank"] = HybridRetriever(vector_db=vector_db, keyword_index=index, k=k, fetch_k=fetch_k,
+                                                      reranker=CrossEncoderReranker(reranker_model))
+    return retrievers
+
+def measure(retriever, fixture: list, runs: int) -> dict:
+    """Recall@k (expected text in any returned chunk), MRR and per-query latency."""
+    search = retriever.invoke if hasattr(retriever, "invoke") else retriever
+    hits, reciprocal_ranks, latencies = 0, [], []
+    for item in fixture:
+        for _ in range(runs):
+            start = time.perf_counter()
+            docs = search(item["question"])
+            latencies.append((time.perf_counter() - start) * 1000)
+        expected = normalize(item["expected"])
+        rank = next((i for i, doc in enumerate(docs, start=1) if expected in normalize(doc.page_content)), None)
+        hits += rank is not None
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+    latencies.sort()
+    return {
+        "recall": hits / len(fixture),
+        "mrr": statistics.mean(reciprocal_ranks),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Assistant retrievers (recall@k, MRR, latency) on a question fixture.")
+    parser.add_argument("--reports", nargs="+", default=[DEFAULT_REPORT], help="PDFs to index (add assets/medical_summary.pdf as distractors)")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE, help="JSON list of {question, expected} where expected is text the right chunk contains")
+    parser.add_argument("--chunk-size", type=int, default=200, help="splitter chunk size (small, so the sample report spans several chunks)")
+    parser.add_argument("--chunk-overlap", type=int, default=40, help="splitter chunk overlap")
+    parser.add_argument("-k", type=int, default=2, help="chunks returned per question")
+    parser.add_argument("--fetch-k", type=int, default=10, help="candidates per retriever before fusion / MMR")
+    parser.add_argument("--reranker", default="", help="cross-encoder model to also measure hybrid+rerank")
+    parser.add_argument("--runs", type=int, default=5, help="timed runs per question")
+    args = parser.parse_args()
+
+    with open(args.fixture, "r", encoding="utf-8") as f:
+        fixture = json.load(f)
+    files = [LocalFile(path) for path in args.reports]
+    manager = SessionIndexManager(load_local_embedding_model(), args.chunk_size, args.chunk_overlap)
+    retrievers = build_retrievers(manager, files, args.k, args.fetch_k, args.reranker)
+
+    print(f"{len(manager.keyword_index)} chunk(s) from {', '.join(f.name for f in files)}, "
+          f"{len(fixture)} question(s), k={args.k}, {args.runs} run(s) per question\n")
+    print(f"{'retriever':<15}{'recall@k':>10}{'MRR':>8}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+    for name, retriever in retrievers.items():
+        r = measure(retriever, fixture, args.runs)
+        print(f"{name:<15}{r['recall']:>10.2f}{r['mrr']:>8.2f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,65 @@
 import streamlit as st
 import pandas as pd
-from scripts.ragas_evaluator import get_user_chat_history
+from scripts.ragas_evaluator import get_user_chat_page, get_chat_context, get_faithfulness_stats
 from scripts.config import get_logger
+from scripts.utils import enter_page, page_state
 
 # Logger setup
 logger = get_logger(__name__)
 
 st.set_page_config(page_title="RAGAS Evaluation", page_icon="📊", layout="wide")
 
+def display_faithfulness_stats(user_id: str):
+    """Show per-model faithfulness mean/p10 and the daily trend, aggregated by MongoDB."""
+    stats = get_faithfulness_stats(user_id)
+    if not stats["by_model"]:
+        return
+    st.subheader("📈 Faithfulness Overview")
+    summary = pd.DataFrame(stats["by_model"]).rename(columns={
+        "model": "Model Used", "chats": "Chats", "mean": "Mean Faithfulness", "p10": "P10 Faithfulness"
+    })
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+    if stats["trend"]:
+        trend = pd.DataFrame(stats["trend"]).pivot_table(index="day", columns="model", values="mean")
+        st.line_chart(trend)
+
+def display_chat_page(user_id: str):
+    """Show one page of chats; contexts are only loaded for rows the user expands."""
+    # Stack of cursors: cursors[i] is the cursor that loads page i
+    cursors = page_state("ragas_page_cursors", lambda: [None])
+    page_index = len(cursors) - 1
+    chats, next_cursor = get_user_chat_page(user_id, cursors[-1])
+    if not chats and page_index == 0:
+        st.info("No chat history found. Start asking questions in the Medical Report Chatbot page to see your history and metrics here! 😊")
+        return
+
+    st.subheader(f"💬 Chat History — Page {page_index + 1}")
+    df = pd.DataFrame([{
+        "Model Used": chat.get("model_used", "N/A"),
+        "Question": chat.get("question", ""),
+        "Answer": chat.get("generated_answer", ""),
+        "Faithfulness Score": chat.get("faithfulness_score"),
+        "Timestamp": chat.get("timestamp", "N/A")
+    } for chat in chats])
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+    for chat in chats:
+        with st.expander(f"🔎 {chat.get('timestamp', 'N/A')} — {chat.get('question', '')[:80]}"):
+            st.markdown(f"**Answer:** {chat.get('generated_answer', '')}")
+            if st.toggle("📚 Show retrieved context", key=f"context_{chat['_id']}"):
+                st.write(get_chat_context(chat["_id"]) or "No context stored.")
+
+    previous_col, next_col = st.columns(2)
+    if previous_col.button("⬅️ Newer", disabled=page_index == 0):
+        cursors.pop()
+        st.rerun()
+    if next_col.button("Older ➡️", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
+
 def display_ragas_evaluation():
-    """Display user's chat history and RAGAS metrics in a DataFrame."""
+    """Display user's chat history and RAGAS metrics."""
+    enter_page("ragas_evaluation")
     # Sidebar content
     st.sidebar.title("🤖 Medical Report Analyzer")
     st.sidebar.markdown(
@@ -26,27 +76,11 @@ def display_ragas_evaluation():
         return
 
     try:
-        chats = get_user_chat_history(st.session_state.user_id)
-        if not chats:
-            st.info("No chat history found. Start asking questions in the Medical Report Chatbot page to see your history and metrics here! 😊")
-            return
-
-        # Create DataFrame from chat data
-        df = pd.DataFrame([{
-            "Model Used": chat["model_used"],
-            "Question": chat["question"],
-            "Answer": chat["generated_answer"],
-            "Context": chat["retrieved_context"],
-            "Faithfulness Score": chat["faithfulness_score"],
-            "Timestamp": chat.get("timestamp", "N/A")
-        } for chat in chats])
-
-        # Display DataFrame
-        st.dataframe(df, use_container_width=True)
-
+        display_faithfulness_stats(st.session_state.user_id)
+        display_chat_page(st.session_state.user_id)
     except Exception as e:
         logger.error(f"❌ Error retrieving RAGAS evaluation data: {e}")
         st.error("❌ Failed to load evaluation data. Please try again.")
 
 if __name__ == "__main__":
-    display_ragas_evaluation()
\ No newline at end of file
+    display_ragas_evaluation()
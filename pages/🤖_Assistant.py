@@ -1,17 +1,15 @@
 import streamlit as st
 import os
 import uuid
-from langchain.memory import ConversationBufferMemory
 from langchain.chains import ConversationalRetrievalChain
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.vectorstores import FAISS
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain.prompts import PromptTemplate
-from scripts.utils import enable_chat_history, display_msg, print_qa, configure_llm, configure_embedding_model, apply_custom_css
+from scripts.utils import enable_chat_history, display_msg, print_qa, configure_llm, configure_embedding_model, apply_custom_css, stream_llm_response
 from scripts.config import get_logger
 from scripts.streaming import StreamHandler
-from scripts.config import TEMP_DIR
-from scripts.ragas_evaluator import evaluate_and_store
+from scripts.index_manager import SessionIndexManager
+from scripts.structured_answering import StructuredResultIndex, format_results_context, build_structured_answer_messages
+from scripts.evaluation_queue import get_evaluation_queue
+from scripts.conversation_memory import selective_question_generator
 
 logger = get_logger(__name__)
 
@@ -29,33 +27,34 @@ class MedicalChatbot:
             st.session_state.user_id = str(uuid.uuid4())
             logger.info(f"✅ Assigned new user_id: {st.session_state.user_id}")
 
-    def save_file(self, file):
-        """Save uploaded file temporarily."""
-        os.makedirs(TEMP_DIR, exist_ok=True)
-        file_path = os.path.join(TEMP_DIR, file.name)
-        with open(file_path, "wb") as f:
-            f.write(file.getvalue())
-        return file_path
+    def get_index_manager(self) -> SessionIndexManager:
+        """Return the per-session index manager, creating it on first use."""
+        if "index_manager" not in st.session_state:
+            st.session_state.index_manager = SessionIndexManager(self.embedding_model)
+        return st.session_state.index_manager
 
-    def setup_qa_chain(self):
-        """Set up the conversational QA chain with FAISS retriever."""
-        try:
-            docs = []
-            for file in self.uploaded_files:
-                file_path = self.save_file(file)
-                loader = PyPDFLoader(file_path)
-                docs.extend(loader.load())
-                os.unlink(file_path)
-                logger.info(f"✅ Removed temporary file: {file_path}")
+    def get_structured_index(self) -> StructuredResultIndex:
+        """Return the lookup over the analyzed test results, rebuilt when the set of analyzed reports changes."""
+        reports = st.session_state.get("reports", {})
+        key = tuple(sorted(reports))
+        cached = st.session_state.get("structured_index")
+        if cached is None or cached[0] != key:
+            cached = st.session_state.structured_index = (key, StructuredResultIndex(reports))
+        return cached[1]
 
-            if not docs:
-                raise ValueError("No valid PDF documents extracted.")
+    def answer_from_results(self, question: str, context: str) -> str:
+        """Fast path: answer from the matched result rows without embedding or retrieval."""
+        memory = self.get_index_manager().memory
+        messages = build_structured_answer_messages(question, context, memory.load_memory_variables({})["chat_history"])
+        response = stream_llm_response(messages, st.empty())
+        memory.save_context({"question": question}, {"answer": response})
+        return response
 
-            text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-            splits = text_splitter.split_documents(docs)
-            vector_db = FAISS.from_documents(splits, self.embedding_model)
-            retriever = vector_db.as_retriever(search_type="mmr", search_kwargs={"k": 2, "fetch_k": 4})
-            memory = ConversationBufferMemory(memory_key="chat_history", output_key="answer", return_messages=True)
+    def setup_qa_chain(self):
+        """Set up the conversational QA chain with the session's hybrid (BM25 + FAISS) retriever."""
+        try:
+            index_manager = self.get_index_manager()
+            retriever = index_manager.get_retriever(self.uploaded_files)
             system_prompt = PromptTemplate(
                 input_variables=["context", "question", "chat_history"],
                 template=(
@@ -64,13 +63,16 @@ class MedicalChatbot:
                     "Context: {context}\nChat History: {chat_history}\nQuestion: {question}\nAnswer:"
                 )
             )
-            return ConversationalRetrievalChain.from_llm(
+            qa_chain = ConversationalRetrievalChain.from_llm(
                 llm=self.llm,
                 retriever=retriever,
-                memory=memory,
+                memory=index_manager.memory,
                 return_source_documents=True,
                 combine_docs_chain_kwargs={"prompt": system_prompt}
             )
+            # Only follow-up questions pay for the extra condensing LLM call
+            qa_chain.question_generator = selective_question_generator(self.llm)
+            return qa_chain
         except Exception as e:
             logger.error(f"❌ Error setting up QA chain: {e}")
             return None
@@ -107,6 +109,12 @@ class MedicalChatbot:
                 st.session_state.enable_ragas = False
         else:
             st.session_state.enable_ragas = False
+        if st.session_state.enable_ragas:
+            queue_metrics = get_evaluation_queue().metrics()
+            st.sidebar.caption(
+                f"📥 Queued: {queue_metrics['depth']} · ✅ Scored: {queue_metrics['evaluated']} · "
+                f"⏱️ Lag: {queue_metrics['last_lag_s']:.1f}s"
+            )
 
         if not self.uploaded_files:
             st.error("❌ Upload a PDF report on the Home page first.")
@@ -114,38 +122,39 @@ class MedicalChatbot:
 
         user_query = st.chat_input(placeholder="🔎 Ask about your report")
         if user_query:
-            qa_chain = self.setup_qa_chain()
-            if not qa_chain:
+            # Questions about specific tests or statuses are answered from the analyzed results;
+            # everything else goes through vector retrieval over the PDF chunks
+            structured_rows = self.get_structured_index().match(user_query)
+            qa_chain = None if structured_rows else self.setup_qa_chain()
+            if not structured_rows and not qa_chain:
                 st.error("❌ Failed to set up retrieval system.")
                 return
 
             display_msg(user_query, "user")
             with st.chat_message("assistant", avatar="🤖"):
-                st_cb = StreamHandler(st.empty())
-                result = qa_chain.invoke({"question": user_query}, {"callbacks": [st_cb]})
-                retrieved_docs = result.get("source_documents", [])
-                retrieved_contexts = [doc.page_content for doc in retrieved_docs]
-                combined_context = " ".join(retrieved_contexts) if retrieved_contexts else ""
-                response = result["answer"]
-                st.write(response)
+                if structured_rows:
+                    logger.info(f"✅ Answering from {len(structured_rows)} structured result(s)")
+                    retrieved_contexts = [format_results_context(structured_rows)]
+                    response = self.answer_from_results(user_query, retrieved_contexts[0])
+                else:
+                    st_cb = StreamHandler(st.empty())
+                    result = qa_chain.invoke({"question": user_query}, {"callbacks": [st_cb]})
+                    retrieved_docs = result.get("source_documents", [])
+                    retrieved_contexts = [doc.page_content for doc in retrieved_docs]
+                    response = result["answer"]
+                    st.write(response)
                 print_qa(MedicalChatbot, user_query, response)
 
-                # RAGAS evaluation and storage
+                # RAGAS evaluation and storage run in the background; the page doesn't wait for them
                 if st.session_state.get("enable_ragas", False) and "OPENAI_API_KEY" in os.environ:
-                    try:
-                        evaluate_and_store(
-                            question=user_query,
-                            generated_answer=response,
-                            context=combined_context,
-                            user_id=st.session_state.user_id
-                        )
-                    except Exception as e:
-                        if "AuthenticationError" in str(e) or "invalid_api_key" in str(e).lower():
-                            logger.error(f"❌ OpenAI API authentication failed: {e}")
-                            st.error("❌ Authentication failed. Please check your OpenAI API key.")
-                        else:
-                            logger.error(f"❌ Error during RAGAS evaluation: {e}")
-                            st.error("❌ Failed to evaluate and store metrics.")
+                    queued = get_evaluation_queue().submit(
+                        question=user_query,
+                        answer=response,
+                        contexts=retrieved_contexts or [""],
+                        user_id=st.session_state.user_id
+                    )
+                    if not queued:
+                        st.warning("⚠️ Evaluation queue is busy, this answer won't be scored.")
 
 if __name__ == "__main__":
     MedicalChatbot().main()
\ No newline at end of file
@@ -1,13 +1,14 @@
 import streamlit as st
 import pandas as pd
 from scripts.pdf_generator import generate_pdf_summary
-from scripts.utils import apply_custom_css
+from scripts.utils import apply_custom_css, enter_page, select_report
 from scripts.config import get_logger
 
 logger = get_logger(__name__)
 
 st.set_page_config(page_title="Medical Report Analyzer", page_icon="🩺", layout="wide")
 apply_custom_css()
+enter_page("analyze")
 
 def main():
     """Main function for the Analyze page to display medical report results."""
@@ -20,6 +21,20 @@ def main():
     st.header("🩺 Medical Report Analysis 🌟")
     st.markdown("<p style='color:#00ff99'>Detailed analysis of your medical report.</p>", unsafe_allow_html=True)
 
+    # Let the user switch between reports when several were analyzed on the Home page
+    reports = st.session_state.get("reports", {})
+    report_order = [h for h in st.session_state.get("report_order", []) if h in reports]
+    if len(report_order) > 1:
+        current = st.session_state.get("selected_report")
+        selected = st.selectbox(
+            "📂 Select Report",
+            report_order,
+            index=report_order.index(current) if current in report_order else 0,
+            format_func=lambda h: reports[h]["name"]
+        )
+        if selected != current:
+            select_report(selected)
+
     metadata = st.session_state.get("metadata", [])
     test_results = st.session_state.get("test_results", [])
     explanation = st.session_state.get("explanation", "")
@@ -0,0 +1,96 @@
+import os, queue, tempfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Dict, Iterator, List, NamedTuple, Optional, Union
+from scripts.config import get_logger, BATCH_MAX_WORKERS, STREAM_FLUSH_INTERVAL_MS
+from scripts.ocr import extract_text
+from scripts.processing import ProgressCallback, analyze_report
+from scripts.result_store import AnalysisResultStore, file_content_hash
+
+logger = get_logger(__name__)
+
+class ReportJob(NamedTuple):
+    """One PDF to analyze: its display name and raw bytes."""
+    name: str
+    data: bytes
+
+class ReportOutcome(NamedTuple):
+    """Result of analyzing one PDF; exactly one of `result` and `error` is set."""
+    name: str
+    report_hash: str
+    result: Optional[Dict]
+    error: Optional[str]
+
+class ReportProgress(NamedTuple):
+    """A partial result for one PDF (see `processing.ProgressCallback` for events and payloads)."""
+    name: str
+    report_hash: str
+    event: str
+    payload: object
+
+def analyze_pdf_bytes(name: str, data: bytes, on_progress: Optional[ProgressCallback] = None) -> Dict:
+    """Write PDF bytes to a temporary file, extract its text and run the analysis pipeline."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(name)[1] or ".pdf") as tmp_file:
+        tmp_file.write(data)
+        tmp_file_path = tmp_file.name
+    try:
+        raw_text = extract_text(tmp_file_path)
+        if not raw_text:
+            raise ValueError("Text extraction failed")
+        return analyze_report(raw_text, on_progress=on_progress)
+    finally:
+        os.unlink(tmp_file_path)
+        logger.info(f"✅ Temporary file deleted: {tmp_file_path}")
+
+def _run_job(job: ReportJob, report_hash: str, result_store: Optional[AnalysisResultStore],
+             progress_queue: Optional[queue.Queue] = None) -> ReportOutcome:
+    on_progress = None
+    if progress_queue is not None:
+        on_progress = lambda event, payload: progress_queue.put(ReportProgress(job.name, report_hash, event, payload))
+    try:
+        result = result_store.get(report_hash) if result_store else None
+        if result is None:
+            result = analyze_pdf_bytes(job.name, job.data, on_progress)
+            if result_store:
+                result_store.put(report_hash, result)
+        return ReportOutcome(job.name, report_hash, result, None)
+    except Exception as e:
+        logger.error(f"❌ Error processing {job.name}: {str(e)}")
+        return ReportOutcome(job.name, report_hash, None, str(e))
+
+def analyze_batch(jobs: List[ReportJob], max_workers: Optional[int] = None,
+                  result_store: Optional[AnalysisResultStore] = None,
+                  progress: bool = False) -> Iterator[Union[ReportOutcome, ReportProgress]]:
+    """
+    Analyze PDFs on a bounded thread pool, yielding each outcome as soon as it finishes.
+    Outcomes are yielded in the caller's thread, so it is safe to update UI from the loop.
+
+    With `progress=True`, ReportProgress events (categorized tests, streaming explanation and summary
+    text) are yielded too, polled every STREAM_FLUSH_INTERVAL_MS and coalesced to the latest payload
+    per report and event. A report's progress events always come before its outcome.
+    """
+    max_workers = max(1, min(max_workers or BATCH_MAX_WORKERS, len(jobs) or 1))
+    logger.info(f"♻ Analyzing {len(jobs)} report(s) with {max_workers} worker(s)")
+    progress_queue = queue.Queue() if progress else None
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-worker") as executor:
+        futures = [executor.submit(_run_job, job, file_content_hash(job.data), result_store, progress_queue) for job in jobs]
+        if progress_queue is None:
+            for future in as_completed(futures):
+                yield future.result()
+        else:
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=STREAM_FLUSH_INTERVAL_MS / 1000, return_when=FIRST_COMPLETED)
+                yield from _drain_progress(progress_queue)
+                for future in done:
+                    yield future.result()
+    logger.info("✅ Batch analysis completed")
+
+def _drain_progress(progress_queue: queue.Queue) -> List[ReportProgress]:
+    """Take every queued progress event, keeping only the latest per (report, event)."""
+    latest = {}
+    while True:
+        try:
+            item = progress_queue.get_nowait()
+        except queue.Empty:
+            return list(latest.values())
+        latest[(item.report_hash, item.event)] = item
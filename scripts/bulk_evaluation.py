@@ -0,0 +1,120 @@
+import argparse, json, os, sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from scripts.config import get_logger, BULK_EVAL_PAGE_SIZE, BULK_EVAL_BATCH_SIZE, BULK_EVAL_WORKERS
+from scripts.mongo import get_collection
+from scripts.ragas_evaluator import score_rag_dataset
+
+logger = get_logger(__name__)
+
+DEFAULT_METRICS = ["faithfulness", "answer_relevancy", "context_precision"]
+CHECKPOINT_FILE = "ragas_rescore_checkpoint.json"
+PROJECTION = {"question": 1, "generated_answer": 1, "retrieved_context": 1}
+
+def load_checkpoint(path: str) -> Dict:
+    """Return the saved progress ({"last_id", "scored", "failed_ids"}) or a fresh one."""
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"last_id": None, "scored": 0, "failed_ids": []}
+
+def save_checkpoint(path: str, checkpoint: Dict):
+    """Write the checkpoint atomically so an interrupted run never leaves a torn file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+def _restore_id(value: Optional[str]):
+    """Checkpoints store _id as a string; turn ObjectId strings back into ObjectIds."""
+    if value is None:
+        return None
+    from bson import ObjectId
+    return ObjectId(value) if ObjectId.is_valid(value) else value
+
+def iter_chat_pages(collection, after_id=None, page_size: int = BULK_EVAL_PAGE_SIZE, query: Optional[Dict] = None) -> Iterator[List[Dict]]:
+    """Stream chat documents in `_id` order, one page at a time, starting after `after_id`."""
+    query = dict(query or {})
+    while True:
+        page_query = {**query, "_id": {"$gt": after_id}} if after_id is not None else query
+        page = list(collection.find(page_query, PROJECTION).sort("_id", 1).limit(page_size))
+        if not page:
+            return
+        yield page
+        after_id = page[-1]["_id"]
+
+def score_batch(documents: List[Dict], metric_names: List[str]) -> Optional[List[Dict]]:
+    """Score one batch of chat documents; returns None if RAGAS failed for the batch."""
+    try:
+        return score_rag_dataset(
+            [doc.get("question", "") for doc in documents],
+            [doc.get("generated_answer", "") for doc in documents],
+            [[doc.get("retrieved_context") or ""] for doc in documents],
+            metric_names,
+        )
+    except Exception as e:
+        logger.error(f"❌ RAGAS batch of {len(documents)} failed: {e}")
+        return None
+
+def write_scores(collection, documents: List[Dict], scores: List[Dict]) -> int:
+    """Write scores back as `<metric>_score` fields with one unordered bulk_write; returns modified count."""
+    from pymongo import UpdateOne
+    evaluated_at = datetime.utcnow().isoformat() + "Z"
+    operations = [
+        UpdateOne({"_id": doc["_id"]}, {"$set": {**{f"{name}_score": value for name, value in row.items()},
+                                                 "evaluated_at": evaluated_at}})
+        for doc, row in zip(documents, scores)
+    ]
+    if not operations:
+        return 0
+    return collection.bulk_write(operations, ordered=False).modified_count
+
+def run(metric_names: List[str], checkpoint_path: str, page_size: int = BULK_EVAL_PAGE_SIZE,
+        batch_size: int = BULK_EVAL_BATCH_SIZE, workers: int = BULK_EVAL_WORKERS, resume: bool = True,
+        db_name: str = "diagnosify", collection_name: str = "chat_history", query: Optional[Dict] = None) -> Dict:
+    """
+    Re-score stored chats page by page. Each page is split into batches scored concurrently on
+    `workers` threads; scores are written back with bulk updates and the checkpoint advances to the
+    page's last `_id` once the whole page is done, so an interrupted run resumes from there.
+    """
+    collection = get_collection(db_name, collection_name)
+    checkpoint = load_checkpoint(checkpoint_path) if resume else {"last_id": None, "scored": 0, "failed_ids": []}
+    batch_size = max(1, batch_size)
+    logger.info(f"♻ Bulk RAGAS evaluation ({', '.join(metric_names)}) starting after {checkpoint['last_id']}")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ragas-bulk") as executor:
+        for page in iter_chat_pages(collection, _restore_id(checkpoint["last_id"]), page_size, query):
+            batches = [page[i:i + batch_size] for i in range(0, len(page), batch_size)]
+            for batch, scores in zip(batches, executor.map(lambda b: score_batch(b, metric_names), batches)):
+                if scores is None:
+                    checkpoint["failed_ids"].extend(str(doc["_id"]) for doc in batch)
+                    continue
+                write_scores(collection, batch, scores)
+                checkpoint["scored"] += len(batch)
+            checkpoint["last_id"] = str(page[-1]["_id"])
+            save_checkpoint(checkpoint_path, checkpoint)
+            logger.info(f"♻ Scored {checkpoint['scored']} chat(s), {len(checkpoint['failed_ids'])} failed, up to _id {checkpoint['last_id']}")
+
+    logger.info(f"✅ Bulk RAGAS evaluation finished: {checkpoint['scored']} scored, {len(checkpoint['failed_ids'])} failed")
+    return checkpoint
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="diagnosify-rescore", description="Re-score stored chat history with RAGAS metrics.")
+    parser.add_argument("--metrics", nargs="+", default=DEFAULT_METRICS, choices=DEFAULT_METRICS, help="metrics to compute")
+    parser.add_argument("--page-size", type=int, default=BULK_EVAL_PAGE_SIZE, help="documents read from MongoDB per page")
+    parser.add_argument("--batch-size", type=int, default=BULK_EVAL_BATCH_SIZE, help="rows per ragas.evaluate call")
+    parser.add_argument("-w", "--workers", type=int, default=BULK_EVAL_WORKERS, help="batches evaluated concurrently")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="checkpoint file used to resume")
+    parser.add_argument("--no-resume", action="store_true", help="ignore the checkpoint and start from the first chat")
+    parser.add_argument("--user-id", default=None, help="only re-score this user's chats")
+    parser.add_argument("--db", default="diagnosify", help="MongoDB database")
+    parser.add_argument("--collection", default="chat_history", help="MongoDB collection")
+    args = parser.parse_args(argv)
+    checkpoint = run(args.metrics, args.checkpoint, args.page_size, args.batch_size, args.workers,
+                     resume=not args.no_resume, db_name=args.db, collection_name=args.collection,
+                     query={"user_id": args.user_id} if args.user_id else None)
+    return 1 if checkpoint["failed_ids"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
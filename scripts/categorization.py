@@ -0,0 +1,134 @@
+import re
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from scripts.config import get_logger, BORDERLINE_MARGIN
+
+logger = get_logger(__name__)
+
+TEST_KEYS = ("test_name", "test", "test name")
+VALUE_KEYS = ("value", "result", "observed_value")
+RANGE_KEYS = ("normal_range", "reference_range", "range", "reference", "ref_range", "normal_value", "reference_interval")
+UNIT_KEYS = ("unit", "units")
+
+_NUMBER = r"(-?\d+(?:\.\d+)?)"
+_BETWEEN = re.compile(rf"^{_NUMBER}\s*(?:-|–|—|to)\s*{_NUMBER}\s*(.*)$", re.IGNORECASE)
+_UPPER = re.compile(rf"^(?:<=?|≤|less than|up to|below|upto)\s*{_NUMBER}\s*(.*)$", re.IGNORECASE)
+_LOWER = re.compile(rf"^(?:>=?|≥|greater than|more than|above)\s*{_NUMBER}\s*(.*)$", re.IGNORECASE)
+_VALUE = re.compile(rf"^{_NUMBER}\s*(.*)$")
+
+def _normalize_key(key: str) -> str:
+    return str(key).strip().lower().replace(" ", "_")
+
+def _field(row: Dict, keys: Tuple[str, ...]) -> Optional[str]:
+    """Return the first field of `row` whose normalized key is in `keys`."""
+    normalized = {k.replace(" ", "_") for k in keys}
+    for key, value in row.items():
+        if _normalize_key(key) in normalized and value not in (None, ""):
+            return str(value)
+    return None
+
+def _normalize_unit(unit: str) -> str:
+    unit = re.sub(r"\s+", "", unit or "").lower().rstrip(".")
+    return "" if unit in ("unknown", "n/a", "na", "-") else unit
+
+def parse_value(value: Optional[str]) -> Tuple[float, str]:
+    """Parse a measured value like "13.2 g/dL" into (number, unit). Returns nan if not a plain number."""
+    if value is None:
+        return np.nan, ""
+    match = _VALUE.match(str(value).replace(",", "").strip())
+    if not match:
+        return np.nan, ""
+    return float(match.group(1)), match.group(2).strip()
+
+def parse_range(range_text: Optional[str]) -> Tuple[float, float, str]:
+    """
+    Parse a reference range into (low, high, unit); open ends are nan.
+    Supports "13.5-17.5", "13.5 to 17.5 g/dL", "<200", "> 40 mg/dL", "up to 40".
+    Returns (nan, nan, "") if the text is not understood.
+    """
+    if range_text is None:
+        return np.nan, np.nan, ""
+    text = str(range_text).replace(",", "").strip()
+    match = _BETWEEN.match(text)
+    if match:
+        low, high = float(match.group(1)), float(match.group(2))
+        return min(low, high), max(low, high), match.group(3).strip()
+    match = _UPPER.match(text)
+    if match:
+        return np.nan, float(match.group(1)), match.group(2).strip()
+    match = _LOWER.match(text)
+    if match:
+        return float(match.group(1)), np.nan, match.group(2).strip()
+    return np.nan, np.nan, ""
+
+def compute_statuses(values: np.ndarray, lows: np.ndarray, highs: np.ndarray, margin: float = BORDERLINE_MARGIN) -> np.ndarray:
+    """
+    Vectorized status assignment. A value inside [low, high] is Normal; outside by at most `margin` ×
+    the limit it crossed (e.g. 25% of 20 for an ESR of 25 against 0-20) is Borderline; further out is Critical.
+    A limit of 0 falls back to `margin` × the range width. Rows with a missing value or no bound come back as "" (unresolved).
+    """
+    has_low, has_high = ~np.isnan(lows), ~np.isnan(highs)
+    width = np.where(has_low & has_high, highs - lows, np.nan)
+    limit = np.abs(np.where(has_low & (values < lows), lows, np.where(has_high, highs, lows)))
+    with np.errstate(invalid="ignore"):
+        tolerance = margin * np.where(limit > 0, limit, np.nan_to_num(width))
+
+    below = has_low & (values < lows)
+    above = has_high & (values > highs)
+    distance = np.where(below, lows - values, np.where(above, values - highs, 0.0))
+    resolvable = ~np.isnan(values) & (has_low | has_high)
+
+    with np.errstate(invalid="ignore"):
+        statuses = np.select(
+            [~resolvable, distance == 0, distance <= tolerance],
+            ["", "Normal", "Borderline"],
+            default="Critical",
+        )
+    return statuses
+
+def is_test_row(row: Dict) -> bool:
+    """Heuristic: a row is a test result if it names a test or carries a measured value."""
+    return _field(row, TEST_KEYS) is not None or _field(row, VALUE_KEYS) is not None
+
+def categorize_by_rules(results: List[Dict], margin: float = BORDERLINE_MARGIN) -> Tuple[List[Dict], List[int]]:
+    """
+    Assign 'status' to test rows whose value and reference range can be parsed.
+    Returns (categorized copy of results, indices of test rows that still need the LLM).
+    Non-test rows (patient name, age, date...) and non-dict rows from the LLM are passed through untouched.
+    """
+    categorized = [dict(row) if isinstance(row, dict) else row for row in results]
+    test_indices = [i for i, row in enumerate(categorized) if isinstance(row, dict) and is_test_row(row)]
+    if not test_indices:
+        return categorized, []
+
+    values, lows, highs = (np.full(len(test_indices), np.nan) for _ in range(3))
+    for n, i in enumerate(test_indices):
+        row = categorized[i]
+        value, value_unit = parse_value(_field(row, VALUE_KEYS))
+        low, high, range_unit = parse_range(_field(row, RANGE_KEYS))
+        row_unit = _normalize_unit(_field(row, UNIT_KEYS) or value_unit)
+        # Don't compare across units (e.g. value in mmol/L against a range in mg/dL)
+        if range_unit and row_unit and _normalize_unit(range_unit) != row_unit:
+            continue
+        values[n], lows[n], highs[n] = value, low, high
+
+    statuses = compute_statuses(values, lows, highs, margin)
+    unresolved = []
+    for i, status in zip(test_indices, statuses):
+        if status:
+            categorized[i]["status"] = str(status)
+        else:
+            unresolved.append(i)
+    logger.info(f"✅ Rule-based categorization resolved {len(test_indices) - len(unresolved)}/{len(test_indices)} test rows")
+    return categorized, unresolved
+
+def merge_llm_statuses(categorized: List[Dict], unresolved: List[int], llm_rows: Optional[List[Dict]]) -> List[Dict]:
+    """Copy the LLM-assigned statuses for the unresolved rows back into the rule-categorized list."""
+    if not llm_rows or len(llm_rows) != len(unresolved):
+        if unresolved:
+            logger.warning("⚠️ LLM categorization unavailable or misaligned, leaving unresolved rows without status")
+        return categorized
+    for i, row in zip(unresolved, llm_rows):
+        if isinstance(row, dict) and row.get("status"):
+            categorized[i]["status"] = row["status"]
+    return categorized
@@ -0,0 +1,102 @@
+import argparse, glob, json, os, sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Set
+from scripts.config import get_logger, BATCH_MAX_WORKERS
+from scripts.ocr import extract_text
+from scripts.processing import process_medical_report
+from scripts.pdf_generator import generate_pdf_summary
+from scripts.result_store import file_content_hash
+
+logger = get_logger(__name__)
+
+RESULTS_FILE = "results.jsonl"
+
+def collect_pdf_paths(inputs: List[str]) -> List[str]:
+    """Expand directories (recursively) and glob patterns into a sorted, de-duplicated list of PDF paths."""
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, "**", "*.pdf"), recursive=True)
+            matches += glob.glob(os.path.join(item, "**", "*.PDF"), recursive=True)
+        else:
+            matches = glob.glob(item, recursive=True)
+        paths.update(os.path.abspath(p) for p in matches if p.lower().endswith(".pdf") and os.path.isfile(p))
+    return sorted(paths)
+
+def load_completed_hashes(results_path: str) -> Set[str]:
+    """Return content hashes of reports already processed successfully in a previous run."""
+    completed = set()
+    if not os.path.exists(results_path):
+        return completed
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a partially written last line from an interrupted run
+            if record.get("status") == "ok":
+                completed.add(record["report_hash"])
+    return completed
+
+def process_pdf(path: str, report_hash: str, output_dir: str, mode: str) -> Dict:
+    """Run extraction, processing and PDF generation for one report and return its JSONL record."""
+    record = {"file": path, "report_hash": report_hash, "processed_at": datetime.utcnow().isoformat() + "Z"}
+    try:
+        text = extract_text(path)
+        if not text:
+            raise ValueError("Text extraction failed")
+        table_results, explanations, summary_bullets = process_medical_report(text, mode=mode)
+        if not table_results:
+            raise ValueError(explanations or "Report processing failed")
+        pdf_path = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(path))[0]}-{report_hash[:8]}.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(generate_pdf_summary(table_results, explanations, summary_bullets))
+        record.update(status="ok", table_results=table_results, explanations=explanations,
+                      summary_bullets=summary_bullets, pdf=pdf_path)
+    except Exception as e:
+        logger.error(f"❌ Error processing {path}: {str(e)}")
+        record.update(status="error", error=str(e))
+    return record
+
+def run(inputs: List[str], output_dir: str, workers: int, mode: str = None, resume: bool = True) -> int:
+    """Process all PDFs matched by `inputs`; returns the number of failed reports."""
+    os.makedirs(output_dir, exist_ok=True)
+    results_path = os.path.join(output_dir, RESULTS_FILE)
+    completed = load_completed_hashes(results_path) if resume else set()
+
+    pending = {}
+    for path in collect_pdf_paths(inputs):
+        with open(path, "rb") as f:
+            report_hash = file_content_hash(f.read())
+        if report_hash not in completed:
+            pending.setdefault(report_hash, path)
+    print(f"Found {len(pending)} report(s) to process ({len(completed)} already done).")
+    logger.info(f"♻ CLI batch: {len(pending)} pending, {len(completed)} completed, {workers} worker(s)")
+
+    failures = 0
+    with open(results_path, "a", encoding="utf-8") as results_file, \
+            ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(process_pdf, path, report_hash, output_dir, mode) for report_hash, path in pending.items()]
+        for done, future in enumerate(as_completed(futures), start=1):
+            record = future.result()
+            results_file.write(json.dumps(record) + "\n")
+            results_file.flush()
+            failures += record["status"] != "ok"
+            print(f"[{done}/{len(pending)}] {record['status']:5} {record['file']}")
+    logger.info(f"✅ CLI batch finished with {failures} failure(s)")
+    return failures
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="diagnosify-batch", description="Bulk-process medical report PDFs without the Streamlit UI.")
+    parser.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument("-o", "--output-dir", default="output", help="directory for results.jsonl and summary PDFs")
+    parser.add_argument("-w", "--workers", type=int, default=BATCH_MAX_WORKERS, help="number of reports processed concurrently")
+    parser.add_argument("--mode", choices=["serial", "dag"], default=None, help="pipeline mode (defaults to PIPELINE_MODE)")
+    parser.add_argument("--no-resume", action="store_true", help="reprocess reports already recorded in results.jsonl")
+    args = parser.parse_args(argv)
+    failures = run(args.inputs, args.output_dir, args.workers, args.mode, resume=not args.no_resume)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@ import dotenv, os, logging
 from urllib.parse import quote_plus
 
 # Configure Logging
+os.makedirs("logs", exist_ok=True)
 logging.basicConfig(
     filename=os.path.join("logs", "app.log"),
     level=logging.INFO,
@@ -28,6 +29,93 @@ try:
         os.makedirs(TEMP_DIR)
         logger.info(f"✅ Created temporary directory: {TEMP_DIR}")
 
+    # Embedding model and on-disk embedding cache (set EMBEDDING_CACHE_MAX_ENTRIES=0 to disable)
+    EMBEDDING_MODEL_NAME: str = os.getenv("EMBEDDING_MODEL_NAME") or "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_CACHE_DIR: str = os.getenv("EMBEDDING_CACHE_DIR") or os.path.join(TEMP_DIR, "embedding_cache")
+    EMBEDDING_CACHE_MAX_ENTRIES: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES") or 20000)
+
+    # Where embeddings are computed: "local" (model in this process), "batched" (in-process micro-batcher
+    # shared by all sessions) or "socket" (shared service started with `diagnosify-embedding-server`)
+    EMBEDDING_SERVICE_MODE: str = (os.getenv("EMBEDDING_SERVICE_MODE") or "local").lower()
+    EMBEDDING_SERVICE_SOCKET: str = os.getenv("EMBEDDING_SERVICE_SOCKET") or os.path.join(TEMP_DIR, "embedding.sock")
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE") or 64)
+    EMBEDDING_BATCH_WAIT_MS: float = float(os.getenv("EMBEDDING_BATCH_WAIT_MS") or 5)
+    # Embedding runtime: torch (HuggingFaceEmbeddings), onnx (ONNX Runtime fp32) or onnx-int8 (dynamically quantized)
+    EMBEDDING_BACKEND: str = (os.getenv("EMBEDDING_BACKEND") or "torch").lower()
+    EMBEDDING_ONNX_DIR: str = os.getenv("EMBEDDING_ONNX_DIR") or os.path.join(TEMP_DIR, "onnx")
+
+    # Bounded retry for pipeline LLM calls (retries after the first attempt, base backoff in seconds)
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES") or 2)
+    LLM_RETRY_BACKOFF: float = float(os.getenv("LLM_RETRY_BACKOFF") or 1.0)
+
+    # LLM response cache for the processing stages, used at temperature 0 only (LLM_CACHE_MAX_ENTRIES=0 disables it).
+    # Responses contain patient data, so they stay in memory unless LLM_CACHE_DB names a SQLite file to persist them.
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES") or 256)
+    LLM_CACHE_DB: str = os.getenv("LLM_CACHE_DB") or ""
+    LLM_CACHE_TTL: float = float(os.getenv("LLM_CACHE_TTL") or 7 * 24 * 3600)
+
+    # Streaming UI render cadence: re-render at most every N milliseconds or every N tokens
+    STREAM_FLUSH_INTERVAL_MS: float = float(os.getenv("STREAM_FLUSH_INTERVAL_MS") or 50)
+    STREAM_FLUSH_TOKENS: int = int(os.getenv("STREAM_FLUSH_TOKENS") or 20)
+
+    # Report pipeline execution: "serial" runs stages one after another, "dag" (opt-in) runs independent stages concurrently
+    PIPELINE_MODE: str = (os.getenv("PIPELINE_MODE") or "serial").lower()
+    PIPELINE_MAX_CONCURRENCY: int = int(os.getenv("PIPELINE_MAX_CONCURRENCY") or 4)
+    STRUCTURE_CHUNK_CHARS: int = int(os.getenv("STRUCTURE_CHUNK_CHARS") or 6000)
+    EXPLANATION_SHARD_SIZE: int = int(os.getenv("EXPLANATION_SHARD_SIZE") or 5)
+
+    # Analysis result store keyed by file content hash (RESULT_STORE_DIR enables on-disk persistence)
+    RESULT_STORE_MAX_ENTRIES: int = int(os.getenv("RESULT_STORE_MAX_ENTRIES") or 64)
+    RESULT_STORE_DIR: str = os.getenv("RESULT_STORE_DIR") or ""
+
+    # PDF text extraction: PDFs with at least PDF_PARALLEL_MIN_PAGES pages are extracted on a pool of PDF_WORKERS processes;
+    # pages with fewer than OCR_MIN_CHARS characters of text that contain images are OCR'd with Tesseract (OCR_LANG)
+    PDF_WORKERS: int = int(os.getenv("PDF_WORKERS") or min(4, os.cpu_count() or 1))
+    PDF_PARALLEL_MIN_PAGES: int = int(os.getenv("PDF_PARALLEL_MIN_PAGES") or 4)
+    OCR_MIN_CHARS: int = int(os.getenv("OCR_MIN_CHARS") or 20)
+    OCR_LANG: str = os.getenv("OCR_LANG") or "eng"
+
+    # Worker pool size for analyzing several uploaded reports at once
+    BATCH_MAX_WORKERS: int = int(os.getenv("BATCH_MAX_WORKERS") or 4)
+
+    # Extraction: "single" returns the final table schema in one LLM call, "multi" uses structure → categorize → format
+    EXTRACTION_MODE: str = (os.getenv("EXTRACTION_MODE") or "single").lower()
+
+    # Rule-based status categorization: how far past a reference limit (as a fraction of that limit) still counts as Borderline
+    BORDERLINE_MARGIN: float = float(os.getenv("BORDERLINE_MARGIN") or 0.25)
+
+    # MongoDB connection pool and batched chat-metric writes
+    MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE") or 10)
+    MONGO_MIN_POOL_SIZE: int = int(os.getenv("MONGO_MIN_POOL_SIZE") or 0)
+    MONGO_WRITE_BATCH_SIZE: int = int(os.getenv("MONGO_WRITE_BATCH_SIZE") or 20)
+    MONGO_WRITE_FLUSH_SECONDS: float = float(os.getenv("MONGO_WRITE_FLUSH_SECONDS") or 5)
+    MONGO_WRITE_MAX_BUFFER: int = int(os.getenv("MONGO_WRITE_MAX_BUFFER") or 1000)
+    MONGO_WRITE_MAX_RETRIES: int = int(os.getenv("MONGO_WRITE_MAX_RETRIES") or 5)
+
+    # Background RAGAS evaluation queue (bounded; submit waits EVAL_SUBMIT_TIMEOUT_SECONDS before dropping a job)
+    EVAL_QUEUE_MAX_SIZE: int = int(os.getenv("EVAL_QUEUE_MAX_SIZE") or 100)
+    EVAL_BATCH_SIZE: int = int(os.getenv("EVAL_BATCH_SIZE") or 8)
+    EVAL_BATCH_WAIT_SECONDS: float = float(os.getenv("EVAL_BATCH_WAIT_SECONDS") or 2)
+    EVAL_SUBMIT_TIMEOUT_SECONDS: float = float(os.getenv("EVAL_SUBMIT_TIMEOUT_SECONDS") or 0.5)
+    EVAL_WORKERS: int = int(os.getenv("EVAL_WORKERS") or 1)
+
+    # Assistant retrieval: "hybrid" fuses BM25 keyword and FAISS results with reciprocal rank fusion, "mmr" is vector-only
+    RETRIEVAL_MODE: str = (os.getenv("RETRIEVAL_MODE") or "hybrid").lower()
+    RETRIEVAL_K: int = int(os.getenv("RETRIEVAL_K") or 2)
+    RETRIEVAL_FETCH_K: int = int(os.getenv("RETRIEVAL_FETCH_K") or 10)
+    # Assistant conversation memory: recent turns kept verbatim up to this many (approximate) tokens, older ones are summarized
+    MEMORY_MAX_TOKENS: int = int(os.getenv("MEMORY_MAX_TOKENS") or 1000)
+    # Optional CPU cross-encoder that reranks the fused candidates (e.g. cross-encoder/ms-marco-MiniLM-L-6-v2; empty disables it)
+    RERANKER_MODEL: str = os.getenv("RERANKER_MODEL") or ""
+
+    # Rows per page on the RAGAS Evaluation page
+    CHAT_HISTORY_PAGE_SIZE: int = int(os.getenv("CHAT_HISTORY_PAGE_SIZE") or 25)
+
+    # Offline bulk RAGAS re-scoring of stored chats (scripts/bulk_evaluation.py)
+    BULK_EVAL_PAGE_SIZE: int = int(os.getenv("BULK_EVAL_PAGE_SIZE") or 500)
+    BULK_EVAL_BATCH_SIZE: int = int(os.getenv("BULK_EVAL_BATCH_SIZE") or 20)
+    BULK_EVAL_WORKERS: int = int(os.getenv("BULK_EVAL_WORKERS") or 4)
+
     logger.info("✅ Configuration loaded successfully.")
 
 except Exception as e:
@@ -35,8 +123,11 @@ except Exception as e:
     raise
 
 def get_mongo_uri():
-    """Construct and return MongoDB Atlas URI from environment variables."""
+    """Construct and return MongoDB Atlas URI from environment variables (MONGO_URI, e.g. a local mongod, takes precedence)."""
     try:
+        if os.getenv("MONGO_URI"):
+            return os.getenv("MONGO_URI")
+
         DB_NAME = os.getenv("MONGO_DB", "diagnosify")
         MONGO_USER = os.getenv("MONGO_USER")
         MONGO_PASSWORD = os.getenv("MONGO_PASSWORD")
@@ -0,0 +1,130 @@
+import re, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+from langchain.chains import LLMChain
+from langchain.chains.conversational_retrieval.prompts import CONDENSE_QUESTION_PROMPT
+from langchain.memory.chat_memory import BaseChatMemory
+from langchain_core.messages import BaseMessage, SystemMessage, get_buffer_string
+from pydantic import PrivateAttr
+from scripts.config import get_logger, MEMORY_MAX_TOKENS
+from scripts.llm import create_llm_prompt, invoke_with_retry, record_stage_event
+
+logger = get_logger(__name__)
+
+# One background thread folds evicted turns into summaries for every session
+_summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summary")
+
+def count_tokens(messages: List[BaseMessage]) -> int:
+    """Approximate token count (about 4 characters per token); Groq models have no local tokenizer."""
+    return sum(len(str(message.content)) for message in messages) // 4 + 4 * len(messages)
+
+def summarize_conversation(summary: str, messages: List[BaseMessage]) -> str:
+    """Extend the running summary with the given turns (one LLM call)."""
+    return invoke_with_retry("memory_summary", create_llm_prompt(
+        system_role="You maintain a short running summary of a conversation between a patient and a medical report assistant.",
+        task_instructions=(
+            "Extend the current summary with the new lines of conversation. Keep the test names, values, statuses "
+            "and concerns the patient asked about. Reply with the updated summary only, in under 120 words."
+        ),
+        input_data=f"Current summary:\n{summary or 'None'}\n\nNew lines:\n{get_buffer_string(messages)}"
+    ), use_cache=False)
+
+class BudgetedChatMemory(BaseChatMemory):
+    """
+    Conversation memory bounded by a token budget. The most recent turns are kept verbatim up to
+    `max_token_limit`; older turns are evicted and folded into a rolling summary on a background
+    thread, so the summarization call never runs inside a chat turn. Until a turn is folded it is
+    still returned verbatim, so nothing is lost while the summary is being computed.
+    """
+    memory_key: str = "chat_history"
+    max_token_limit: int = MEMORY_MAX_TOKENS
+    summary: str = ""
+    summarize: Callable[[str, List[BaseMessage]], str] = summarize_conversation
+
+    _pending: List[BaseMessage] = PrivateAttr(default_factory=list)
+    _summarizing: bool = PrivateAttr(default=False)
+    _generation: int = PrivateAttr(default=0)  # bumped by clear() so an in-flight fold is discarded
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            messages = list(self._pending) + list(self.chat_memory.messages)
+            if self.summary:
+                messages.insert(0, SystemMessage(content=f"Summary of the earlier conversation: {self.summary}"))
+        return {self.memory_key: messages if self.return_messages else get_buffer_string(messages)}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        super().save_context(inputs, outputs)
+        with self._lock:
+            messages = list(self.chat_memory.messages)
+            evicted = 0
+            # Evict whole turns (question + answer), always keeping the latest one
+            while len(messages) - evicted > 2 and count_tokens(messages[evicted:]) > self.max_token_limit:
+                evicted += 2
+            if not evicted:
+                return
+            self._pending.extend(messages[:evicted])
+            self.chat_memory.messages = messages[evicted:]
+            if not self._summarizing:
+                self._summarizing = True
+                _summary_executor.submit(self._fold_pending)
+
+    def clear(self) -> None:
+        super().clear()
+        with self._lock:
+            self.summary = ""
+            self._pending.clear()
+            self._generation += 1
+
+    def _fold_pending(self):
+        while True:
+            with self._lock:
+                batch, summary, generation = list(self._pending), self.summary, self._generation
+                if not batch:
+                    self._summarizing = False
+                    return
+            try:
+                new_summary = self.summarize(summary, batch)
+            except Exception as e:
+                logger.error(f"❌ Conversation summary failed, keeping {len(batch)} message(s) verbatim: {e}")
+                with self._lock:
+                    self._summarizing = False
+                return
+            with self._lock:
+                if generation != self._generation:
+                    logger.info("♻ Conversation was cleared while summarizing, discarding the stale summary")
+                    continue
+                self.summary = new_summary
+                del self._pending[:len(batch)]
+            logger.info(f"✅ Folded {len(batch)} message(s) into the conversation summary")
+
+# Words that only make sense with the previous turns ("is it normal?", "what about LDL?")
+_FOLLOW_UP = re.compile(
+    r"\b(it|its|this|that|these|those|they|them|their|there|same|above|previous|earlier|again|else|also|too|more)\b"
+    r"|^\s*(and|but|so|then|why|what about|how about)\b",
+    re.IGNORECASE,
+)
+
+def is_self_contained(question: str, min_words: int = 4) -> bool:
+    """Heuristic: a question of a few words with no pronoun or follow-up cue doesn't need the chat history to be understood."""
+    return len(question.split()) >= min_words and not _FOLLOW_UP.search(question)
+
+class SelectiveQuestionGenerator(LLMChain):
+    """
+    Question-condensing chain for ConversationalRetrievalChain that only calls the LLM for
+    follow-up questions; self-contained questions are passed through unchanged.
+    (The chain itself already skips condensing on the first turn, when there is no history.)
+    """
+    def _call(self, inputs: Dict[str, Any], run_manager=None) -> Dict[str, str]:
+        if is_self_contained(inputs["question"]):
+            record_stage_event("condense", "skipped")
+            return {self.output_key: inputs["question"]}
+        record_stage_event("condense", "calls")
+        return super()._call(inputs, run_manager)
+
+def selective_question_generator(llm, prompt=CONDENSE_QUESTION_PROMPT) -> SelectiveQuestionGenerator:
+    return SelectiveQuestionGenerator(llm=llm, prompt=prompt)
@@ -0,0 +1,188 @@
+import atexit, hashlib, json, os, re, threading
+from typing import Dict, List, Optional
+import numpy as np
+from filelock import FileLock
+from langchain_core.embeddings import Embeddings
+from scripts.config import get_logger
+
+logger = get_logger(__name__)
+
+class EmbeddingCache:
+    """
+    Disk-backed, content-addressed embedding cache for a single embedding model.
+
+    Vectors live in a preallocated float32 matrix (`vectors.f32`) opened with `np.memmap`;
+    `index.json` maps each chunk key to its row and last-access tick. When the cache is full,
+    the least recently used rows are evicted and their slots reused.
+
+    Several processes may share the directory: every read and write holds `cache.lock` and first
+    reloads the index if another process replaced it. The index is written on insert; access ticks
+    from cache hits are batched and written every `save_every` hits, on `flush()` and at exit.
+    """
+    def __init__(self, cache_dir: str, model_name: str, max_entries: int = 20000, save_every: int = 256):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.save_every = save_every
+        self.cache_dir = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self.vectors_path = os.path.join(self.cache_dir, "vectors.f32")
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(os.path.join(self.cache_dir, "cache.lock"))
+        self._vectors: Optional[np.memmap] = None
+        self._index_stamp = None  # identity of the index file this process last loaded or wrote
+        self._touched: Dict[str, int] = {}  # key -> access tick not yet written to the index
+        self._unsaved_hits = 0
+        self.dim: Optional[int] = None
+        self.entries: Dict[str, List[int]] = {}  # key -> [slot, last_access_tick]
+        self.free_slots: List[int] = []
+        self.tick = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with self._file_lock:
+            self._load_index()
+        atexit.register(self.flush)
+
+    def key(self, text: str) -> str:
+        """Return the cache key for a chunk of text under this model."""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load_index(self):
+        """Load the index file and map the vector matrix if the cache already exists (caller holds the file lock)."""
+        self.dim, self.entries, self.free_slots, self._vectors = None, {}, [], None
+        self._index_stamp = self._stamp()
+        if self._index_stamp is None or not os.path.exists(self.vectors_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("capacity") != self.max_entries:
+                logger.warning("⚠️ Embedding cache capacity changed, starting with an empty cache")
+                return
+            self.dim = index["dim"]
+            self.entries = index["entries"]
+            self.tick = max(self.tick, index.get("tick", 0))
+            used = {slot for slot, _ in self.entries.values()}
+            self.free_slots = [s for s in range(self.max_entries - 1, -1, -1) if s not in used]
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(self.max_entries, self.dim))
+            logger.info(f"✅ Loaded embedding cache with {len(self.entries)} entries from {self.cache_dir}")
+        except Exception as e:
+            logger.error(f"❌ Failed to load embedding cache, starting empty: {e}")
+            self.dim, self.entries, self.free_slots, self._vectors = None, {}, [], None
+
+    def _refresh(self):
+        """Reload the index if another process replaced it, keeping this process's unsaved access ticks."""
+        if self._stamp() == self._index_stamp:
+            return
+        self._load_index()
+        for key, tick in self._touched.items():
+            if key in self.entries:
+                self.entries[key][1] = max(self.entries[key][1], tick)
+
+    def _create_matrix(self, dim: int):
+        """Allocate the on-disk vector matrix once the embedding dimension is known."""
+        self.dim = dim
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="w+", shape=(self.max_entries, dim))
+        self.entries = {}
+        self.free_slots = list(range(self.max_entries - 1, -1, -1))
+
+    def _save_index(self):
+        """Atomically persist the index file and flush the vector matrix (caller holds the file lock)."""
+        if self._vectors is None:
+            return
+        self._vectors.flush()
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "capacity": self.max_entries, "tick": self.tick, "entries": self.entries}, f)
+        os.replace(tmp_path, self.index_path)
+        self._index_stamp = self._stamp()
+        self._touched.clear()
+        self._unsaved_hits = 0
+
+    def _evict(self, count: int):
+        """Free `count` slots by dropping the least recently used entries."""
+        victims = sorted(self.entries.items(), key=lambda item: item[1][1])[:count]
+        for key, (slot, _) in victims:
+            del self.entries[key]
+            self.free_slots.append(slot)
+        logger.info(f"♻ Evicted {len(victims)} embeddings from cache")
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Return cached vectors for each text, or None where the text is not cached."""
+        with self._lock, self._file_lock:
+            self._refresh()
+            if self._vectors is None:
+                return [None] * len(texts)
+            results = []
+            for text in texts:
+                key = self.key(text)
+                entry = self.entries.get(key)
+                if entry is None:
+                    results.append(None)
+                    continue
+                self.tick += 1
+                entry[1] = self._touched[key] = self.tick
+                self._unsaved_hits += 1
+                results.append(self._vectors[entry[0]].tolist())
+            if self._unsaved_hits >= self.save_every:
+                self._save_index()
+            return results
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]):
+        """Store vectors for the given texts, evicting least recently used rows if needed."""
+        if not texts or self.max_entries <= 0:
+            return
+        with self._lock, self._file_lock:
+            self._refresh()
+            matrix = np.asarray(vectors, dtype=np.float32)
+            if self._vectors is None or matrix.shape[1] != self.dim:
+                self._create_matrix(matrix.shape[1])
+            pending = {}
+            for text, vector in zip(texts, matrix):
+                key = self.key(text)
+                if key not in self.entries:
+                    pending[key] = vector
+            pending = dict(list(pending.items())[-self.max_entries:])
+            shortfall = len(pending) - len(self.free_slots)
+            if shortfall > 0:
+                self._evict(shortfall)
+            for key, vector in pending.items():
+                slot = self.free_slots.pop()
+                self.tick += 1
+                self._vectors[slot] = vector
+                self.entries[key] = [slot, self.tick]
+            self._save_index()
+
+    def flush(self):
+        """Persist pending access ticks so LRU order survives restarts."""
+        with self._lock:
+            if not self._touched:
+                return
+            with self._file_lock:
+                self._refresh()
+                self._save_index()
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that consults an `EmbeddingCache` before calling the underlying model."""
+    def __init__(self, model: Embeddings, cache: EmbeddingCache):
+        self.model = model
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        cached = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if missing:
+            computed = self.model.embed_documents([texts[i] for i in missing])
+            self.cache.put_many([texts[i] for i in missing], computed)
+            for i, vector in zip(missing, computed):
+                cached[i] = vector
+        logger.info(f"✅ Embedded {len(texts)} chunks ({len(texts) - len(missing)} from cache)")
+        return cached
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.embed_query(text)
@@ -0,0 +1,212 @@
+import argparse, json, os, queue, socket, socketserver, struct, sys, threading, time
+from concurrent.futures import Future
+from typing import List, NamedTuple
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from scripts.config import get_logger, EMBEDDING_SERVICE_SOCKET, EMBEDDING_BATCH_SIZE, EMBEDDING_BATCH_WAIT_MS
+
+logger = get_logger(__name__)
+
+# Wire format (both directions): 4-byte big-endian header length, JSON header, then an optional payload.
+# Request header:  {"kind": "documents" | "query", "texts": [...]}
+# Response header: {"count": n, "dim": d} followed by n*d float32 values, or {"error": "..."}
+_LENGTH = struct.Struct(">I")
+
+class _Request(NamedTuple):
+    kind: str
+    texts: List[str]
+    future: Future
+
+class EmbeddingBatcher:
+    """
+    Micro-batches concurrent embedding requests into single model calls.
+    A worker thread takes the first waiting request, then keeps collecting requests of the same kind
+    for up to `max_wait_ms` or until `max_batch_size` texts are gathered, embeds them together and
+    hands each caller its slice of the result.
+    """
+    def __init__(self, model: Embeddings, max_batch_size: int = EMBEDDING_BATCH_SIZE, max_wait_ms: float = EMBEDDING_BATCH_WAIT_MS):
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self._stats = {"requests": 0, "batches": 0, "texts": 0}
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run, name="embedding-batcher", daemon=True).start()
+
+    def embed(self, texts: List[str], kind: str = "documents") -> List[List[float]]:
+        """Embed `texts`, sharing a model call with whatever other requests arrive at the same time."""
+        if not texts:
+            return []
+        future = Future()
+        self._queue.put(_Request(kind, list(texts), future))
+        return future.result()
+
+    def stats(self):
+        """Requests served, model calls made and texts embedded; requests/batches is the batching gain."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _collect(self, first: _Request) -> List[_Request]:
+        batch, size, held = [first], len(first.texts), []
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            try:
+                request = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if request.kind != first.kind:
+                held.append(request)
+                continue
+            batch.append(request)
+            size += len(request.texts)
+        for request in held:  # other kinds go to the next round, in arrival order
+            self._queue.put(request)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect(self._queue.get())
+            texts = [text for request in batch for text in request.texts]
+            try:
+                if batch[0].kind == "query":
+                    vectors = [self.model.embed_query(text) for text in texts]
+                else:
+                    vectors = self.model.embed_documents(texts)
+            except Exception as e:
+                logger.error(f"❌ Embedding batch of {len(texts)} failed: {e}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            start = 0
+            for request in batch:
+                request.future.set_result(vectors[start:start + len(request.texts)])
+                start += len(request.texts)
+            with self._lock:
+                self._stats["requests"] += len(batch)
+                self._stats["batches"] += 1
+                self._stats["texts"] += len(texts)
+
+class BatchedEmbeddings(Embeddings):
+    """LangChain Embeddings backed by an EmbeddingBatcher shared by every session in the process."""
+    def __init__(self, batcher: EmbeddingBatcher):
+        self.batcher = batcher
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.batcher.embed(texts, "documents")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.batcher.embed([text], "query")[0]
+
+def _send(sock: socket.socket, header: dict, payload: bytes = b""):
+    data = json.dumps(header).encode("utf-8")
+    sock.sendall(_LENGTH.pack(len(data)) + data + payload)
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks, remaining = [], size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            raise ConnectionError("embedding service closed the connection")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+def _recv_header(sock: socket.socket) -> dict:
+    (length,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    return json.loads(_recv_exact(sock, length))
+
+class _EmbeddingRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                request = _recv_header(self.request)
+            except (ConnectionError, struct.error):
+                return  # client went away
+            try:
+                vectors = np.asarray(self.server.batcher.embed(request["texts"], request.get("kind", "documents")), dtype=np.float32)
+                count, dim = (vectors.shape if vectors.size else (0, 0))
+                _send(self.request, {"count": int(count), "dim": int(dim)}, vectors.tobytes())
+            except Exception as e:
+                _send(self.request, {"error": str(e)})
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix-socket server: one thread per client connection, all sharing one EmbeddingBatcher."""
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, batcher: EmbeddingBatcher):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # stale socket from a previous run
+        self.batcher = batcher
+        super().__init__(socket_path, _EmbeddingRequestHandler)
+
+class EmbeddingServiceClient(Embeddings):
+    """LangChain Embeddings that call the embedding service over its Unix socket (one connection per thread)."""
+    def __init__(self, socket_path: str = EMBEDDING_SERVICE_SOCKET, timeout: float = 60.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock, self._local.sock = getattr(self._local, "sock", None), None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _request(self, kind: str, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        for attempt in range(2):  # reconnect once if the service was restarted
+            try:
+                sock = self._connection()
+                _send(sock, {"kind": kind, "texts": texts})
+                header = _recv_header(sock)
+                data = b"" if "error" in header else _recv_exact(sock, header["count"] * header["dim"] * 4)
+                break
+            except (ConnectionError, OSError):
+                # A half-read reply would be mistaken for the next request's, so never reuse this socket
+                self._close()
+                if attempt:
+                    raise
+        if "error" in header:
+            raise RuntimeError(f"Embedding service error: {header['error']}")
+        return np.frombuffer(data, dtype=np.float32).reshape(header["count"], header["dim"]).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._request("documents", texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._request("query", [text])[0]
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="diagnosify-embedding-server", description="Serve the embedding model to local app processes over a Unix socket.")
+    parser.add_argument("--socket", default=EMBEDDING_SERVICE_SOCKET, help="Unix socket path")
+    parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE, help="max texts per model call")
+    parser.add_argument("--batch-wait-ms", type=float, default=EMBEDDING_BATCH_WAIT_MS, help="how long to wait for more requests to batch")
+    args = parser.parse_args(argv)
+
+    from scripts.embeddings import load_local_embedding_model
+    batcher = EmbeddingBatcher(load_local_embedding_model(), args.batch_size, args.batch_wait_ms)
+    with EmbeddingServer(args.socket, batcher) as server:
+        logger.info(f"✅ Embedding service listening on {args.socket}")
+        print(f"Embedding service listening on {args.socket}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(args.socket)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import scripts.config as CONFIG
+
+logger = CONFIG.get_logger(__name__)
+
+# Singleton embedding model instance
+_embedding_instance = None
+
+def load_local_embedding_model(backend: str = None):
+    """
+    Loads EMBEDDING_MODEL_NAME in this process with the EMBEDDING_BACKEND runtime:
+    torch (HuggingFaceEmbeddings / sentence-transformers), onnx or onnx-int8 (ONNX Runtime, no torch import).
+    """
+    backend = backend or CONFIG.EMBEDDING_BACKEND
+    logger.info(f"⟳ Loading embedding model {CONFIG.EMBEDDING_MODEL_NAME} ({backend})")
+    if backend in ("onnx", "onnx-int8"):
+        from scripts.onnx_embeddings import OnnxEmbeddings
+        return OnnxEmbeddings(CONFIG.EMBEDDING_MODEL_NAME, quantize=backend == "onnx-int8")
+    if backend != "torch":
+        logger.warning(f"⚠️ Unknown EMBEDDING_BACKEND {backend!r}, using torch")
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=CONFIG.EMBEDDING_MODEL_NAME)
+
+def embedding_cache_name(backend: str = None) -> str:
+    """Cache namespace for the configured model; quantized vectors differ slightly, so each backend gets its own."""
+    backend = backend or CONFIG.EMBEDDING_BACKEND
+    return CONFIG.EMBEDDING_MODEL_NAME if backend == "torch" else f"{CONFIG.EMBEDDING_MODEL_NAME}@{backend}"
+
+def configure_embedding_model():
+    """
+    Configures and returns a singleton embedding model, wrapped with the on-disk embedding cache if enabled.
+
+    EMBEDDING_SERVICE_MODE selects where embeddings are computed:
+      local   - a model loaded in this process (the default)
+      batched - a model loaded in this process behind a micro-batcher shared by all sessions
+      socket  - the shared embedding service at EMBEDDING_SERVICE_SOCKET (no model in this process)
+    EMBEDDING_BACKEND selects the runtime of the in-process model (see load_local_embedding_model).
+    sentence-transformers (and torch) or onnxruntime are imported on first call, not at module import.
+    """
+    global _embedding_instance
+    if _embedding_instance is None:
+        mode = CONFIG.EMBEDDING_SERVICE_MODE
+        if mode == "socket":
+            from scripts.embedding_service import EmbeddingServiceClient
+            logger.info(f"⟳ Using embedding service at {CONFIG.EMBEDDING_SERVICE_SOCKET}")
+            model = EmbeddingServiceClient(CONFIG.EMBEDDING_SERVICE_SOCKET)
+        elif mode == "batched":
+            from scripts.embedding_service import EmbeddingBatcher, BatchedEmbeddings
+            model = BatchedEmbeddings(EmbeddingBatcher(load_local_embedding_model()))
+        else:
+            model = load_local_embedding_model()
+        if CONFIG.EMBEDDING_CACHE_MAX_ENTRIES > 0:
+            from scripts.embedding_cache import EmbeddingCache, CachedEmbeddings
+            cache = EmbeddingCache(CONFIG.EMBEDDING_CACHE_DIR, embedding_cache_name(), CONFIG.EMBEDDING_CACHE_MAX_ENTRIES)
+            model = CachedEmbeddings(model, cache)
+        _embedding_instance = model
+    return _embedding_instance
@@ -0,0 +1,146 @@
+import atexit, queue, threading, time
+from typing import Dict, List, NamedTuple, Optional
+from scripts.config import (get_logger, EVAL_QUEUE_MAX_SIZE, EVAL_BATCH_SIZE, EVAL_BATCH_WAIT_SECONDS,
+                            EVAL_SUBMIT_TIMEOUT_SECONDS, EVAL_WORKERS)
+# Imported up front so the Mongo writers' exit hook is registered before (and so runs after) the queue's
+from scripts.ragas_evaluator import evaluate_rag_metrics_batch, store_chat_metrics
+
+logger = get_logger(__name__)
+
+class EvaluationJob(NamedTuple):
+    """One chat turn to score and store."""
+    question: str
+    answer: str
+    contexts: List[str]
+    user_id: str
+    submitted_at: float
+
+_STOP = object()
+
+class EvaluationQueue:
+    """
+    Scores chat turns with RAGAS in the background so the chat page never waits on evaluation.
+
+    Jobs go into a bounded queue; when it is full `submit` blocks for up to `submit_timeout`
+    seconds (backpressure) and then rejects the job. Worker threads collect up to `batch_size`
+    jobs (waiting at most `batch_wait` seconds after the first), evaluate them in one
+    `ragas.evaluate` call and queue the results for storage. A batch whose evaluation fails is
+    counted in `failed` and its chats are stored with no score.
+    """
+    def __init__(self, max_size: int = EVAL_QUEUE_MAX_SIZE, batch_size: int = EVAL_BATCH_SIZE,
+                 batch_wait: float = EVAL_BATCH_WAIT_SECONDS, workers: int = EVAL_WORKERS,
+                 submit_timeout: float = EVAL_SUBMIT_TIMEOUT_SECONDS):
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+        self.submit_timeout = submit_timeout
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_size))
+        self._stats = {"submitted": 0, "rejected": 0, "evaluated": 0, "batches": 0, "failed": 0}
+        self._last_lag = self._max_lag = 0.0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._run, name=f"ragas-eval-{i}", daemon=True) for i in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, question: str, answer: str, contexts: List[str], user_id: str) -> bool:
+        """Queue a chat turn for evaluation; returns False if the queue stayed full (job dropped)."""
+        job = EvaluationJob(question, answer, list(contexts), user_id, time.time())
+        try:
+            if self._closed:
+                raise queue.Full
+            self._queue.put(job, timeout=self.submit_timeout)
+        except queue.Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+            logger.warning("⚠️ Evaluation queue full, dropping job")
+            return False
+        with self._lock:
+            self._stats["submitted"] += 1
+        return True
+
+    def metrics(self) -> Dict[str, float]:
+        """Queue depth, job counters, the age of the oldest waiting job and submit-to-stored lag."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(last_lag_s=self._last_lag, max_lag_s=self._max_lag)
+        with self._queue.mutex:
+            head = next((job for job in self._queue.queue if job is not _STOP), None)
+        stats["depth"] = self._queue.qsize()
+        stats["oldest_wait_s"] = time.time() - head.submitted_at if head else 0.0
+        return stats
+
+    def close(self, timeout: float = 30.0):
+        """Stop accepting jobs, let workers finish what is queued (up to `timeout` seconds) and stop them."""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._workers:
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                break
+        deadline = time.time() + timeout
+        for worker in self._workers:
+            worker.join(max(0.0, deadline - time.time()))
+
+    def _next_batch(self) -> Optional[List[EvaluationJob]]:
+        """Block for one job, then gather more until the batch is full or `batch_wait` has passed."""
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.time() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                job = self._queue.get(timeout=max(0.0, deadline - time.time()))
+            except queue.Empty:
+                break
+            if job is _STOP:
+                self._queue.put(_STOP)  # leave it for this worker's next call
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                results = evaluate_rag_metrics_batch(
+                    [job.question for job in batch],
+                    [job.answer for job in batch],
+                    [job.contexts for job in batch],
+                )
+            except Exception as e:
+                # Keep the chats in history, but without a score rather than a fake 0.0
+                logger.error(f"❌ Evaluation batch failed, storing {len(batch)} chat(s) without scores: {e}")
+                results = [{"faithfulness": None} for _ in batch]
+                with self._lock:
+                    self._stats["failed"] += len(batch)
+            else:
+                with self._lock:
+                    self._stats["evaluated"] += len(batch)
+                    self._stats["batches"] += 1
+            for job, metrics in zip(batch, results):
+                store_chat_metrics(job.question, job.answer, " ".join(job.contexts), metrics, job.user_id)
+            lag = time.time() - min(job.submitted_at for job in batch)
+            with self._lock:
+                self._last_lag, self._max_lag = lag, max(self._max_lag, lag)
+            logger.info(f"✅ Stored batch of {len(batch)} chat(s), lag {lag:.1f}s")
+
+# Process-wide queue shared by all sessions
+_evaluation_queue = None
+_queue_lock = threading.Lock()
+
+def get_evaluation_queue() -> EvaluationQueue:
+    """Returns the process-wide evaluation queue, starting its workers on first use."""
+    global _evaluation_queue
+    with _queue_lock:
+        if _evaluation_queue is None:
+            logger.info("⟳ Starting background RAGAS evaluation queue")
+            _evaluation_queue = EvaluationQueue()
+            atexit.register(_evaluation_queue.close)
+        return _evaluation_queue
@@ -0,0 +1,134 @@
+import math, re, threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from scripts.config import get_logger, RETRIEVAL_K, RETRIEVAL_FETCH_K, RERANKER_MODEL
+
+logger = get_logger(__name__)
+
+# Lowercased alphanumeric runs, keeping decimals together ("HbA1c 9.90 %" -> ["hba1c", "9.90"])
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+class BM25Index:
+    """
+    Inverted index with Okapi BM25 scoring over chunk documents.
+    Postings are maintained on `add`/`remove`, so it follows the FAISS index file by file;
+    a search only touches the postings of the query terms.
+    """
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)  # term -> {doc_id: term frequency}
+        self.lengths: Dict[str, int] = {}
+        self.documents: Dict[str, Document] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add(self, doc_id: str, document: Document):
+        self.remove(doc_id)
+        terms = Counter(tokenize(document.page_content))
+        for term, tf in terms.items():
+            self.postings[term][doc_id] = tf
+        self.lengths[doc_id] = sum(terms.values())
+        self._total_length += self.lengths[doc_id]
+        self.documents[doc_id] = document
+
+    def remove(self, doc_id: str):
+        if doc_id not in self.documents:
+            return
+        for term in set(tokenize(self.documents.pop(doc_id).page_content)):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+        self._total_length -= self.lengths.pop(doc_id)
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Return up to `k` (doc_id, score) pairs, best first; documents sharing no term are not returned."""
+        n = len(self.documents)
+        if not n:
+            return []
+        avg_length = self._total_length / n or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    """Fuse ranked id lists: each id scores sum(1 / (k + rank)); ties keep first-seen order."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+class CrossEncoderReranker:
+    """Scores (query, chunk) pairs with a sentence-transformers CrossEncoder on CPU."""
+    def __init__(self, model_name: str):
+        from sentence_transformers import CrossEncoder
+        self.model = CrossEncoder(model_name, device="cpu")
+
+    def rerank(self, query: str, documents: List[Document], k: int) -> List[Document]:
+        if len(documents) <= 1:
+            return documents[:k]
+        scores = self.model.predict([(query, doc.page_content) for doc in documents])
+        order = sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)
+        return [documents[i] for i in order[:k]]
+
+_reranker = None
+_reranker_lock = threading.Lock()
+
+def get_reranker() -> Optional[CrossEncoderReranker]:
+    """Returns the shared reranker for RERANKER_MODEL, or None if reranking is disabled or the model can't load."""
+    global _reranker
+    if not RERANKER_MODEL:
+        return None
+    with _reranker_lock:
+        if _reranker is None:
+            try:
+                logger.info(f"⟳ Loading reranker {RERANKER_MODEL}")
+                _reranker = CrossEncoderReranker(RERANKER_MODEL)
+            except Exception as e:
+                logger.error(f"❌ Failed to load reranker {RERANKER_MODEL}, continuing without it: {e}")
+                return None
+        return _reranker
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retrieves `fetch_k` candidates from both the FAISS store and the BM25 index, fuses the two
+    rankings with reciprocal rank fusion and returns the top `k`, optionally reranked by a cross-encoder.
+    Keyword matching catches exact test names ("HbA1c", "ALT") that MiniLM vectors can miss.
+    """
+    vector_db: Any
+    keyword_index: BM25Index
+    k: int = RETRIEVAL_K
+    fetch_k: int = RETRIEVAL_FETCH_K
+    rrf_k: int = 60
+    reranker: Optional[Any] = None
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        vector_docs = [doc for doc, _ in self.vector_db.similarity_search_with_score(query, k=self.fetch_k)]
+        documents = {doc.id: doc for doc in vector_docs}
+        keyword_ids = [doc_id for doc_id, _ in self.keyword_index.search(query, self.fetch_k)]
+        for doc_id in keyword_ids:
+            documents.setdefault(doc_id, self.keyword_index.documents[doc_id])
+        fused = [documents[doc_id] for doc_id in reciprocal_rank_fusion([[doc.id for doc in vector_docs], keyword_ids], self.rrf_k)]
+        if self.reranker is not None:
+            return self.reranker.rerank(query, fused, self.k)
+        return fused[:self.k]
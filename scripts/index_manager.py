@@ -0,0 +1,109 @@
+import hashlib, os
+from typing import Dict, List, Optional
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_community.vectorstores import FAISS
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from scripts.config import get_logger, TEMP_DIR, RETRIEVAL_MODE, RETRIEVAL_K, RETRIEVAL_FETCH_K
+from scripts.conversation_memory import BudgetedChatMemory
+from scripts.hybrid_retrieval import BM25Index, HybridRetriever, get_reranker
+from scripts.result_store import file_content_hash
+
+logger = get_logger(__name__)
+
+def compute_files_hash(file_hashes) -> str:
+    """Return an order-independent hash for a set of uploaded files, given their content hashes."""
+    digest = hashlib.sha256()
+    for file_hash in sorted(file_hashes):
+        digest.update(file_hash.encode())
+    return digest.hexdigest()
+
+class SessionIndexManager:
+    """
+    Holds the FAISS vector store, a BM25 keyword index over the same chunks and the conversation
+    memory for one chat session. The indexes are updated incrementally: chunk ids are tracked per
+    file content hash, so adding a file embeds only its chunks and removing one deletes only its chunks.
+    """
+    def __init__(self, embedding_model, chunk_size: int = 1000, chunk_overlap: int = 200):
+        self.embedding_model = embedding_model
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.files_hash: Optional[str] = None
+        self.vector_db: Optional[FAISS] = None
+        self.keyword_index = BM25Index()
+        self.file_chunk_ids: Dict[str, List[str]] = {}  # file content hash -> chunk ids in vector_db / keyword_index
+        self.memory = BudgetedChatMemory(memory_key="chat_history", output_key="answer", return_messages=True)
+
+    def get_vector_db(self, files) -> FAISS:
+        """Return the vector store for the given files, embedding only files not indexed yet."""
+        current = {file_content_hash(f.getvalue()): f for f in files}  # hash each upload once
+        files_hash = compute_files_hash(current)
+        if self.vector_db is not None and files_hash == self.files_hash:
+            logger.info(f"✅ Reusing FAISS index for upload set {files_hash[:12]}")
+            return self.vector_db
+
+        removed = [h for h in self.file_chunk_ids if h not in current]
+        added = [h for h in current if h not in self.file_chunk_ids]
+        for file_hash in removed:
+            self.remove_file(file_hash)
+        for file_hash in added:
+            self.add_file(current[file_hash], file_hash)
+
+        if not any(self.file_chunk_ids.values()):
+            raise ValueError("No valid PDF documents extracted.")
+        self.files_hash = files_hash
+        logger.info(f"✅ FAISS index updated (+{len(added)}/-{len(removed)} file(s)), "
+                    f"{sum(len(ids) for ids in self.file_chunk_ids.values())} chunks")
+        return self.vector_db
+
+    def get_retriever(self, files, mode: str = RETRIEVAL_MODE):
+        """Return the session retriever: hybrid BM25 + FAISS (RETRIEVAL_MODE=hybrid) or FAISS MMR."""
+        vector_db = self.get_vector_db(files)
+        if mode == "mmr":
+            return vector_db.as_retriever(search_type="mmr", search_kwargs={"k": RETRIEVAL_K, "fetch_k": RETRIEVAL_FETCH_K})
+        return HybridRetriever(vector_db=vector_db, keyword_index=self.keyword_index, reranker=get_reranker())
+
+    def add_file(self, file, file_hash: str) -> int:
+        """Chunk and embed one file into the index; returns the number of chunks added."""
+        logger.info(f"♻ Indexing {file.name} ({file_hash[:12]})")
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
+        splits = text_splitter.split_documents(self._load_documents(file, file_hash))
+        ids = [f"{file_hash}-{i}" for i in range(len(splits))]
+        for chunk_id, split in zip(ids, splits):
+            split.id = chunk_id
+            self.keyword_index.add(chunk_id, split)
+        if splits:
+            if self.vector_db is None:
+                self.vector_db = FAISS.from_documents(splits, self.embedding_model, ids=ids)
+            else:
+                self.vector_db.add_documents(splits, ids=ids)
+        self.file_chunk_ids[file_hash] = ids
+        return len(ids)
+
+    def remove_file(self, file_hash: str) -> int:
+        """Delete one file's chunks from the index; returns the number of chunks removed."""
+        ids = self.file_chunk_ids.pop(file_hash, [])
+        for chunk_id in ids:
+            self.keyword_index.remove(chunk_id)
+        if ids and self.vector_db is not None:
+            self.vector_db.delete(ids)
+            logger.info(f"✅ Removed {len(ids)} chunks of {file_hash[:12]} from the FAISS index")
+        return len(ids)
+
+    def _load_documents(self, file, file_hash: str) -> List:
+        """Write an upload to a temporary file and parse it with PyPDFLoader."""
+        os.makedirs(TEMP_DIR, exist_ok=True)
+        file_path = os.path.join(TEMP_DIR, f"{file_hash}.pdf")
+        with open(file_path, "wb") as f:
+            f.write(file.getvalue())
+        try:
+            docs = PyPDFLoader(file_path).load()
+            for doc in docs:
+                doc.metadata["source"] = file.name
+                doc.metadata["file_hash"] = file_hash
+            return docs
+        except Exception as e:
+            logger.error(f"❌ Failed to load {file.name}: {e}")
+            return []
+        finally:
+            os.unlink(file_path)
+            logger.info(f"✅ Removed temporary file: {file_path}")
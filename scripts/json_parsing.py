@@ -0,0 +1,84 @@
+import json, re
+from typing import Any, Optional, Tuple
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+_TRAILING_COMMA = re.compile(r",\s*([\]}])")
+
+class JSONExtractionError(ValueError):
+    """Raised when no JSON value of the expected type can be recovered from an LLM response."""
+
+def strip_code_fences(text: str) -> str:
+    """Return the contents of the first ``` fenced block, or the text unchanged if there is none."""
+    match = _FENCE.search(text)
+    return match.group(1).strip() if match else text.strip()
+
+def scan_balanced(text: str, start: int) -> Tuple[str, bool]:
+    """
+    Scan from the bracket at `start` to its matching close, skipping brackets inside strings.
+    Returns (fragment, complete). If the text ends first (a truncated response), the fragment is
+    cut after the last complete nested array/object and the still-open containers are closed,
+    with complete=False.
+    """
+    stack, in_string, escaped = [], False, False
+    last_close = None
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "[{":
+            stack.append("]" if char == "[" else "}")
+        elif char in "]}":
+            if not stack or char != stack[-1]:
+                break
+            stack.pop()
+            if not stack:
+                return text[start:i + 1], True
+            last_close = (i + 1, "".join(reversed(stack)))
+    if last_close is None:
+        return "", False
+    end, closers = last_close
+    return text[start:end] + closers, False
+
+def extract_json(text: str, expected: type = list) -> Tuple[Any, bool]:
+    """
+    Recover a JSON value of type `expected` (list or dict) from an LLM response.
+
+    Tries, in order: the whole (fence-stripped) text, the first balanced array/object in it,
+    and a repaired version (trailing commas removed, truncated containers closed).
+    Returns (value, repaired) where `repaired` is True if anything beyond plain parsing was needed.
+    Raises JSONExtractionError if nothing usable is found.
+    """
+    if not text:
+        raise JSONExtractionError("empty response")
+    cleaned = strip_code_fences(text)
+    try:
+        value = json.loads(cleaned)
+        if isinstance(value, expected):
+            return value, cleaned != text.strip()
+    except json.JSONDecodeError:
+        pass
+
+    opener = "[" if expected is list else "{"
+    start = cleaned.find(opener)
+    while start != -1:
+        fragment, _ = scan_balanced(cleaned, start)
+        for candidate in (fragment, _TRAILING_COMMA.sub(r"\1", fragment)) if fragment else ():
+            value = _try_loads(candidate)
+            if isinstance(value, expected):
+                return value, True
+        start = cleaned.find(opener, start + 1)
+    raise JSONExtractionError(f"no JSON {expected.__name__} found in response")
+
+def _try_loads(candidate: str) -> Optional[Any]:
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        return None
@@ -0,0 +1,162 @@
+import threading, time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional, TypeVar
+from langchain_core.messages import SystemMessage, HumanMessage
+from scripts.json_parsing import extract_json
+from scripts.llm_cache import LLMResponseCache, SQLiteCacheBackend, llm_cache_key
+import scripts.config as CONFIG
+
+logger = CONFIG.get_logger(__name__)
+
+T = TypeVar("T")
+
+# Per-stage counters: calls, retries, errors, parse_failures, repaired, cache_hits, cache_misses
+_stage_metrics: Dict[str, Counter] = defaultdict(Counter)
+_metrics_lock = threading.Lock()
+
+# Singleton LLM instance and response cache
+_llm_instance = None
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+def configure_llm():
+    """
+    Configures and returns a singleton LLM (ChatGroq) instance. Safe to use outside Streamlit;
+    langchain_groq is imported on first call so importing the processing layer stays cheap.
+    """
+    global _llm_instance
+    if _llm_instance is None:
+        if not CONFIG.GROQ_API_KEY:
+            raise ValueError("❌ Missing API Token! Set GROQ_API_KEY in .env file.")
+        from langchain_groq import ChatGroq
+        logger.info("⟳ Initializing singleton ChatGroq LLM instance")
+        _llm_instance = ChatGroq(
+            model_name=CONFIG.MODEL_NAME,
+            temperature=CONFIG.TEMPERATURE,
+            groq_api_key=CONFIG.GROQ_API_KEY
+        )
+    return _llm_instance
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Returns the singleton LLM response cache, or None if LLM_CACHE_MAX_ENTRIES is 0."""
+    global _llm_cache
+    if CONFIG.LLM_CACHE_MAX_ENTRIES <= 0:
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            backend = None
+            if CONFIG.LLM_CACHE_DB:
+                try:
+                    backend = SQLiteCacheBackend(CONFIG.LLM_CACHE_DB)
+                except Exception as e:
+                    logger.error(f"❌ Could not open LLM cache database, using memory only: {e}")
+            _llm_cache = LLMResponseCache(CONFIG.LLM_CACHE_MAX_ENTRIES, backend, CONFIG.LLM_CACHE_TTL)
+            logger.info(f"⟳ Initialized LLM response cache ({'sqlite' if backend else 'memory'})")
+    return _llm_cache
+
+def is_deterministic(llm) -> bool:
+    """True if the LLM samples at temperature 0, the only setting where a cached response is a valid answer."""
+    try:
+        return float(getattr(llm, "temperature", CONFIG.TEMPERATURE) or 0) == 0
+    except (TypeError, ValueError):
+        return False
+
+def create_llm_prompt(system_role: str, task_instructions: str, input_data: str) -> list:
+    """Creates a standardized LLM prompt with system and human messages."""
+    return [
+        SystemMessage(content=system_role),
+        HumanMessage(content=f"""
+            {task_instructions}
+            Input:
+            {input_data}
+            """)
+    ]
+
+def record_stage_event(stage: str, event: str, count: int = 1):
+    """Increment a per-stage counter (e.g. "parse_failures" for "structuring")."""
+    with _metrics_lock:
+        _stage_metrics[stage][event] += count
+
+def get_stage_metrics() -> Dict[str, Dict[str, int]]:
+    """Return a snapshot of the per-stage counters."""
+    with _metrics_lock:
+        return {stage: dict(counts) for stage, counts in _stage_metrics.items()}
+
+def json_parser(stage: str, expected: type = list) -> Callable[[str], object]:
+    """Build a response parser for `invoke_with_retry` that tolerantly extracts JSON and counts repairs."""
+    def parse(content: str):
+        value, repaired = extract_json(content, expected)
+        if repaired:
+            record_stage_event(stage, "repaired")
+        return value
+    return parse
+
+def stream_content(llm, messages: List, on_text: Callable[[str], None]) -> str:
+    """
+    Stream a response, passing the accumulated text to `on_text` at most every STREAM_FLUSH_INTERVAL_MS
+    or STREAM_FLUSH_TOKENS chunks (and once at the end). Returns the full content.
+    """
+    parts, pending, last_emit = [], 0, time.perf_counter()
+    for chunk in llm.stream(messages):
+        parts.append(chunk.content)
+        pending += 1
+        now = time.perf_counter()
+        if pending >= CONFIG.STREAM_FLUSH_TOKENS or (now - last_emit) * 1000 >= CONFIG.STREAM_FLUSH_INTERVAL_MS:
+            on_text("".join(parts))
+            pending, last_emit = 0, now
+    content = "".join(parts)
+    on_text(content)
+    return content
+
+def invoke_with_retry(stage: str, messages: List, parse: Callable[[str], T] = str.strip,
+                      retries: int = None, backoff: float = None, use_cache: bool = True,
+                      on_text: Optional[Callable[[str], None]] = None) -> T:
+    """
+    Invoke the LLM and parse its content, re-issuing only this stage's call on failure.
+    Retries up to `retries` times with exponential backoff (`backoff`, 2×`backoff`, ...).
+    Parse failures (any exception raised by `parse`) are counted per stage; the last error is re-raised.
+    Responses that parse are cached by model, temperature and message hash when the LLM runs at
+    temperature 0 (sampled output is never cached); pass `use_cache=False` to bypass the cache.
+    If `on_text` is given the response is streamed and the partial text is passed to it as it
+    arrives (a retry starts the text over); the returned value is the same as without streaming.
+    """
+    retries = max(0, CONFIG.LLM_MAX_RETRIES if retries is None else retries)  # always make at least one attempt
+    backoff = CONFIG.LLM_RETRY_BACKOFF if backoff is None else backoff
+    llm = configure_llm()
+    cache = get_llm_cache() if use_cache and is_deterministic(llm) else None
+    key = None
+    if cache is not None:
+        key = llm_cache_key(getattr(llm, "model_name", CONFIG.MODEL_NAME), getattr(llm, "temperature", CONFIG.TEMPERATURE), messages)
+        content = cache.get(key)
+        if content is not None:
+            try:
+                value = parse(content)
+                record_stage_event(stage, "cache_hits")
+                if on_text:
+                    on_text(content)
+                return value
+            except Exception:
+                cache.invalidate(key)
+        record_stage_event(stage, "cache_misses")
+
+    for attempt in range(retries + 1):
+        record_stage_event(stage, "calls")
+        try:
+            content = stream_content(llm, messages, on_text) if on_text else llm.invoke(messages).content
+        except Exception as e:
+            record_stage_event(stage, "errors")
+            error = e
+        else:
+            try:
+                value = parse(content)
+                if key is not None:
+                    cache.put(key, content)
+                return value
+            except Exception as e:
+                record_stage_event(stage, "parse_failures")
+                error = e
+        if attempt < retries:
+            record_stage_event(stage, "retries")
+            logger.warning(f"⚠️ {stage} attempt {attempt + 1} failed ({error}), retrying")
+            time.sleep(backoff * (2 ** attempt))
+    raise error
@@ -0,0 +1,125 @@
+import hashlib, json, os, sqlite3, threading, time
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, Optional
+from scripts.config import get_logger
+
+logger = get_logger(__name__)
+
+def llm_cache_key(model_name: str, temperature, messages: Iterable) -> str:
+    """Hash the model name, temperature and (role, content) of every message into a cache key."""
+    payload = {
+        "model": str(model_name),
+        "temperature": str(temperature),
+        "messages": [[getattr(m, "type", type(m).__name__), getattr(m, "content", str(m))] for m in messages],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+class SQLiteCacheBackend:
+    """Persistent cache backend: one SQLite table of (key, content, expires_at)."""
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, content TEXT NOT NULL, expires_at REAL)")
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),))
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT content, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        content, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            self.delete(key)
+            return None
+        return content
+
+    def set(self, key: str, content: str, expires_at: Optional[float]):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO llm_cache (key, content, expires_at) VALUES (?, ?, ?)",
+                               (key, content, expires_at))
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+class LLMResponseCache:
+    """
+    Caches raw LLM response content by prompt hash.
+    An in-process LRU of `max_entries` responses sits in front of an optional persistent `backend`
+    (anything with get/set/delete, e.g. SQLiteCacheBackend). Entries expire after `ttl` seconds (0 = never).
+    """
+    def __init__(self, max_entries: int = 256, backend=None, ttl: float = 0):
+        self.max_entries = max_entries
+        self.backend = backend
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats = Counter()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached content for `key`, checking memory first and then the backend."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                content, expires_at = entry
+                if expires_at is None or expires_at >= time.time():
+                    self._entries.move_to_end(key)
+                    self._stats["hits_memory"] += 1
+                    return content
+                del self._entries[key]
+        content = None
+        if self.backend is not None:
+            try:
+                content = self.backend.get(key)
+            except Exception as e:
+                logger.error(f"❌ LLM cache backend read failed: {e}")
+        with self._lock:
+            self._stats["hits_backend" if content is not None else "misses"] += 1
+        if content is not None:
+            self._remember(key, content, self._expiry())
+        return content
+
+    def put(self, key: str, content: str):
+        """Store content in memory and in the backend."""
+        expires_at = self._expiry()
+        self._remember(key, content, expires_at)
+        with self._lock:
+            self._stats["stores"] += 1
+        if self.backend is not None:
+            try:
+                self.backend.set(key, content, expires_at)
+            except Exception as e:
+                logger.error(f"❌ LLM cache backend write failed: {e}")
+
+    def invalidate(self, key: str):
+        """Drop `key` everywhere (e.g. a cached response that no longer parses)."""
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.backend is not None:
+            try:
+                self.backend.delete(key)
+            except Exception as e:
+                logger.error(f"❌ LLM cache backend delete failed: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the overall hit rate."""
+        with self._lock:
+            stats = dict(self._stats)
+        hits = stats.get("hits_memory", 0) + stats.get("hits_backend", 0)
+        lookups = hits + stats.get("misses", 0)
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
+
+    def _expiry(self) -> Optional[float]:
+        return time.time() + self.ttl if self.ttl else None
+
+    def _remember(self, key: str, content: str, expires_at: Optional[float]):
+        with self._lock:
+            self._entries[key] = (content, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,183 @@
+import atexit, threading, time
+from typing import Dict, List, Optional, Tuple
+from scripts.config import (get_logger, get_mongo_uri, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE,
+                            MONGO_WRITE_BATCH_SIZE, MONGO_WRITE_FLUSH_SECONDS, MONGO_WRITE_MAX_BUFFER,
+                            MONGO_WRITE_MAX_RETRIES)
+
+logger = get_logger(__name__)
+
+DUPLICATE_KEY = 11000
+# Server error codes worth retrying (shutdown, failover, timeouts, network); other per-document errors are permanent
+TRANSIENT_WRITE_CODES = {6, 7, 50, 89, 91, 189, 262, 9001, 10107, 11600, 11602, 13435, 13436}
+
+# Process-wide client and one buffered writer per (database, collection)
+_client = None
+_writers: Dict[Tuple[str, str], "BufferedWriter"] = {}
+_indexed: set = set()
+_lock = threading.Lock()
+
+def get_mongo_client():
+    """
+    Returns the process-wide pooled MongoClient, connecting on first use.
+    Pool sizes come from MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE.
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            from pymongo import MongoClient
+            logger.info("⟳ Initializing pooled MongoDB client")
+            _client = MongoClient(get_mongo_uri(), maxPoolSize=MONGO_MAX_POOL_SIZE, minPoolSize=MONGO_MIN_POOL_SIZE)
+        return _client
+
+def set_mongo_client(client):
+    """Use `client` (e.g. `mongomock.MongoClient()` in tests) instead of connecting to MONGO_URI / Atlas."""
+    global _client
+    with _lock:
+        _client = client
+        _indexed.clear()
+
+def get_collection(db_name: str, collection_name: str):
+    """Returns a collection handle from the pooled client."""
+    return get_mongo_client()[db_name][collection_name]
+
+def ensure_index(db_name: str, collection_name: str, keys: List[Tuple[str, int]], name: str):
+    """Create an index once per process (create_index is a no-op on the server if it already exists)."""
+    marker = (db_name, collection_name, name)
+    if marker in _indexed:
+        return
+    get_collection(db_name, collection_name).create_index(keys, name=name)
+    _indexed.add(marker)
+    logger.info(f"✅ Ensured index {name} on {db_name}.{collection_name}")
+
+class BufferedWriter:
+    """
+    Buffers documents for one collection and writes them with `insert_many`.
+    A flush happens when `batch_size` documents are queued, when the oldest queued document is
+    `flush_seconds` old (checked by a background thread), on an explicit `flush()` and at interpreter exit.
+    Documents whose write failed transiently are put back at the front of the buffer, up to `max_retries`
+    attempts; documents already stored (duplicate key) or rejected permanently are dropped. At most
+    `max_buffer` documents are held, the oldest being dropped first. Every drop is logged.
+    """
+    def __init__(self, db_name: str, collection_name: str, batch_size: int = MONGO_WRITE_BATCH_SIZE,
+                 flush_seconds: float = MONGO_WRITE_FLUSH_SECONDS, max_buffer: int = MONGO_WRITE_MAX_BUFFER,
+                 max_retries: int = MONGO_WRITE_MAX_RETRIES):
+        self.db_name = db_name
+        self.collection_name = collection_name
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.max_buffer = max(self.batch_size, max_buffer)
+        self.max_retries = max(1, max_retries)
+        self._buffer: List[Tuple[Dict, int]] = []  # (document, failed attempts so far)
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if flush_seconds > 0:
+            self._thread = threading.Thread(target=self._run, name=f"mongo-writer-{collection_name}", daemon=True)
+            self._thread.start()
+
+    def add(self, document: Dict):
+        """Queue a document; flushes immediately once the batch is full."""
+        with self._lock:
+            self._buffer.append((document, 0))
+            self._trim()
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self) -> int:
+        """Write all queued documents; returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                entries, self._buffer, self._oldest = self._buffer, [], None
+            if not entries:
+                return 0
+            target = f"{self.db_name}.{self.collection_name}"
+            documents = [document for document, _ in entries]
+            try:
+                get_collection(self.db_name, self.collection_name).insert_many(documents, ordered=False)
+                logger.info(f"✅ Wrote {len(documents)} document(s) to {target}")
+                return len(documents)
+            except Exception as e:
+                from pymongo.errors import BulkWriteError
+                if isinstance(e, BulkWriteError):
+                    errors = {error["index"]: error for error in e.details.get("writeErrors", [])}
+                else:
+                    # Nothing is known about which documents made it; retrying those that did ends in a duplicate key
+                    errors = {index: {"code": None, "errmsg": str(e)} for index in range(len(entries))}
+                retry, duplicates, rejected = [], 0, 0
+                for index, error in errors.items():
+                    document, attempts = entries[index]
+                    if error.get("code") == DUPLICATE_KEY:
+                        duplicates += 1
+                    elif error.get("code") is not None and error["code"] not in TRANSIENT_WRITE_CODES:
+                        rejected += 1
+                        logger.error(f"❌ Dropping document {document.get('_id')} rejected by {target}: {error.get('errmsg')}")
+                    elif attempts + 1 >= self.max_retries:
+                        rejected += 1
+                        logger.error(f"❌ Dropping document {document.get('_id')} after {attempts + 1} failed write(s) to {target}: {error.get('errmsg')}")
+                    else:
+                        retry.append((document, attempts + 1))
+                written = len(entries) - len(errors)
+                logger.warning(
+                    f"⚠️ Batched write to {target} failed: {written} written, {duplicates} already stored, "
+                    f"{rejected} dropped, {len(retry)} queued for retry: {e}"
+                )
+                if retry:
+                    with self._lock:
+                        self._buffer = retry + self._buffer
+                        self._trim()
+                        self._oldest = self._oldest or time.monotonic()
+                return written
+
+    def _trim(self):
+        """Drop the oldest documents beyond `max_buffer` (caller holds the lock)."""
+        overflow = len(self._buffer) - self.max_buffer
+        if overflow > 0:
+            del self._buffer[:overflow]
+            logger.error(f"❌ Write buffer for {self.db_name}.{self.collection_name} is full, dropped {overflow} oldest document(s)")
+
+    def close(self):
+        """Stop the background thread and flush what is left."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_seconds + 1)
+        self.flush()
+
+    def _run(self):
+        interval = min(self.flush_seconds, 1.0)
+        while not self._stop.wait(interval):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.flush_seconds
+            if due:
+                self.flush()
+
+def get_writer(db_name: str, collection_name: str) -> BufferedWriter:
+    """Returns the shared buffered writer for a collection, creating it on first use."""
+    with _lock:
+        key = (db_name, collection_name)
+        if key not in _writers:
+            _writers[key] = BufferedWriter(db_name, collection_name)
+        return _writers[key]
+
+def flush_writer(db_name: str, collection_name: str):
+    """Flush pending writes for a collection (e.g. before reading it back)."""
+    with _lock:
+        writer = _writers.get((db_name, collection_name))
+    if writer is not None:
+        writer.flush()
+
+@atexit.register
+def close_writers():
+    """Flush every buffered writer; registered to run at interpreter shutdown."""
+    with _lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.close()
@@ -1,25 +1,142 @@
-import PyPDF2
-from scripts.config import get_logger
+import atexit, multiprocessing, os, threading, time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, NamedTuple, Optional
+from pypdf import PdfReader
+from scripts.config import get_logger, PDF_WORKERS, PDF_PARALLEL_MIN_PAGES, OCR_MIN_CHARS, OCR_LANG
 
 logger = get_logger(__name__)
 
+class PageResult(NamedTuple):
+    """Text of one PDF page, how it was obtained ("text", "ocr", "empty" or "error") and how long it took."""
+    page: int
+    text: str
+    method: str
+    seconds: float
+
+# Per-thread PdfReader for the file being extracted, so pool workers parse each PDF once, not once per page
+_readers = threading.local()
+
+def _get_reader(file_path: str) -> PdfReader:
+    stat = os.stat(file_path)
+    key = (file_path, stat.st_mtime_ns, stat.st_size)  # temporary file names can be reused
+    if getattr(_readers, "key", None) != key:
+        _readers.reader, _readers.key = PdfReader(file_path), key
+    return _readers.reader
+
+def preprocess_for_ocr(gray):
+    """OpenCV cleanup of a grayscale scan: upscale small images, remove speckle noise, binarize with Otsu."""
+    import cv2
+    if gray.shape[1] < 1500:
+        gray = cv2.resize(gray, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+    gray = cv2.medianBlur(gray, 3)
+    return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+def ocr_page(page) -> str:
+    """OCR the images embedded in a page (a scanned page is usually one full-page image)."""
+    try:
+        import cv2, numpy as np, pytesseract
+    except ImportError as e:
+        logger.warning(f"⚠️ OCR unavailable, skipping image-only page: {e}")
+        return ""
+    texts = []
+    for image in page.images:
+        gray = cv2.imdecode(np.frombuffer(image.data, np.uint8), cv2.IMREAD_GRAYSCALE)
+        if gray is None:  # formats OpenCV can't decode (e.g. CCITT fax, JBIG2) go through pypdf's PIL image
+            gray = np.array(image.image.convert("L"))
+        try:
+            text = pytesseract.image_to_string(preprocess_for_ocr(gray), lang=OCR_LANG, config="--psm 6")
+        except pytesseract.TesseractNotFoundError as e:
+            logger.warning(f"⚠️ Tesseract is not installed, skipping image-only page: {e}")
+            break
+        if text.strip():
+            texts.append(text.strip())
+    return "\n".join(texts)
+
+def extract_page(file_path: str, index: int, reader: Optional[PdfReader] = None) -> PageResult:
+    """
+    Extract one page's text layer, falling back to OCR when the page has (almost) no text but has images.
+    Without `reader` the calling thread's cached reader for `file_path` is used.
+    """
+    start = time.perf_counter()
+    page = (reader or _get_reader(file_path)).pages[index]
+    text = (page.extract_text() or "").strip()
+    method = "text" if text else "empty"
+    if len(text) < OCR_MIN_CHARS:
+        try:
+            has_images = bool(page.images)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read images on page {index + 1}: {e}")
+            has_images = False
+        if has_images:
+            ocr_text = ocr_page(page)
+            if len(ocr_text) > len(text):
+                text, method = ocr_text, "ocr"
+    return PageResult(index + 1, text, method, time.perf_counter() - start)
+
+def _extract_page_safe(file_path: str, index: int, reader: Optional[PdfReader] = None) -> PageResult:
+    """extract_page that reports a failing page as empty instead of losing the whole document."""
+    try:
+        return extract_page(file_path, index, reader)
+    except Exception as e:
+        logger.error(f"❌ Error extracting page {index + 1} of {file_path}: {e}")
+        return PageResult(index + 1, "", "error", 0.0)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Long-lived page-extraction pool; spawned (not forked) because the app process runs threads."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+@atexit.register
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+def extract_pages(file_path: str) -> List[PageResult]:
+    """
+    Extract every page of a PDF. Documents with at least PDF_PARALLEL_MIN_PAGES pages are spread
+    over a process pool of PDF_WORKERS; smaller ones are extracted in this process.
+    """
+    reader = PdfReader(file_path)
+    page_count = len(reader.pages)
+    if PDF_WORKERS > 1 and page_count >= PDF_PARALLEL_MIN_PAGES:
+        try:
+            return list(_get_pool().map(_extract_page_safe, [file_path] * page_count, range(page_count)))
+        except BrokenProcessPool as e:
+            logger.error(f"❌ Page extraction pool failed, extracting serially: {e}")
+            shutdown_pool()
+    # In-process extraction uses this call's own reader; callers extract different files concurrently on threads
+    return [_extract_page_safe(file_path, index, reader) for index in range(page_count)]
+
 def extract_text(file_path: str) -> str:
-    """Extract text from a PDF file."""
+    """Extract text from a PDF file, using OCR for scanned (image-only) pages."""
     logger.info(f"♻ Extracting text from: {file_path}")
     if not file_path.lower().endswith(".pdf"):
         logger.error(f"❌ Unsupported file format: {file_path}")
         raise ValueError("Only PDF files are supported.")
-    
+
     try:
-        with open(file_path, 'rb') as pdf_file:
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            text = ""
-            for page in pdf_reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-            logger.info("✅ PDF text extraction completed")
-            return text.strip()
+        start = time.perf_counter()
+        pages = extract_pages(file_path)
+        for page in pages:
+            logger.debug(f"Page {page.page}: {page.method}, {len(page.text)} chars, {page.seconds:.3f}s")
+        ocr_pages = sum(page.method == "ocr" for page in pages)
+        slowest = max(pages, key=lambda page: page.seconds, default=None)
+        logger.info(
+            f"✅ PDF text extraction completed: {len(pages)} page(s), {ocr_pages} via OCR, "
+            f"{time.perf_counter() - start:.2f}s total"
+            + (f", slowest page {slowest.page} ({slowest.method}) {slowest.seconds:.2f}s" if slowest else "")
+        )
+        return "\n".join(page.text for page in pages if page.text).strip()
     except Exception as e:
         logger.error(f"❌ Error extracting text from {file_path}: {str(e)}")
-        raise
\ No newline at end of file
+        raise
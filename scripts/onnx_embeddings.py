@@ -0,0 +1,108 @@
+import json, os
+from typing import List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from scripts.config import get_logger, EMBEDDING_ONNX_DIR
+
+logger = get_logger(__name__)
+
+ONNX_FILE = "onnx/model.onnx"
+
+def _model_file(model_name: str, filename: str, required: bool = True) -> Optional[str]:
+    """Resolve a file of a local model directory or a Hugging Face Hub repository."""
+    if os.path.isdir(model_name):
+        path = os.path.join(model_name, filename)
+        if os.path.exists(path):
+            return path
+        if required:
+            raise FileNotFoundError(f"{filename} not found in {model_name}")
+        return None
+    from huggingface_hub import hf_hub_download
+    try:
+        return hf_hub_download(model_name, filename)
+    except Exception:
+        if required:
+            raise
+        return None
+
+def _read_json(path: Optional[str], default):
+    """Load an optional JSON file of the model, closing it right away; `default` when it is missing."""
+    if not path:
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def quantize_int8(model_path: str, output_dir: str) -> str:
+    """Apply dynamic int8 weight quantization to an ONNX model once, reusing the result on later calls."""
+    os.makedirs(output_dir, exist_ok=True)
+    quantized_path = os.path.join(output_dir, "model_int8.onnx")
+    if not os.path.exists(quantized_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        logger.info(f"♻ Quantizing {model_path} to int8")
+        tmp_path = quantized_path + ".tmp"
+        quantize_dynamic(model_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, quantized_path)
+    return quantized_path
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence-transformers style embeddings (mean pooling, optional L2 normalization) computed with
+    ONNX Runtime instead of PyTorch. Uses the model repo's exported `onnx/model.onnx` and
+    `tokenizer.json`; with `quantize=True` the weights are dynamically quantized to int8 and cached
+    under `cache_dir`. Needs the optional `onnxruntime` and `tokenizers` packages.
+    """
+    def __init__(self, model_name: str, quantize: bool = True, cache_dir: str = EMBEDDING_ONNX_DIR,
+                 batch_size: int = 32, threads: int = 0):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError("The ONNX embedding backend needs `pip install onnxruntime tokenizers`") from e
+
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        model_path = _model_file(model_name, ONNX_FILE)
+        if quantize:
+            model_path = quantize_int8(model_path, os.path.join(cache_dir, model_name.replace("/", "__")))
+
+        config_path = _model_file(model_name, "sentence_bert_config.json", required=False)
+        max_length = _read_json(config_path, {}).get("max_seq_length", 256)
+        modules = _read_json(_model_file(model_name, "modules.json", required=False), [])
+        self.normalize = any(module.get("type", "").endswith("Normalize") for module in modules)
+
+        self.tokenizer = Tokenizer.from_file(_model_file(model_name, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        logger.info(f"✅ Loaded ONNX embedding model {model_name} ({'int8' if quantize else 'fp32'})")
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        token_embeddings = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+
+        # Mean pooling over real (non-padding) tokens, as sentence-transformers does
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        batches = [self._embed(texts[i:i + self.batch_size]) for i in range(0, len(texts), self.batch_size)]
+        return np.concatenate(batches).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0].tolist()
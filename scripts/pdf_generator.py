@@ -8,6 +8,17 @@ from scripts.config import get_logger
 
 logger = get_logger(__name__)
 
+def get_default_table_style() -> TableStyle:
+    """Returns a default TableStyle for PDF tables."""
+    return TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
+        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+    ])
+
 def generate_pdf_summary(results: List[Dict], explanations: str, summary_bullets: str, output_path: str = None) -> bytes:
     logger.info("♻ Generating improved PDF summary")
     buffer = BytesIO()
@@ -51,14 +62,7 @@ def generate_pdf_summary(results: List[Dict], explanations: str, summary_bullets
                     res.get("status", "Unknown")
                 ])
             table = Table(data, hAlign='LEFT', colWidths=[130, 70, 70, 130, 80])
-            table.setStyle(TableStyle([
-                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
-                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-            ]))
+            table.setStyle(get_default_table_style())
             story.append(table)
             story.append(Spacer(1, 12))
 
@@ -0,0 +1,184 @@
+import asyncio, json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from scripts.config import get_logger, PIPELINE_MAX_CONCURRENCY, STRUCTURE_CHUNK_CHARS, EXPLANATION_SHARD_SIZE, EXTRACTION_MODE
+from scripts.processing import (build_structure_messages, build_categorize_messages, build_table_messages,
+                                build_explanation_messages, build_summary_messages, build_single_pass_messages,
+                                parse_single_pass_response, parse_table_rows, split_test_results,
+                                ProgressCallback, stream_progress)
+from scripts.llm import invoke_with_retry, json_parser
+from scripts.categorization import categorize_by_rules, merge_llm_statuses
+
+logger = get_logger(__name__)
+
+EXPLANATION_ERROR = "Unable to generate explanations due to an error."
+SUMMARY_ERROR = "Unable to generate summary due to an error."
+
+def run_async(coro):
+    """Run a coroutine to completion from synchronous code, even if an event loop is already running."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+def chunk_report_text(text: str, max_chars: int = STRUCTURE_CHUNK_CHARS) -> List[str]:
+    """Split report text into chunks of at most `max_chars`, breaking only on line boundaries."""
+    chunks, current, size = [], [], 0
+    for line in text.splitlines():
+        if current and size + len(line) + 1 > max_chars:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+def shard_results(results: List[Dict], shard_size: int = EXPLANATION_SHARD_SIZE) -> List[List[Dict]]:
+    """Split test results into shards of `shard_size` rows."""
+    shard_size = max(1, shard_size)
+    return [results[i:i + shard_size] for i in range(0, len(results), shard_size)]
+
+def dedupe_entries(entries: List[Dict]) -> List[Dict]:
+    """Drop exact duplicate entries (e.g. patient details repeated on every page) keeping first occurrence."""
+    seen, unique = set(), []
+    for entry in entries:
+        key = json.dumps(entry, sort_keys=True, default=str)
+        if key not in seen:
+            seen.add(key)
+            unique.append(entry)
+    return unique
+
+async def _ainvoke(stage: str, messages: list, semaphore: asyncio.Semaphore, parse: Callable = str.strip,
+                   on_text: Optional[Callable[[str], None]] = None):
+    """
+    Invoke the LLM (with per-stage retry) under the concurrency limit, streaming to `on_text` if given.
+    The blocking client call runs in a worker thread so one shared ChatGroq instance can serve
+    any event loop (its async HTTP client is bound to the loop it was first used on).
+    """
+    async with semaphore:
+        return await asyncio.to_thread(invoke_with_retry, stage, messages, parse, on_text=on_text)
+
+async def _ainvoke_json_list(stage: str, messages: list, semaphore: asyncio.Semaphore,
+                             parse: Optional[Callable] = None) -> Optional[List[Dict]]:
+    """Invoke a JSON-returning stage; returns None if no JSON list could be recovered after retries."""
+    try:
+        return await _ainvoke(stage, messages, semaphore, parse or json_parser(stage))
+    except Exception as e:
+        logger.error(f"❌ {stage.capitalize()} failed: {str(e)}")
+    return None
+
+async def _process_chunk(chunk: str, semaphore: asyncio.Semaphore, format_table: bool) -> List[Dict]:
+    """Structure, categorize and optionally table-format one chunk of report text."""
+    if EXTRACTION_MODE == "single":
+        try:
+            test_results, metadata = await _ainvoke("single_pass", build_single_pass_messages(chunk), semaphore,
+                                                    parse_single_pass_response)
+            if test_results:
+                return test_results if format_table else metadata + test_results
+            logger.warning("⚠️ Single-pass extraction returned no test results, falling back to multi-call")
+        except Exception as e:
+            logger.error(f"❌ Single-pass extraction failed, falling back to multi-call: {str(e)}")
+
+    structured = await _ainvoke_json_list("structuring", build_structure_messages(chunk), semaphore)
+    if not structured:
+        return []
+    categorized, unresolved = categorize_by_rules(structured)
+    if unresolved:
+        llm_rows = await _ainvoke_json_list("categorization", build_categorize_messages([categorized[i] for i in unresolved]), semaphore)
+        categorized = merge_llm_statuses(categorized, unresolved, llm_rows)
+    if not format_table:
+        return categorized
+    table = await _ainvoke_json_list("table_formatting", build_table_messages(categorized), semaphore, parse_table_rows)
+    return table or []
+
+async def structure_report_async(text: str, semaphore: asyncio.Semaphore, format_table: bool = False) -> List[Dict]:
+    """Run the per-chunk structuring stages for all chunks concurrently and merge the results."""
+    chunks = chunk_report_text(text)
+    logger.info(f"♻ Structuring report in {len(chunks)} chunk(s)")
+    parts = await asyncio.gather(*(_process_chunk(chunk, semaphore, format_table) for chunk in chunks))
+    merged = dedupe_entries([entry for part in parts for entry in part])
+    logger.info(f"✅ Structured {len(merged)} entries")
+    return merged
+
+async def explain_results_async(results: List[Dict], semaphore: asyncio.Semaphore,
+                                on_text: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Explain test results in shards fanned out concurrently, merged in the original order.
+    If `on_text` is given, the merged partial text of all shards is streamed to it.
+    """
+    shards = shard_results(results)
+    logger.info(f"♻ Generating explanations in {len(shards)} shard(s)")
+    partials = [""] * len(shards)
+
+    def shard_streamer(index: int) -> Optional[Callable[[str], None]]:
+        if on_text is None:
+            return None
+        def update(text: str):
+            partials[index] = text.strip()
+            on_text("\n\n".join(part for part in partials if part))
+        return update
+
+    async def explain_shard(index: int, shard: List[Dict]) -> str:
+        try:
+            return await _ainvoke("explanation", build_explanation_messages(shard), semaphore, on_text=shard_streamer(index))
+        except Exception as e:
+            logger.error(f"❌ Explanation shard failed: {str(e)}")
+            return ""
+
+    explanations = [text for text in await asyncio.gather(*(explain_shard(i, s) for i, s in enumerate(shards))) if text]
+    if not explanations:
+        return EXPLANATION_ERROR
+    logger.info("✅ Explanations generated")
+    return "\n\n".join(explanations)
+
+async def summarize_explanations_async(explanations: str, semaphore: asyncio.Semaphore,
+                                       on_text: Optional[Callable[[str], None]] = None) -> str:
+    """Generate summary bullet points from the merged explanations, as the serial pipeline does."""
+    try:
+        summary = await _ainvoke("summary", build_summary_messages(explanations), semaphore, on_text=on_text)
+        logger.info("✅ Summary generated")
+        return summary
+    except Exception as e:
+        logger.error(f"❌ Summary generation failed: {str(e)}")
+        return SUMMARY_ERROR
+
+async def analyze_report_async(text: str, max_concurrency: Optional[int] = None,
+                               on_progress: Optional[ProgressCallback] = None) -> Dict:
+    """DAG version of `processing.analyze_report`."""
+    semaphore = asyncio.Semaphore(max_concurrency or PIPELINE_MAX_CONCURRENCY)
+    categorized = await structure_report_async(text, semaphore)
+    if not categorized:
+        raise ValueError("Data structuring failed")
+
+    test_results, metadata = split_test_results(categorized)
+    if on_progress:
+        on_progress("tests", {"metadata": metadata, "test_results": test_results, "categorized_data": categorized})
+    explanation, summary_bullets = None, None
+    if test_results:
+        # The summary is built from the explanations (not the raw results) so both modes store the same output
+        explanation = await explain_results_async(test_results, semaphore, stream_progress(on_progress, "explanation"))
+        summary_bullets = await summarize_explanations_async(explanation, semaphore, stream_progress(on_progress, "summary"))
+    return {
+        "metadata": metadata,
+        "test_results": test_results,
+        "explanation": explanation,
+        "summary_bullets": summary_bullets,
+        "categorized_data": categorized,
+    }
+
+async def process_medical_report_async(text: str, max_concurrency: Optional[int] = None) -> Tuple[List[Dict], str, str]:
+    """DAG version of `processing.process_medical_report`."""
+    logger.info("♻ Processing medical report (dag mode)")
+    semaphore = asyncio.Semaphore(max_concurrency or PIPELINE_MAX_CONCURRENCY)
+    table_results = await structure_report_async(text, semaphore, format_table=True)
+    if not table_results:
+        logger.error("❌ Failed to structure data")
+        return [], "Unable to process report due to structuring error.", ""
+
+    explanations = await explain_results_async(table_results, semaphore)
+    summary_bullets = await summarize_explanations_async(explanations, semaphore)
+    logger.info("✅ Medical report processing completed")
+    return table_results, explanations, summary_bullets
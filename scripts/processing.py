@@ -1,31 +1,50 @@
 import json
-from scripts.utils import configure_llm, create_llm_prompt
-from scripts.config import get_logger
-from typing import List, Dict
+from scripts.llm import create_llm_prompt, invoke_with_retry, json_parser
+from scripts.categorization import categorize_by_rules, merge_llm_statuses
+from scripts.config import get_logger, PIPELINE_MODE, EXTRACTION_MODE
+from typing import Callable, List, Dict, Optional, Tuple
 
 logger = get_logger(__name__)
 
-def process_medical_report(text: str) -> tuple[List[Dict], str, str]:
+TABLE_FIELDS = ("test_name", "value", "unit", "normal_range", "status")
+STATUS_VALUES = ("Normal", "Borderline", "Critical", "Unknown")
+
+# Progress callback for `analyze_report`: called as on_progress(event, payload) with
+#   "tests"       -> {"metadata", "test_results", "categorized_data"} once categorization is done
+#   "explanation" -> partial explanation text while it streams
+#   "summary"     -> partial summary text while it streams
+ProgressCallback = Callable[[str, object], None]
+
+def process_medical_report(text: str, mode: Optional[str] = None) -> tuple[List[Dict], str, str]:
     """
     Process medical report text through structuring, categorization, explanation, and summary.
     Returns structured results, explanations, and summary bullet points.
+
+    `mode` selects "serial" (one stage after another) or "dag" (independent stages run
+    concurrently, see `scripts/pipeline.py`); defaults to `PIPELINE_MODE`.
     """
+    if (mode or PIPELINE_MODE) == "dag":
+        from scripts.pipeline import run_async, process_medical_report_async
+        return run_async(process_medical_report_async(text))
+
     logger.info("♻ Processing medical report")
 
-    # Step 1: Structure data
-    results = structure_data(text)
-    if not results:
-        logger.error("❌ Failed to structure data")
-        return [], "Unable to process report due to structuring error.", ""
+    # Steps 1-3: Structure, categorize and format for table (single call when EXTRACTION_MODE=single)
+    extracted = extract_report_single_pass(text) if EXTRACTION_MODE == "single" else None
+    if extracted:
+        table_results, _ = extracted
+    else:
+        results = structure_data(text)
+        if not results:
+            logger.error("❌ Failed to structure data")
+            return [], "Unable to process report due to structuring error.", ""
 
-    # Step 2: Categorize results
-    categorized = categorize_results(results)
-    if not categorized:
-        logger.warning("⚠️ No categorized results returned, using original results")
-        categorized = results
+        categorized = categorize_results(results)
+        if not categorized:
+            logger.warning("⚠️ No categorized results returned, using original results")
+            categorized = results
 
-    # Step 3: Format for table
-    table_results = format_results_for_table(categorized)
+        table_results = format_results_for_table(categorized)
 
     # Step 4: Generate explanations
     explanations = explain_results_batch(table_results)
@@ -42,23 +61,124 @@ def process_medical_report(text: str) -> tuple[List[Dict], str, str]:
     logger.info("✅ Medical report processing completed")
     return table_results, explanations, summary_bullets
 
-def structure_data(text: str) -> List[Dict]:
-    """Extract structured data from medical report text using LLM."""
-    logger.info("♻ Extracting structured data")
-    try:
-        # messages = [
-        #     SystemMessage(content="You are a medical data extraction assistant."),
-        #     HumanMessage(content=f"""
-        #         Extract all explicitly mentioned information from the medical report below as a JSON array of dictionaries.
-        #         Include only fields explicitly stated (e.g., test_name, value, unit, normal_range, patient_name, age, date).
-        #         Do not guess or add fields. Return only the JSON array.
-
-        #         Medical Report:
-        #         {text}
-        #     """)
-        # ]
-        messages = create_llm_prompt(system_role="You are a medical data extraction assistant.",
-                                     task_instructions="""
+def analyze_report(text: str, mode: Optional[str] = None, max_concurrency: Optional[int] = None,
+                   on_progress: Optional[ProgressCallback] = None) -> Dict:
+    """
+    Run the Home page analysis on report text and return a dict with
+    metadata, test_results, explanation, summary_bullets and categorized_data.
+    Raises ValueError if no structured data could be extracted.
+
+    If `on_progress` is given, the test results are reported as soon as they are categorized and the
+    explanation and summary are streamed to it (see `ProgressCallback`); the returned dict is unchanged.
+    """
+    if (mode or PIPELINE_MODE) == "dag":
+        from scripts.pipeline import run_async, analyze_report_async
+        return run_async(analyze_report_async(text, max_concurrency, on_progress))
+
+    extracted = extract_report_single_pass(text) if EXTRACTION_MODE == "single" else None
+    if extracted:
+        test_results, metadata = extracted
+        categorized_data = metadata + test_results
+    else:
+        structured_data = structure_data(text)
+        if not structured_data:
+            raise ValueError("Data structuring failed")
+
+        categorized_data = categorize_results(structured_data)
+        if not categorized_data:
+            raise ValueError("Categorization failed")
+
+        test_results, metadata = split_test_results(categorized_data)
+    if on_progress:
+        on_progress("tests", {"metadata": metadata, "test_results": test_results, "categorized_data": categorized_data})
+    explanation = explain_results_batch(test_results, stream_progress(on_progress, "explanation")) if test_results else None
+    summary_bullets = (generate_summary_bullet_points(explanation, stream_progress(on_progress, "summary"))
+                       if explanation and test_results else None)
+    return {
+        "metadata": metadata,
+        "test_results": test_results,
+        "explanation": explanation,
+        "summary_bullets": summary_bullets,
+        "categorized_data": categorized_data,
+    }
+
+def stream_progress(on_progress: Optional[ProgressCallback], event: str) -> Optional[Callable[[str], None]]:
+    """Adapt a progress callback to the `on_text` hook of a streaming stage."""
+    if on_progress is None:
+        return None
+    return lambda text: on_progress(event, text.strip())
+
+def split_test_results(categorized: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """Split categorized entries into (test_results, metadata)."""
+    test_results = [r for r in categorized if "test_name" in r or "Test" in r]
+    metadata = [r for r in categorized if "test_name" not in r and "Test" not in r]
+    return test_results, metadata
+
+def validate_report_schema(payload) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Validate a single-pass extraction payload and normalize it to (test_results, metadata).
+    Every test row gets exactly the TABLE_FIELDS columns; missing fields become 'Unknown' and
+    statuses outside STATUS_VALUES become 'Unknown'. Raises ValueError if the shape is wrong.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("expected a JSON object with 'metadata' and 'test_results'")
+    tests = payload.get("test_results")
+    metadata = payload.get("metadata") or []
+    if isinstance(metadata, dict):
+        metadata = [metadata]
+    if not isinstance(tests, list) or not all(isinstance(row, dict) for row in tests):
+        raise ValueError("'test_results' must be a list of objects")
+    if not isinstance(metadata, list) or not all(isinstance(row, dict) for row in metadata):
+        raise ValueError("'metadata' must be a list of objects")
+
+    test_results = []
+    for row in tests:
+        if not row.get("test_name"):
+            raise ValueError("test result without 'test_name'")
+        normalized = {field: "Unknown" if row.get(field) is None else row[field] for field in TABLE_FIELDS}
+        if normalized["status"] not in STATUS_VALUES:
+            normalized["status"] = "Unknown"
+        test_results.append(normalized)
+    return test_results, [row for row in metadata if row]
+
+def parse_single_pass_response(content: str) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Parse and validate a single-pass response. The LLM's statuses are kept; the rule engine only
+    fills in rows the LLM left as 'Unknown' (and leaves them 'Unknown' if it can't parse the range either).
+    """
+    test_results, metadata = validate_report_schema(json_parser("single_pass", dict)(content))
+    unknown = [i for i, row in enumerate(test_results) if row["status"] == "Unknown"]
+    if unknown:
+        categorized, _ = categorize_by_rules([test_results[i] for i in unknown])
+        for i, row in zip(unknown, categorized):
+            test_results[i] = row
+    return test_results, metadata
+
+def build_single_pass_messages(text: str) -> list:
+    """Build the prompt that extracts, categorizes and formats a report in one call."""
+    return create_llm_prompt(system_role="You are a medical data extraction assistant.",
+                             task_instructions="""
+                Given the following medical report, return a **valid JSON object** with exactly two keys:
+
+                - "metadata": a JSON array of dictionaries with the non-test information explicitly mentioned (e.g., patient name, age, gender, date, doctor), using the field names as keys.
+                - "test_results": a JSON array with one dictionary per test result, each with exactly these keys:
+                  - test_name
+                  - value
+                  - unit
+                  - normal_range
+                  - status: one of 'Normal', 'Borderline', 'Critical', 'Unknown'
+
+                **Important Instructions:**
+                - Include **only** information explicitly mentioned in the report. Do **not** guess or hallucinate.
+                - Use 'Normal' if the value is within the normal range, 'Borderline' if slightly outside, 'Critical' if significantly outside, and 'Unknown' if there is not enough data.
+                - Use 'Unknown' for missing fields and '' (empty string) for inapplicable fields.
+                - Return **only** the JSON object — no explanations, no markdown, no code formatting, no comments.
+                                     """, input_data=text)
+
+def build_structure_messages(text: str) -> list:
+    """Build the prompt for extracting structured data from report text."""
+    return create_llm_prompt(system_role="You are a medical data extraction assistant.",
+                             task_instructions="""
                 Given the following medical report, extract all explicitly mentioned information related to test results and return it as a **valid JSON array** of dictionaries. Each dictionary should represent a test result or relevant metadata (e.g., patient information) as found in the text.
 
                 **Important Instructions:**
@@ -69,35 +189,11 @@ def structure_data(text: str) -> List[Dict]:
                 - Your response must be a **JSON array of dictionaries**.
                 - Return **only** the JSON array — no explanations, no markdown, no code formatting, no comments.
                                      """, input_data=text)
-        response = configure_llm().invoke(messages)
-        results = json.loads(response.content.strip())
-        if not isinstance(results, list):
-            logger.warning("⚠️ LLM returned non-list response")
-            return []
-        logger.info(f"✅ Extracted {len(results)} results")
-        return results
-    except Exception as e:
-        logger.error(f"❌ Structuring failed: {str(e)}")
-        return []
 
-def categorize_results(results: List[Dict]) -> List[Dict]:
-    """Categorize medical report data, adding 'status' field where applicable."""
-    logger.info("♻ Categorizing results")
-    try:
-        results_text = json.dumps(results, indent=2)
-        # messages = [
-        #     SystemMessage(content="You are an expert medical data categorizer."),
-        #     HumanMessage(content=f"""
-        #         Categorize the medical report data below, assigning 'status' ('Critical', 'Borderline', 'Normal', 'Unknown')
-        #         to test result entries based on provided data. Do not add status to non-test entries (e.g., patient_name, age).
-        #         Do not guess or perform calculations. Return only the JSON array.
-
-        #         Input:
-        #         {results_text}
-        #     """)
-        # ]
-        messages = create_llm_prompt(system_role="You are an expert medical data categorizer.",
-                                     task_instructions="""
+def build_categorize_messages(results: List[Dict]) -> list:
+    """Build the prompt for assigning a status to structured entries."""
+    return create_llm_prompt(system_role="You are an expert medical data categorizer.",
+                             task_instructions="""
                 Given the following list of dictionaries containing medical report data (e.g., test results, patient metadata, or other fields), analyze each entry and assign a 'status' field with one of the values: 'Critical', 'Borderline', 'Normal', or 'Unknown'. Categorize based solely on the provided data, using your medical expertise to interpret the values and context. The data can contain any fields (e.g., test names, values, ranges, units, patient info, or others), and you should not assume specific fields are present.
 
                 **Important Instructions:**
@@ -111,36 +207,12 @@ def categorize_results(results: List[Dict]) -> List[Dict]:
                 - Do **not** guess or hallucinate information not provided in the input.
                 - Return the original list of dictionaries, updated with a 'status' field where applicable, as a JSON array.
                 - Return **only** the JSON array — no explanations, no markdown, no code formatting, no comments.
-                                     """, input_data=results_text)
-        response = configure_llm().invoke(messages)
-        categorized = json.loads(response.content.strip())
-        if not isinstance(categorized, list):
-            logger.warning("⚠️ Non-list response for categorization")
-            return results
-        logger.info(f"✅ Categorized {len(categorized)} results")
-        return categorized
-    except Exception as e:
-        logger.error(f"❌ Categorization failed: {str(e)}")
-        return results
+                                     """, input_data=json.dumps(results, indent=2))
 
-def format_results_for_table(results: List[Dict]) -> List[Dict]:
-    """Format test results for table display."""
-    logger.info("♻ Formatting results for table")
-    try:
-        input_data = json.dumps(results, indent=2)
-        # messages = [
-        #     SystemMessage(content="You are a medical data assistant."),
-        #     HumanMessage(content=f"""
-        #         Extract only test result entries from the input below and format them into dictionaries with:
-        #         test_name, value, unit, normal_range, status. Use 'Unknown' for missing fields, '' for inapplicable.
-        #         Return only a JSON array of test dictionaries.
-
-        #         Input:
-        #         {input_data}
-        #     """)
-        # ]
-        messages = create_llm_prompt(system_role="You are a medical data assistant.",
-                                     task_instructions="""
+def build_table_messages(results: List[Dict]) -> list:
+    """Build the prompt for mapping categorized entries onto the table columns."""
+    return create_llm_prompt(system_role="You are a medical data assistant.",
+                             task_instructions="""
             Given the following list of mixed medical report entries (some may be test results, others may be metadata), extract only **test result entries** and format them into dictionaries with the following columns:
 
             - test_name
@@ -155,39 +227,12 @@ def format_results_for_table(results: List[Dict]) -> List[Dict]:
             - Use 'Unknown' for missing fields.
             - Use '' (empty string) for inapplicable fields.
             - Return **only** a JSON array of test dictionaries. No text, no markdown, no code formatting.
-                                     """, input_data=input_data)
-        response = configure_llm().invoke(messages)
-        parsed = json.loads(response.content.strip())
-        if isinstance(parsed, list) and all(isinstance(row, dict) for row in parsed):
-            logger.info(f"✅ Formatted {len(parsed)} rows for table")
-            return parsed
-        logger.warning("⚠️ Invalid table format response")
-        return []
-    except Exception as e:
-        logger.error(f"❌ Table formatting failed: {str(e)}")
-        return []
+                                     """, input_data=json.dumps(results, indent=2))
 
-def explain_results_batch(results: List[Dict]) -> str:
-    """Generate patient-friendly explanations for test results."""
-    logger.info("♻ Generating explanations")
-    try:
-        input_data = json.dumps(results, indent=2)
-        # messages = [
-        #     SystemMessage(content="You are a professional medical explanation assistant."),
-        #     HumanMessage(content=f"""
-        #         Explain each test result in the input below for a non-technical patient. For each test, include:
-        #         - What it measures
-        #         - The patient's value and its meaning
-        #         - The status (Normal, Borderline, Critical, Unknown) and why
-        #         - Next steps if needed
-        #         Use simple language, separate explanations by test name, and return plain text.
-
-        #         Input:
-        #         {input_data}
-        #     """)
-        # ]
-        messages = create_llm_prompt(system_role="You are a professional medical explanation assistant.",
-                                     task_instructions="""
+def build_explanation_messages(results: List[Dict]) -> list:
+    """Build the prompt for patient-friendly explanations of test results."""
+    return create_llm_prompt(system_role="You are a professional medical explanation assistant.",
+                             task_instructions="""
                 You will receive a list of medical test results in dictionary format. Each dictionary may include:
                 - test_name
                 - value
@@ -206,34 +251,12 @@ def explain_results_batch(results: List[Dict]) -> str:
                 Only use provided data. Do not assume, infer, or invent missing details.
 
                 Return a clearly separated explanation **for each test** — label them clearly with the test name.
-                                     """, input_data=input_data)
-        response = configure_llm().invoke(messages)
-        explanation = response.content.strip()
-        logger.info("✅ Explanations generated")
-        return explanation
-    except Exception as e:
-        logger.error(f"❌ Explanation generation failed: {str(e)}")
-        return "Unable to generate explanations due to an error."
+                                     """, input_data=json.dumps(results, indent=2))
 
-def generate_summary_bullet_points(explanations: str) -> str:
-    """Generate summary bullet points from explanations."""
-    logger.info("♻ Generating summary bullet points")
-    try:
-        # messages = [
-        #     SystemMessage(content="You are a compassionate medical assistant."),
-        #     HumanMessage(content=f"""
-        #         From the medical explanations below, generate:
-        #         - 🔍 **Summary**: 3–5 concise points of key findings
-        #         - ⚠️ **Risks/Conditions**: Potential risks with likelihood (High, Possible, Low)
-        #         - ✅ **Actions/Recommendations**: 2–5 specific next steps
-        #         Return only plain text bullet points grouped into these sections.
-
-        #         Explanations:
-        #         {explanations}
-        #     """)
-        # ]
-        messages = create_llm_prompt(system_role="You are a compassionate medical assistant.",
-                                     task_instructions="""
+def build_summary_messages(explanations: str) -> list:
+    """Build the prompt for summary bullet points from the explanations text."""
+    return create_llm_prompt(system_role="You are a compassionate medical assistant.",
+                             task_instructions="""
         You are a compassionate and professional medical assistant.
 
         You will receive a set of detailed medical explanations (already written in patient-friendly language).
@@ -247,8 +270,90 @@ def generate_summary_bullet_points(explanations: str) -> str:
         Do NOT return any JSON or formatting instructions — just clean, readable bullet points grouped into the 3 sections above.
 
                                      """, input_data=explanations)
-        response = configure_llm().invoke(messages)
-        return response.content.strip()
+
+def parse_table_rows(content: str) -> List[Dict]:
+    """Parse a table-formatting response; raises ValueError unless it is a list of objects."""
+    rows = json_parser("table_formatting")(content)
+    if not all(isinstance(row, dict) for row in rows):
+        raise ValueError("table rows must be JSON objects")
+    return rows
+
+def extract_report_single_pass(text: str) -> Optional[Tuple[List[Dict], List[Dict]]]:
+    """
+    Extract table-ready test results and metadata in one LLM call.
+    Returns (test_results, metadata), or None so callers can fall back to the three-call path.
+    """
+    logger.info("♻ Extracting report in a single pass")
+    try:
+        test_results, metadata = invoke_with_retry("single_pass", build_single_pass_messages(text), parse_single_pass_response)
+        if not test_results:
+            logger.warning("⚠️ Single-pass extraction returned no test results")
+            return None
+        logger.info(f"✅ Single-pass extraction returned {len(test_results)} tests and {len(metadata)} metadata entries")
+        return test_results, metadata
+    except Exception as e:
+        logger.error(f"❌ Single-pass extraction failed: {str(e)}")
+        return None
+
+def structure_data(text: str) -> List[Dict]:
+    """Extract structured data from medical report text using LLM."""
+    logger.info("♻ Extracting structured data")
+    try:
+        results = invoke_with_retry("structuring", build_structure_messages(text), json_parser("structuring"))
+        logger.info(f"✅ Extracted {len(results)} results")
+        return results
+    except Exception as e:
+        logger.error(f"❌ Structuring failed: {str(e)}")
+        return []
+
+def categorize_results(results: List[Dict]) -> List[Dict]:
+    """
+    Categorize medical report data, adding 'status' field where applicable.
+    Rows with a numeric value and a parseable normal range are categorized locally;
+    only the remaining test rows are sent to the LLM.
+    """
+    logger.info("♻ Categorizing results")
+    categorized, unresolved = categorize_by_rules(results)
+    if not unresolved:
+        logger.info(f"✅ Categorized {len(categorized)} results without LLM")
+        return categorized
+    try:
+        messages = build_categorize_messages([categorized[i] for i in unresolved])
+        llm_rows = invoke_with_retry("categorization", messages, json_parser("categorization"))
+        categorized = merge_llm_statuses(categorized, unresolved, llm_rows)
+        logger.info(f"✅ Categorized {len(categorized)} results ({len(unresolved)} via LLM)")
+        return categorized
+    except Exception as e:
+        logger.error(f"❌ Categorization failed: {str(e)}")
+        return categorized
+
+def format_results_for_table(results: List[Dict]) -> List[Dict]:
+    """Format test results for table display."""
+    logger.info("♻ Formatting results for table")
+    try:
+        parsed = invoke_with_retry("table_formatting", build_table_messages(results), parse_table_rows)
+        logger.info(f"✅ Formatted {len(parsed)} rows for table")
+        return parsed
+    except Exception as e:
+        logger.error(f"❌ Table formatting failed: {str(e)}")
+        return []
+
+def explain_results_batch(results: List[Dict], on_text: Optional[Callable[[str], None]] = None) -> str:
+    """Generate patient-friendly explanations for test results, streaming partial text to `on_text` if given."""
+    logger.info("♻ Generating explanations")
+    try:
+        explanation = invoke_with_retry("explanation", build_explanation_messages(results), on_text=on_text)
+        logger.info("✅ Explanations generated")
+        return explanation
+    except Exception as e:
+        logger.error(f"❌ Explanation generation failed: {str(e)}")
+        return "Unable to generate explanations due to an error."
+
+def generate_summary_bullet_points(explanations: str, on_text: Optional[Callable[[str], None]] = None) -> str:
+    """Generate summary bullet points from explanations, streaming partial text to `on_text` if given."""
+    logger.info("♻ Generating summary bullet points")
+    try:
+        return invoke_with_retry("summary", build_summary_messages(explanations), on_text=on_text)
     except Exception as e:
         logger.error(f"❌ Summary generation failed: {str(e)}")
-        return "Unable to generate summary due to an error."
\ No newline at end of file
+        return "Unable to generate summary due to an error."
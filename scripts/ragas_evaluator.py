@@ -1,10 +1,7 @@
-from ragas.metrics import faithfulness
-from ragas import evaluate
-from datasets import Dataset
-from pymongo import MongoClient
 from datetime import datetime
-from typing import List, Dict, Optional
-from scripts.config import get_logger, get_mongo_uri, MODEL_NAME
+from typing import List, Dict, Optional, Tuple
+from scripts.config import get_logger, MODEL_NAME, CHAT_HISTORY_PAGE_SIZE
+from scripts.mongo import get_collection, get_writer, flush_writer, ensure_index
 
 # Logger setup
 logger = get_logger(__name__)
@@ -17,51 +14,91 @@ def evaluate_rag_metrics(
     """
     Evaluates the faithfulness metric using RAGAS for a single Q&A-context set.
     """
-    try:
-        logger.info("♻ Preparing dataset for RAGAS evaluation...")
-        dataset = Dataset.from_dict({
-            "question": [question],
-            "answer": [generated_answer],
-            "contexts": [[context]]
-        })
-        logger.info("♻ Running faithfulness evaluation...")
-        result = evaluate(dataset, metrics=[faithfulness])
-        metrics = result.to_pandas().to_dict("records")[0]
-        logger.info(f"✅ Evaluation complete: {metrics}")
-        return {"faithfulness": metrics['faithfulness']}
-    except Exception as e:
-        logger.error(f"❌ Metric evaluation failed: {e}")
-        return {"faithfulness": 0.0}
+    return evaluate_rag_metrics_batch([question], [generated_answer], [[context]])[0]
+
+def get_ragas_metrics(names: List[str]) -> list:
+    """
+    Map metric names to RAGAS metric objects. Supported: faithfulness, answer_relevancy and
+    context_precision (reference-free LLM variant, since stored chats have no ground truth).
+    """
+    from ragas.metrics import answer_relevancy, faithfulness, LLMContextPrecisionWithoutReference
+    available = {
+        "faithfulness": lambda: faithfulness,
+        "answer_relevancy": lambda: answer_relevancy,
+        "context_precision": lambda: LLMContextPrecisionWithoutReference(name="context_precision"),
+    }
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Unsupported RAGAS metric(s): {', '.join(unknown)}")
+    return [available[name]() for name in names]
+
+def score_rag_dataset(
+    questions: List[str],
+    generated_answers: List[str],
+    contexts: List[List[str]],
+    metric_names: List[str],
+) -> List[Dict[str, Optional[float]]]:
+    """
+    Runs one `ragas.evaluate` call over a single Dataset and returns {metric: score} per row, in order.
+    Scores RAGAS could not compute come back as None. Errors are raised to the caller.
+    ragas and datasets are imported here, so the queue and readers don't load them until the first evaluation.
+    """
+    from datasets import Dataset
+    from ragas import evaluate
+    dataset = Dataset.from_dict({
+        "question": questions,
+        "answer": generated_answers,
+        "contexts": contexts
+    })
+    result = evaluate(dataset, metrics=get_ragas_metrics(metric_names))
+    records = result.to_pandas().to_dict("records")
+    return [
+        {name: (None if record.get(name) is None or record[name] != record[name] else float(record[name]))
+         for name in metric_names}
+        for record in records
+    ]
+
+def evaluate_rag_metrics_batch(
+    questions: List[str],
+    generated_answers: List[str],
+    contexts: List[List[str]],
+) -> List[Dict[str, Optional[float]]]:
+    """
+    Evaluates faithfulness for several Q&A-context sets in one `ragas.evaluate` call over a single Dataset.
+    Returns one metrics dict per row, in order; a score RAGAS could not compute is None.
+    Errors are raised so callers can tell a failed evaluation from a real 0.0 score.
+    """
+    logger.info(f"♻ Running faithfulness evaluation on {len(questions)} row(s)...")
+    scores = score_rag_dataset(questions, generated_answers, contexts, ["faithfulness"])
+    logger.info(f"✅ Evaluation complete for {len(scores)} row(s)")
+    return [{"faithfulness": row["faithfulness"]} for row in scores]
 
 def store_chat_metrics(
     question: str,
     generated_answer: str,
     context: str,
-    metrics: Dict[str, float],
+    metrics: Dict[str, Optional[float]],
     user_id: str,
     db_name: str = "diagnosify",
     collection_name: str = "chat_history"
 ):
     """
     Stores evaluated RAG metrics and chat data in MongoDB Atlas with user_id.
+    Documents are queued on the collection's buffered writer and inserted in batches.
+    A missing faithfulness score is stored as None (not 0.0), so it is left out of the score statistics.
     """
     try:
-        logger.info("♻ Connecting to MongoDB Atlas...")
-        client = MongoClient(get_mongo_uri())
-        db = client[db_name]
-        collection = db[collection_name]
         document = {
             "user_id": user_id,
             "model_used": MODEL_NAME,
             "question": question,
             "generated_answer": generated_answer,
             "retrieved_context": context,
-            "faithfulness_score": metrics.get("faithfulness", 0.0),
+            "faithfulness_score": metrics.get("faithfulness"),
             "timestamp": datetime.utcnow().isoformat() + "Z"
         }
-        result = collection.insert_one(document)
-        client.close()
-        logger.info(f"✅ Chat and metric stored successfully. Doc ID: {result.inserted_id}")
+        get_writer(db_name, collection_name).add(document)
+        logger.info("✅ Chat and metric queued for storage.")
     except Exception as e:
         logger.error(f"❌ Error while saving chat metrics to DB: {e}")
 
@@ -75,7 +112,11 @@ def evaluate_and_store(
     End-to-end evaluation and logging to DB with user_id.
     """
     logger.info("♻ Starting full RAGAS logging pipeline...")
-    metrics = evaluate_rag_metrics(question, generated_answer, context)
+    try:
+        metrics = evaluate_rag_metrics(question, generated_answer, context)
+    except Exception as e:
+        logger.error(f"❌ Metric evaluation failed, storing the chat without a score: {e}")
+        metrics = {"faithfulness": None}
     store_chat_metrics(question, generated_answer, context, metrics, user_id)
 
 def get_user_chat_history(user_id: str, db_name: str = "diagnosify", collection_name: str = "chat_history") -> List[Dict]:
@@ -92,17 +133,112 @@ def get_user_chat_history(user_id: str, db_name: str = "diagnosify", collection_
     """
     try:
         logger.info(f"♻ Retrieving chat history for user_id: {user_id}")
-        client = MongoClient(get_mongo_uri())
-        db = client[db_name]
-        collection = db[collection_name]
-        chats = list(collection.find({"user_id": user_id}))
-        client.close()
+        flush_writer(db_name, collection_name)  # make this process's queued chats visible
+        chats = list(get_collection(db_name, collection_name).find({"user_id": user_id}))
         logger.info(f"✅ Retrieved {len(chats)} chats for user_id: {user_id}")
         return chats
     except Exception as e:
         logger.error(f"❌ Error retrieving chat history for user_id {user_id}: {e}")
         return []
 
+# Chat list rows leave out the (large) retrieved context; it is loaded per row with get_chat_context
+CHAT_LIST_PROJECTION = {"retrieved_context": 0}
+
+def get_chat_collection(db_name: str = "diagnosify", collection_name: str = "chat_history"):
+    """Returns the chat history collection, making sure the (user_id, timestamp) index exists."""
+    ensure_index(db_name, collection_name, [("user_id", 1), ("timestamp", -1)], name="user_id_timestamp")
+    return get_collection(db_name, collection_name)
+
+def get_user_chat_page(
+    user_id: str,
+    cursor: Optional[Tuple[str, object]] = None,
+    page_size: int = CHAT_HISTORY_PAGE_SIZE,
+    db_name: str = "diagnosify",
+    collection_name: str = "chat_history"
+) -> Tuple[List[Dict], Optional[Tuple[str, object]]]:
+    """
+    Returns one page of a user's chats, newest first, without `retrieved_context`.
+    `cursor` is the (timestamp, _id) of the last row of the previous page; the second return value
+    is the cursor for the next page, or None when there are no more chats.
+    """
+    try:
+        flush_writer(db_name, collection_name)  # make this process's queued chats visible
+        query = {"user_id": user_id}
+        if cursor is not None:
+            timestamp, last_id = cursor
+            query["$or"] = [{"timestamp": {"$lt": timestamp}}, {"timestamp": timestamp, "_id": {"$lt": last_id}}]
+        chats = list(
+            get_chat_collection(db_name, collection_name)
+            .find(query, CHAT_LIST_PROJECTION)
+            .sort([("timestamp", -1), ("_id", -1)])
+            .limit(page_size + 1)
+        )
+        next_cursor = None
+        if len(chats) > page_size:
+            chats = chats[:page_size]
+            next_cursor = (chats[-1].get("timestamp"), chats[-1]["_id"])
+        logger.info(f"✅ Retrieved page of {len(chats)} chats for user_id: {user_id}")
+        return chats, next_cursor
+    except Exception as e:
+        logger.error(f"❌ Error retrieving chat page for user_id {user_id}: {e}")
+        return [], None
+
+def get_chat_context(chat_id, db_name: str = "diagnosify", collection_name: str = "chat_history") -> str:
+    """Loads the retrieved context of a single chat (used when a row is expanded)."""
+    try:
+        chat = get_collection(db_name, collection_name).find_one({"_id": chat_id}, {"retrieved_context": 1})
+        return (chat or {}).get("retrieved_context", "")
+    except Exception as e:
+        logger.error(f"❌ Error retrieving context for chat {chat_id}: {e}")
+        return ""
+
+def get_faithfulness_stats(user_id: str, db_name: str = "diagnosify", collection_name: str = "chat_history") -> Dict[str, List[Dict]]:
+    """
+    Aggregates a user's faithfulness scores on the server.
+    Returns {"by_model": [{model, chats, mean, p10}], "trend": [{model, day, mean, chats}]}.
+    p10 uses $percentile (MongoDB 7.0+); older servers fall back to sorting the scores per model.
+    """
+    match = {"$match": {"user_id": user_id, "faithfulness_score": {"$type": "number"}}}
+    try:
+        collection = get_chat_collection(db_name, collection_name)
+        flush_writer(db_name, collection_name)
+        trend = list(collection.aggregate([
+            match,
+            {"$group": {
+                "_id": {"model": "$model_used", "day": {"$substr": ["$timestamp", 0, 10]}},
+                "mean": {"$avg": "$faithfulness_score"},
+                "chats": {"$sum": 1},
+            }},
+            {"$sort": {"_id.day": 1}},
+        ]))
+        group = {"_id": "$model_used", "chats": {"$sum": 1}, "mean": {"$avg": "$faithfulness_score"}}
+        try:
+            by_model = list(collection.aggregate([
+                match,
+                {"$group": {**group, "p10": {"$percentile": {"input": "$faithfulness_score", "p": [0.1], "method": "approximate"}}}},
+            ]))
+            for row in by_model:
+                row["p10"] = row["p10"][0]
+        except Exception as e:
+            logger.warning(f"⚠️ $percentile unavailable ({e}), computing p10 from sorted scores")
+            by_model = list(collection.aggregate([
+                match,
+                {"$sort": {"faithfulness_score": 1}},
+                {"$group": {**group, "scores": {"$push": "$faithfulness_score"}}},
+            ]))
+            for row in by_model:
+                scores = row.pop("scores")
+                row["p10"] = scores[max(0, -(-len(scores) // 10) - 1)]
+        return {
+            "by_model": [{"model": row["_id"], "chats": row["chats"], "mean": row["mean"], "p10": row["p10"]}
+                         for row in sorted(by_model, key=lambda r: str(r["_id"]))],
+            "trend": [{"model": row["_id"]["model"], "day": row["_id"]["day"], "mean": row["mean"], "chats": row["chats"]}
+                      for row in trend],
+        }
+    except Exception as e:
+        logger.error(f"❌ Error aggregating faithfulness stats for user_id {user_id}: {e}")
+        return {"by_model": [], "trend": []}
+
 # 🧪 Example usage
 if __name__ == "__main__":
     evaluate_and_store(
@@ -0,0 +1,66 @@
+import hashlib, json, os, threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from scripts.config import get_logger
+
+logger = get_logger(__name__)
+
+def file_content_hash(data: bytes) -> str:
+    """Return the SHA-256 hex digest of a file's raw bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+class AnalysisResultStore:
+    """
+    Stores report analysis results keyed by file content hash.
+    Keeps an in-process LRU of `max_entries` results and, if `persist_dir` is set,
+    mirrors every result to `<persist_dir>/<hash>.json` so it survives restarts.
+    """
+    def __init__(self, max_entries: int = 64, persist_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.persist_dir = persist_dir
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.persist_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the stored result for `key`, checking memory first and then disk."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                logger.info(f"✅ Analysis result cache hit (memory) for {key[:12]}")
+                return self._entries[key]
+        if not self.persist_dir or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except Exception as e:
+            logger.error(f"❌ Failed to read stored analysis {key[:12]}: {e}")
+            return None
+        logger.info(f"✅ Analysis result cache hit (disk) for {key[:12]}")
+        self._remember(key, result)
+        return result
+
+    def put(self, key: str, result: Dict):
+        """Store a result in memory and, if enabled, on disk."""
+        self._remember(key, result)
+        if not self.persist_dir:
+            return
+        try:
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            logger.error(f"❌ Failed to persist analysis {key[:12]}: {e}")
+
+    def _remember(self, key: str, result: Dict):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -1,27 +1,98 @@
 # Import BaseCallbackHandler from LangChain Core
+import time
+from typing import Dict, List, Optional
 from langchain_core.callbacks import BaseCallbackHandler
+from scripts.config import get_logger, STREAM_FLUSH_INTERVAL_MS, STREAM_FLUSH_TOKENS
+
+logger = get_logger(__name__)
 
 # Define a custom streaming handler that updates the UI in real-time
 class StreamHandler(BaseCallbackHandler):
-    
-    def __init__(self, container, initial_text=""):
+
+    def __init__(self, container, initial_text="", flush_interval_ms: Optional[float] = None,
+                 flush_tokens: Optional[int] = None):
         """
         Initialize the StreamHandler.
-        
+
+        Tokens are buffered in a list and the container is re-rendered at most every
+        `flush_interval_ms` milliseconds or every `flush_tokens` tokens, instead of once per token.
+
         Args:
         - container: A Streamlit container (`st.empty()`) where the text will be displayed.
         - initial_text: The starting text for the container (default is an empty string).
+        - flush_interval_ms / flush_tokens: Render cadence (defaults: STREAM_FLUSH_INTERVAL_MS, STREAM_FLUSH_TOKENS).
         """
         self.container = container  # Store the Streamlit container
-        self.text = initial_text  # Initialize the text storage
+        self.parts: List[str] = [initial_text] if initial_text else []  # Buffered text pieces
+        self.flush_interval = (STREAM_FLUSH_INTERVAL_MS if flush_interval_ms is None else flush_interval_ms) / 1000
+        self.flush_tokens = STREAM_FLUSH_TOKENS if flush_tokens is None else flush_tokens
+        self.token_count = 0
+        self.render_count = 0
+        self._pending = 0
+        self._start_time = time.perf_counter()
+        self._first_token_time: Optional[float] = None
+        self._last_token_time: Optional[float] = None
+        self._last_flush = self._start_time
+
+    @property
+    def text(self) -> str:
+        """The full text received so far."""
+        return "".join(self.parts)
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        """Start the time-to-first-token clock at the LLM call that produces the first token."""
+        if self._first_token_time is None:
+            self._start_time = time.perf_counter()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.on_llm_start(serialized, messages, **kwargs)
 
     def on_llm_new_token(self, token: str, **kwargs):
         """
         Callback method triggered when a new token is generated by the LLM.
-        
+
         Args:
         - token: The new token generated by the LLM.
         - kwargs: Additional arguments (not used here).
         """
-        self.text += token  # Append the new token to the existing text
+        now = time.perf_counter()
+        if self._first_token_time is None:
+            self._first_token_time = now
+        self._last_token_time = now
+        self.parts.append(token)
+        self.token_count += 1
+        self._pending += 1
+        if self._pending >= self.flush_tokens or now - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def on_llm_end(self, response, **kwargs):
+        """Render whatever is still buffered and log the stream's latency figures."""
+        self.flush()
+        if self.token_count:
+            metrics = self.metrics
+            logger.info(f"✅ Streamed {metrics['tokens']} tokens in {metrics['renders']} renders "
+                        f"(TTFT {metrics['ttft_s']:.2f}s, {metrics['tokens_per_s']:.1f} tokens/s)")
+
+    def on_llm_error(self, error, **kwargs):
+        self.flush()
+
+    def flush(self):
+        """Render the buffered text to the container if anything arrived since the last render."""
+        if not self._pending:
+            return
         self.container.markdown(self.text)  # Update the Streamlit UI with the latest text
+        self.render_count += 1
+        self._pending = 0
+        self._last_flush = time.perf_counter()
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        """Time to first token, token throughput after the first token, and number of UI renders."""
+        ttft = self._first_token_time - self._start_time if self._first_token_time is not None else None
+        generation = (self._last_token_time - self._first_token_time) if self._first_token_time is not None else 0.0
+        return {
+            "tokens": self.token_count,
+            "renders": self.render_count,
+            "ttft_s": ttft,
+            "tokens_per_s": (self.token_count - 1) / generation if generation > 0 else 0.0,
+        }
@@ -0,0 +1,177 @@
+import re
+from typing import Dict, List, Optional, Set
+from langchain_core.messages import BaseMessage, get_buffer_string
+from scripts.config import get_logger
+from scripts.llm import create_llm_prompt
+
+logger = get_logger(__name__)
+
+# Canonical test name -> aliases seen on reports and in questions (all lowercase, words only)
+TEST_SYNONYMS: Dict[str, List[str]] = {
+    "hba1c": ["a1c", "hb a1c", "hemoglobin a1c", "haemoglobin a1c", "glycosylated hemoglobin", "glycated hemoglobin",
+              "glycosylated haemoglobin", "glycated haemoglobin"],
+    "hemoglobin": ["haemoglobin", "hb", "hgb"],
+    "wbc": ["white blood cell", "white blood cells", "white blood cell count", "white cell count", "leukocytes",
+            "leucocytes", "tlc", "total leucocyte count", "total leukocyte count"],
+    "rbc": ["red blood cell", "red blood cells", "red blood cell count", "erythrocytes"],
+    "platelets": ["platelet", "platelet count", "plt"],
+    "hematocrit": ["haematocrit", "hct", "pcv", "packed cell volume"],
+    "mcv": ["mean corpuscular volume"],
+    "mch": ["mean corpuscular hemoglobin"],
+    "mchc": ["mean corpuscular hemoglobin concentration"],
+    "esr": ["erythrocyte sedimentation rate", "sed rate"],
+    "crp": ["c reactive protein"],
+    "alt": ["sgpt", "alanine aminotransferase", "alanine transaminase"],
+    "ast": ["sgot", "aspartate aminotransferase", "aspartate transaminase"],
+    "alp": ["alkaline phosphatase"],
+    "ggt": ["gamma gt", "gamma glutamyl transferase"],
+    "bilirubin": ["total bilirubin", "serum bilirubin"],
+    "albumin": ["serum albumin"],
+    "creatinine": ["serum creatinine", "creat"],
+    "urea": ["blood urea", "bun", "blood urea nitrogen"],
+    "uric acid": ["serum uric acid", "urate"],
+    "egfr": ["gfr", "glomerular filtration rate", "estimated gfr"],
+    "sodium": ["na", "serum sodium"],
+    "potassium": ["serum potassium"],
+    "chloride": ["cl", "serum chloride"],
+    "calcium": ["serum calcium"],
+    "total cholesterol": ["cholesterol", "serum cholesterol"],
+    "ldl": ["ldl cholesterol", "ldl c", "bad cholesterol", "low density lipoprotein"],
+    "hdl": ["hdl cholesterol", "hdl c", "good cholesterol", "high density lipoprotein"],
+    "triglycerides": ["tg", "trigs", "triglyceride"],
+    "fasting blood sugar": ["fbs", "fasting glucose", "fasting blood glucose", "fasting plasma glucose", "fpg"],
+    "random blood sugar": ["rbs", "random glucose", "random blood glucose"],
+    "glucose": ["blood sugar", "blood glucose", "sugar"],
+    "tsh": ["thyroid stimulating hormone", "thyrotropin"],
+    "t3": ["triiodothyronine", "free t3", "ft3"],
+    "t4": ["thyroxine", "free t4", "ft4"],
+    "vitamin d": ["vit d", "25 oh vitamin d", "25 hydroxy vitamin d", "vitamin d3"],
+    "vitamin b12": ["vit b12", "b12", "cobalamin"],
+    "ferritin": ["serum ferritin"],
+    "iron": ["serum iron"],
+    "psa": ["prostate specific antigen"],
+    # Panels, expanded to their members by TEST_GROUPS
+    "lipid profile": ["lipids", "lipid", "lipid panel"],
+    "liver function": ["liver", "lft", "lfts", "liver function test", "liver function tests", "liver enzymes"],
+    "kidney function": ["kidney", "renal", "rft", "kft", "renal function", "kidney function test"],
+    "thyroid function": ["thyroid", "tft", "thyroid profile", "thyroid function test"],
+    "blood count": ["cbc", "complete blood count", "full blood count", "fbc", "blood counts"],
+}
+
+# A question about the group also asks about each member
+TEST_GROUPS: Dict[str, List[str]] = {
+    "glucose": ["fasting blood sugar", "random blood sugar", "hba1c"],
+    "lipid profile": ["total cholesterol", "ldl", "hdl", "triglycerides"],
+    "liver function": ["alt", "ast", "alp", "ggt", "bilirubin", "albumin"],
+    "kidney function": ["creatinine", "urea", "egfr", "uric acid"],
+    "thyroid function": ["tsh", "t3", "t4"],
+    "blood count": ["hemoglobin", "wbc", "rbc", "platelets", "hematocrit", "mcv", "mch", "mchc"],
+}
+
+# Status words in a question -> statuses they ask about (checked in order, only when no test is named)
+STATUS_TERMS = [
+    (re.compile(r"\b(everything|(all|every|each)\s+(of\s+my\s+)?(tests?|results?|values?))\b"), {"Critical", "Borderline", "Normal", "Unknown"}),
+    (re.compile(r"\b(abnormal|out of range|not normal|concerning|flagged|high|low)\b"), {"Critical", "Borderline"}),
+    (re.compile(r"\b(critical|dangerous|severe)\b"), {"Critical"}),
+    (re.compile(r"\bborderline\b"), {"Borderline"}),
+    (re.compile(r"\bnormal\b"), {"Normal"}),
+]
+
+# Questions that ask for a list of tests ("which tests are high?") rather than a yes/no check ("are my results normal?")
+_LIST_QUESTION = re.compile(r"\b(which|what|list|show|name)\b")
+# A status word alone ("my low energy") is not enough: the question must also be about the results
+_RESULTS_QUESTION = re.compile(r"\b(results?|tests?|values?|levels?|reports?|labs?|readings?|everything|anything)\b")
+
+def normalize_test_name(text: str) -> str:
+    """Lowercase and reduce to space-separated words ("HbA1c (Glycosylated-Hemoglobin)" -> "hba1c glycosylated hemoglobin")."""
+    return " ".join(re.findall(r"[a-z0-9]+", str(text).lower()))
+
+# Every alias and canonical name, longest first, so "glycosylated hemoglobin" wins over "hemoglobin"
+_PHRASES = sorted(((normalize_test_name(alias), canonical)
+                   for canonical, aliases in TEST_SYNONYMS.items()
+                   for alias in [canonical, *aliases]), key=lambda item: len(item[0]), reverse=True)
+
+def canonical_tests(text: str) -> Set[str]:
+    """Canonical test names mentioned in `text`; each word is claimed by at most one (the longest) phrase."""
+    remaining = f" {normalize_test_name(text)} "
+    found = set()
+    for phrase, canonical in _PHRASES:
+        if f" {phrase} " in remaining:
+            found.add(canonical)
+            remaining = remaining.replace(f" {phrase} ", " | ")
+    return found
+
+class StructuredResultIndex:
+    """
+    In-memory lookup over the analyzed test results of the session's reports.
+    Each row is indexed by its canonical test names (via TEST_SYNONYMS) and by its own normalized
+    name, so questions like "is my A1c ok?" or "what was my SGPT?" resolve without vector search.
+    """
+    def __init__(self, reports: Dict[str, Dict]):
+        self.rows: List[Dict] = []
+        self.by_canonical: Dict[str, List[int]] = {}
+        self.names: List[Set[str]] = []
+        for report in reports.values():
+            for row in report.get("test_results") or []:
+                name = row.get("test_name") or row.get("Test") or ""
+                if not name:
+                    continue
+                position = len(self.rows)
+                self.rows.append({"report": report.get("name", ""), **row})
+                for canonical in canonical_tests(name):
+                    self.by_canonical.setdefault(canonical, []).append(position)
+                # The full name and the name without its parenthetical part, e.g. "lipid profile (fasting)"
+                self.names.append({normalize_test_name(name), normalize_test_name(re.sub(r"\(.*?\)", " ", name))} - {""})
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def match(self, question: str) -> List[Dict]:
+        """
+        Rows the question is about: named tests first. Otherwise a question about the results with a
+        status word gets the rows with that status when it asks which tests ("which tests are high?"),
+        and every row when it is a yes/no check over the report ("are my results normal?").
+        """
+        positions = set()
+        asked = canonical_tests(question)
+        for canonical in list(asked):
+            asked.update(TEST_GROUPS.get(canonical, []))
+        for canonical in asked:
+            positions.update(self.by_canonical.get(canonical, []))
+        normalized = f" {normalize_test_name(question)} "
+        positions.update(i for i, names in enumerate(self.names) if any(f" {name} " in normalized for name in names))
+        if positions:
+            return [self.rows[i] for i in sorted(positions)]
+
+        lowered = question.lower()
+        if not _RESULTS_QUESTION.search(lowered):
+            return []
+        for pattern, statuses in STATUS_TERMS:
+            if pattern.search(lowered):
+                if not _LIST_QUESTION.search(lowered):
+                    return list(self.rows)
+                return [row for row in self.rows if row.get("status", "Unknown") in statuses]
+        return []
+
+def format_results_context(rows: List[Dict]) -> str:
+    """Compact pipe table of matched rows for the prompt."""
+    show_report = len({row.get("report") for row in rows}) > 1
+    header = (["Report"] if show_report else []) + ["Test", "Value", "Unit", "Normal range", "Status"]
+    lines = [" | ".join(header)]
+    for row in rows:
+        cells = [row.get("test_name") or row.get("Test"), row.get("value"), row.get("unit"), row.get("normal_range"), row.get("status")]
+        lines.append(" | ".join(([row.get("report", "")] if show_report else []) + [str(c) if c not in (None, "") else "Unknown" for c in cells]))
+    return "\n".join(lines)
+
+def build_structured_answer_messages(question: str, context: str, chat_history: Optional[List[BaseMessage]] = None) -> list:
+    """Prompt that answers from the matched result rows instead of retrieved PDF chunks."""
+    history = get_buffer_string(chat_history or [])
+    return create_llm_prompt(
+        system_role="You are a kind Medical Assistant 🤗. Explain the report in clear, simple terms based only on the given test results.",
+        task_instructions=(
+            "Answer the question using only the test results table below. "
+            "When asked whether results are normal, say so for the Normal ones and name every Borderline or Critical test. "
+            "Use 🎉 for normal findings and 💪 for concerns. If data is missing, respond gently 🙏. Use emojis for empathy."
+        ),
+        input_data=f"Test results:\n{context}\n\nChat History:\n{history}\n\nQuestion: {question}"
+    )
@@ -1,75 +1,73 @@
+# Streamlit adapter over the Streamlit-free core in scripts/llm.py and scripts/embeddings.py
 import streamlit as st
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_groq import ChatGroq
-from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_core.callbacks import BaseCallbackHandler
-from reportlab.lib import colors
-from reportlab.platypus import TableStyle
 import scripts.config as CONFIG
+from scripts import llm, embeddings
+from scripts.result_store import AnalysisResultStore
+from scripts.streaming import StreamHandler
 
 logger = CONFIG.get_logger(__name__)
 
-# Check if API key is available
-if not CONFIG.GROQ_API_KEY:
-    st.error("❌ Missing API Token!")
-    st.stop()  # Stop execution if API token is missing
-
-# Singleton LLM instance
-_llm_instance = None
-
 @st.cache_resource
 def configure_llm():
-    """Configures and caches a singleton LLM (ChatGroq) instance."""
-    global _llm_instance
-    if _llm_instance is None:
-        logger.info("⟳ Initializing singleton ChatGroq LLM instance")
-        _llm_instance = ChatGroq(
-            model_name=CONFIG.MODEL_NAME,
-            temperature=CONFIG.TEMPERATURE,
-            groq_api_key=CONFIG.GROQ_API_KEY
-        )
-    return _llm_instance
+    """Configures and caches a singleton LLM (ChatGroq) instance, stopping the page if the API key is missing."""
+    try:
+        return llm.configure_llm()
+    except ValueError as e:
+        logger.error(str(e))
+        st.error("❌ Missing API Token!")
+        st.stop()  # Stop execution if API token is missing
 
 @st.cache_resource
 def configure_embedding_model():
-    """Configures and caches the embedding model."""
-    return HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-
-def create_llm_prompt(system_role: str, task_instructions: str, input_data: str) -> list:
-    """Creates a standardized LLM prompt with system and human messages."""
-    return [
-        SystemMessage(content=system_role),
-        HumanMessage(content=f"""
-            {task_instructions}
-            Input:
-            {input_data}
-            """)
-    ]
-
-def get_default_table_style() -> TableStyle:
-    """Returns a default TableStyle for PDF tables."""
-    return TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
-        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-    ])
+    """Configures and caches the embedding model, wrapped with the on-disk embedding cache if enabled."""
+    return embeddings.configure_embedding_model()
+
+@st.cache_resource
+def get_result_store() -> AnalysisResultStore:
+    """Returns the process-wide analysis result store shared by all sessions."""
+    return AnalysisResultStore(CONFIG.RESULT_STORE_MAX_ENTRIES, CONFIG.RESULT_STORE_DIR or None)
+
+# Resource scopes:
+#   process - heavy shareable objects (LLM client, embedding model, result store) held by st.cache_resource;
+#             navigation never clears them
+#   session - per-user st.session_state that survives page switches (uploads, analyses, chat index and memory)
+#   page    - per-user state registered with page_state(); dropped when the user switches to another page
+PAGE_STATE_REGISTRY = "_page_state_keys"
+
+def enter_page(page: str):
+    """Mark `page` as the active page, dropping the page-scoped state of the page the user came from."""
+    previous = st.session_state.get("current_page")
+    if previous == page:
+        return
+    for key in st.session_state.get(PAGE_STATE_REGISTRY, {}).pop(previous, ()):
+        st.session_state.pop(key, None)
+    st.session_state["current_page"] = page
+    if previous is not None:
+        logger.info(f"♻ Switched page {previous} → {page}")
+
+def page_state(key: str, default_factory):
+    """Return a session-state value scoped to the active page, creating it with `default_factory()` if missing."""
+    page = st.session_state.get("current_page")
+    st.session_state.setdefault(PAGE_STATE_REGISTRY, {}).setdefault(page, set()).add(key)
+    if key not in st.session_state:
+        st.session_state[key] = default_factory()
+    return st.session_state[key]
+
+ANALYSIS_KEYS = ["metadata", "test_results", "explanation", "summary_bullets", "categorized_data"]
+
+def select_report(report_hash: str):
+    """Makes one analyzed report the active one by copying its results into the top-level session keys."""
+    report = st.session_state.reports[report_hash]
+    for key in ANALYSIS_KEYS:
+        st.session_state[key] = report[key]
+    st.session_state.selected_report = report_hash
 
 def stream_llm_response(messages: list, container) -> str:
-    """Streams LLM response to a Streamlit container."""
-    class StreamHandler(BaseCallbackHandler):
-        def __init__(self, container, initial_text=""):
-            self.container = container
-            self.text = initial_text
-        def on_llm_new_token(self, token: str, **kwargs):
-            self.text += token
-            self.container.markdown(self.text)
-    
+    """Streams LLM response to a Streamlit container using the buffered StreamHandler."""
     handler = StreamHandler(container)
-    response = configure_llm().stream(messages, callbacks=[handler])
-    return "".join(response.content for response in response)
+    response = "".join(chunk.content for chunk in configure_llm().stream(messages, config={"callbacks": [handler]}))
+    handler.flush()
+    return response
 
 def enable_chat_history(func):
     """Decorator to handle chat history and UI interactions."""
@@ -79,13 +77,8 @@ def enable_chat_history(func):
     if "messages" not in st.session_state:
         st.session_state["messages"] = [{"role": "assistant", "content": "How can I help you with your medical report?"}]
 
-    # Clear cache only if explicitly requested
-    if "current_page" in st.session_state and st.session_state["current_page"] != current_page:
-        try:
-            st.cache_resource.clear()
-            st.session_state["current_page"] = current_page
-        except Exception:
-            pass
+    # Only page-scoped state is reset on navigation; cached models and clients are kept
+    enter_page(current_page)
 
     # Display chat history
     for msg in st.session_state["messages"]:
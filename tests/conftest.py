@@ -0,0 +1,43 @@
+import hashlib, json, re
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+import scripts.config as CONFIG
+from scripts import llm
+
+REPORT = {
+    "metadata": [{"patient_name": "John Doe", "age": "45"}],
+    "test_results": [
+        {"test_name": "HbA1c", "value": "9.9", "unit": "%", "normal_range": "4.0-5.6", "status": "Critical"},
+        {"test_name": "Hemoglobin", "value": "14.2", "unit": "g/dL", "normal_range": "13.5-17.5", "status": "Normal"},
+        {"test_name": "ESR", "value": "25", "unit": "mm/hr", "normal_range": "0-20", "status": "Unknown"},
+    ],
+}
+
+class FakeLLM:
+    """Deterministic stand-in for ChatGroq: extraction prompts get REPORT, other prompts a reply derived from their input."""
+    model_name = "fake-model"
+    temperature = 0
+
+    def __init__(self):
+        self.prompts = []
+
+    def reply(self, messages) -> str:
+        self.prompts.append(messages)
+        if "extraction" in messages[0].content:
+            return json.dumps(REPORT)
+        digest = hashlib.sha256(messages[-1].content.encode("utf-8")).hexdigest()[:12]
+        return f"Reply {digest}\n- first point about the results\n- second point with advice"
+
+    def invoke(self, messages):
+        return AIMessage(content=self.reply(messages))
+
+    def stream(self, messages):
+        for piece in re.split(r"(\s+)", self.reply(messages)):
+            yield AIMessageChunk(content=piece)
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    fake = FakeLLM()
+    monkeypatch.setattr(llm, "_llm_instance", fake)
+    monkeypatch.setattr(CONFIG, "LLM_CACHE_MAX_ENTRIES", 0)
+    return fake
@@ -0,0 +1,25 @@
+import os
+import pytest
+from scripts.batch import ReportJob, ReportOutcome, ReportProgress, analyze_batch
+from scripts.result_store import AnalysisResultStore, file_content_hash
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "sample_report.pdf")
+
+def run(progress: bool, store_dir: str):
+    with open(SAMPLE, "rb") as f:
+        job = ReportJob("sample_report.pdf", f.read())
+    store = AnalysisResultStore(persist_dir=store_dir)
+    outcomes = list(analyze_batch([job], result_store=store, progress=progress))
+    return outcomes, AnalysisResultStore(persist_dir=store_dir).get(file_content_hash(job.data))
+
+@pytest.mark.parametrize("mode", ["serial", "dag"])
+def test_streaming_stores_the_same_result(fake_llm, monkeypatch, tmp_path, mode):
+    monkeypatch.setattr("scripts.processing.PIPELINE_MODE", mode)
+    plain_outcomes, plain = run(False, str(tmp_path / "plain"))
+    streamed_outcomes, streamed = run(True, str(tmp_path / "streamed"))
+
+    assert plain is not None and plain["explanation"] and plain["summary_bullets"]
+    assert streamed == plain
+    assert [o for o in streamed_outcomes if isinstance(o, ReportOutcome)][0].result == plain_outcomes[0].result
+    events = {o.event for o in streamed_outcomes if isinstance(o, ReportProgress)}
+    assert events == {"tests", "explanation", "summary"}
@@ -0,0 +1,87 @@
+import json
+import mongomock
+import pytest
+from bson import ObjectId
+from scripts import bulk_evaluation, mongo
+from scripts.bulk_evaluation import _restore_id, iter_chat_pages, run, write_scores
+
+class BulkResult:
+    def __init__(self, modified_count):
+        self.modified_count = modified_count
+
+def apply_updates(self, operations, ordered=True):
+    """mongomock 4.3 cannot build pymongo>=4.11 UpdateOne ops (their `sort` argument), so apply them one by one."""
+    return BulkResult(sum(self.update_one(op._filter, op._doc).modified_count for op in operations))
+
+@pytest.fixture
+def chats(monkeypatch):
+    monkeypatch.setattr(mongomock.collection.Collection, "bulk_write", apply_updates)
+    client = mongomock.MongoClient()
+    mongo.set_mongo_client(client)
+    collection = client.diagnosify.chat_history
+    collection.insert_many([{"_id": ObjectId(), "question": f"q{i}", "generated_answer": "a",
+                             "retrieved_context": "ctx"} for i in range(5)])
+    yield collection
+    mongo.set_mongo_client(None)
+
+@pytest.fixture
+def scored(monkeypatch):
+    """Fake RAGAS: scores every row 0.5 and records the questions of each batch."""
+    calls = []
+    def score(questions, answers, contexts, metric_names):
+        calls.append(list(questions))
+        return [{name: 0.5 for name in metric_names} for _ in questions]
+    monkeypatch.setattr(bulk_evaluation, "score_rag_dataset", score)
+    return calls
+
+def ids(collection):
+    return [doc["_id"] for doc in collection.find().sort("_id", 1)]
+
+def test_pages_follow_id_order(chats):
+    pages = list(iter_chat_pages(chats, page_size=2))
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [doc["_id"] for page in pages for doc in page] == ids(chats)
+    assert [doc["question"] for doc in next(iter_chat_pages(chats, after_id=ids(chats)[2], page_size=10))] == ["q3", "q4"]
+
+def test_restore_id():
+    oid = ObjectId()
+    assert _restore_id(str(oid)) == oid
+    assert _restore_id("chat-7") == "chat-7"
+    assert _restore_id(None) is None
+
+def test_write_scores_sets_metric_fields(chats):
+    docs = list(chats.find().sort("_id", 1).limit(2))
+    assert write_scores(chats, docs, [{"faithfulness": 0.9}, {"faithfulness": None}]) == 2
+    first, second = chats.find().sort("_id", 1).limit(2)
+    assert first["faithfulness_score"] == 0.9 and second["faithfulness_score"] is None
+    assert "evaluated_at" in first
+    assert write_scores(chats, [], []) == 0
+
+def test_run_scores_everything_and_saves_the_checkpoint(chats, scored, tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = run(["faithfulness", "answer_relevancy"], path, page_size=2, batch_size=1, workers=2)
+    assert checkpoint["scored"] == 5 and checkpoint["failed_ids"] == []
+    assert checkpoint["last_id"] == str(ids(chats)[-1])
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == checkpoint
+    assert chats.count_documents({"faithfulness_score": 0.5, "answer_relevancy_score": 0.5}) == 5
+
+def test_run_resumes_after_the_checkpointed_object_id(chats, scored, tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"last_id": str(ids(chats)[2]), "scored": 3, "failed_ids": []}, f)
+    checkpoint = run(["faithfulness"], path, page_size=10, batch_size=10)
+    assert scored == [["q3", "q4"]]
+    assert checkpoint["scored"] == 5
+    assert chats.count_documents({"faithfulness_score": {"$exists": True}}) == 2
+
+def test_failed_batches_are_recorded_and_the_checkpoint_still_advances(chats, monkeypatch, tmp_path):
+    def flaky(questions, answers, contexts, metric_names):
+        if "q4" in questions:
+            raise RuntimeError("ragas down")
+        return [{"faithfulness": 0.5} for _ in questions]
+    monkeypatch.setattr(bulk_evaluation, "score_rag_dataset", flaky)
+    checkpoint = run(["faithfulness"], str(tmp_path / "checkpoint.json"), page_size=2, batch_size=1)
+    assert checkpoint["failed_ids"] == [str(ids(chats)[4])]
+    assert checkpoint["scored"] == 4 and checkpoint["last_id"] == str(ids(chats)[-1])
+    assert chats.find_one({"question": "q4"}).get("faithfulness_score") is None
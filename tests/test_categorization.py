@@ -0,0 +1,43 @@
+import pytest
+from scripts.categorization import categorize_by_rules
+
+def status_of(value, normal_range, unit=""):
+    categorized, unresolved = categorize_by_rules([{"test_name": "Test", "value": value, "unit": unit, "normal_range": normal_range}], margin=0.25)
+    return categorized[0].get("status") if not unresolved else None
+
+@pytest.mark.parametrize("value, normal_range", [
+    ("13.0", "13.5-17.5"),  # hemoglobin
+    ("6.0", "4.0-5.6"),     # HbA1c
+    ("4.2", "4.5-5.9"),     # RBC
+    ("25", "0-20"),         # ESR
+    ("35", ">40"),          # HDL
+])
+def test_slightly_out_of_range_is_borderline(value, normal_range):
+    assert status_of(value, normal_range) == "Borderline"
+
+@pytest.mark.parametrize("value, normal_range", [
+    ("9.9", "4.0-5.6"),
+    ("9.0", "13.5-17.5"),
+    ("60", "0-20"),
+    ("20", ">40"),
+    ("250", "<100"),
+])
+def test_large_deviation_is_critical(value, normal_range):
+    assert status_of(value, normal_range) == "Critical"
+
+@pytest.mark.parametrize("value, normal_range", [("13.5", "13.5-17.5"), ("17.5", "13.5-17.5"), ("0", "0-20"), ("40", ">40")])
+def test_limits_are_normal(value, normal_range):
+    assert status_of(value, normal_range) == "Normal"
+
+def test_zero_limit_falls_back_to_range_width():
+    assert status_of("-1", "0-20") == "Borderline"
+    assert status_of("-10", "0-20") == "Critical"
+
+def test_unparseable_range_is_left_for_the_llm():
+    assert status_of("5.0", "see comment") is None
+
+def test_non_dict_rows_pass_through():
+    rows = ["Patient: John", {"test_name": "ESR", "value": "25", "normal_range": "0-20"}, None]
+    categorized, unresolved = categorize_by_rules(rows, margin=0.25)
+    assert categorized[0] == "Patient: John" and categorized[2] is None
+    assert categorized[1]["status"] == "Borderline" and unresolved == []
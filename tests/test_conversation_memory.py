@@ -0,0 +1,83 @@
+import threading
+from langchain_core.messages import SystemMessage
+from scripts.conversation_memory import BudgetedChatMemory, _summary_executor, count_tokens, is_self_contained
+
+def wait_for_summaries():
+    _summary_executor.submit(lambda: None).result(timeout=5)  # one worker, so earlier folds are done
+
+def chat(memory, turns, words=20):
+    for i in range(turns):
+        memory.save_context({"question": f"question {i} " + "word " * words}, {"answer": f"answer {i} " + "word " * words})
+
+def test_recent_turns_fit_the_budget_and_older_ones_are_summarized():
+    folded = []
+    def summarize(summary, messages):
+        folded.extend(messages)
+        return f"{summary} +{len(messages)}".strip()
+
+    memory = BudgetedChatMemory(max_token_limit=100, return_messages=True, summarize=summarize)
+    chat(memory, 6)
+    wait_for_summaries()
+    kept = memory.chat_memory.messages
+    assert count_tokens(kept) <= 100 and len(kept) % 2 == 0
+    assert len(folded) + len(kept) == 12
+    history = memory.load_memory_variables({})["chat_history"]
+    assert isinstance(history[0], SystemMessage) and memory.summary in history[0].content
+    assert history[1:] == kept
+
+def test_latest_turn_is_always_kept():
+    memory = BudgetedChatMemory(max_token_limit=1, return_messages=True, summarize=lambda summary, messages: "s")
+    chat(memory, 2, words=50)
+    wait_for_summaries()
+    assert [m.content.split()[:2] for m in memory.chat_memory.messages] == [["question", "1"], ["answer", "1"]]
+
+def test_evicted_turns_stay_visible_until_folded():
+    release = threading.Event()
+    def slow_summarize(summary, messages):
+        release.wait(timeout=5)
+        return "summary"
+
+    memory = BudgetedChatMemory(max_token_limit=60, return_messages=True, summarize=slow_summarize)
+    chat(memory, 3)
+    assert len(memory.load_memory_variables({})["chat_history"]) == 6
+    release.set()
+    wait_for_summaries()
+    assert memory.summary == "summary"
+
+def test_failed_summary_keeps_messages_verbatim():
+    def failing(summary, messages):
+        raise RuntimeError("LLM down")
+
+    memory = BudgetedChatMemory(max_token_limit=60, return_messages=True, summarize=failing)
+    chat(memory, 3)
+    wait_for_summaries()
+    assert memory.summary == ""
+    assert len(memory.load_memory_variables({})["chat_history"]) == 6
+
+def test_clear_during_summary_discards_the_stale_fold():
+    started, release = threading.Event(), threading.Event()
+    summarized = []
+    def blocking_summarize(summary, messages):
+        summarized.append([m.content for m in messages])
+        if len(summarized) == 1:
+            started.set()
+            release.wait(timeout=5)
+            return "old conversation"
+        return "new conversation"
+
+    memory = BudgetedChatMemory(max_token_limit=60, return_messages=True, summarize=blocking_summarize)
+    chat(memory, 2)
+    assert started.wait(timeout=5)
+    memory.clear()
+    chat(memory, 2)  # the new conversation evicts its own first turn while the old fold is still running
+    new_pending = [m.content for m in memory._pending]
+    release.set()
+    wait_for_summaries()
+
+    assert memory.summary == "new conversation"
+    assert new_pending and summarized[-1] == new_pending and memory._pending == []
+
+def test_self_contained_questions_skip_condensing():
+    assert is_self_contained("What is my HbA1c value?")
+    assert not is_self_contained("Is it normal?")
+    assert not is_self_contained("What about the LDL then?")
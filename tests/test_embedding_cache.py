@@ -0,0 +1,63 @@
+import multiprocessing, os
+from scripts.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+def vector(text):
+    return [float(len(text)), float(sum(map(ord, text)) % 97), 1.0]
+
+def test_round_trip_and_reload(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", max_entries=10)
+    cache.put_many(["a", "bb"], [vector("a"), vector("bb")])
+    assert cache.get_many(["bb", "missing", "a"]) == [vector("bb"), None, vector("a")]
+    assert EmbeddingCache(str(tmp_path), "model", max_entries=10).get_many(["a"]) == [vector("a")]
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", max_entries=2)
+    cache.put_many(["a", "b"], [vector("a"), vector("b")])
+    cache.get_many(["a"])
+    cache.put_many(["c"], [vector("c")])
+    assert cache.get_many(["a", "b", "c"]) == [vector("a"), None, vector("c")]
+
+def test_hits_do_not_rewrite_the_index_until_a_batch_is_due(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", max_entries=10, save_every=3)
+    cache.put_many(["a"], [vector("a")])
+    written = os.stat(cache.index_path).st_mtime_ns, os.stat(cache.index_path).st_ino
+    cache.get_many(["a"])
+    cache.get_many(["a"])
+    assert (os.stat(cache.index_path).st_mtime_ns, os.stat(cache.index_path).st_ino) == written
+    cache.get_many(["a"])
+    assert (os.stat(cache.index_path).st_mtime_ns, os.stat(cache.index_path).st_ino) != written
+
+def test_sees_slots_reused_by_another_instance(tmp_path):
+    first = EmbeddingCache(str(tmp_path), "model", max_entries=1)
+    first.put_many(["x"], [vector("x")])
+    second = EmbeddingCache(str(tmp_path), "model", max_entries=1)
+    second.put_many(["y"], [vector("y")])  # evicts "x" and reuses its slot
+    assert first.get_many(["x", "y"]) == [None, vector("y")]
+
+def fill(cache_dir, prefix):
+    cache = EmbeddingCache(cache_dir, "model", max_entries=1000)
+    for i in range(25):
+        texts = [f"{prefix}-{i}-{j}" for j in range(2)]
+        cache.put_many(texts, [vector(text) for text in texts])
+
+def test_processes_sharing_a_directory_keep_every_entry(tmp_path):
+    prefixes = ["p0", "p1", "p2", "p3"]
+    with multiprocessing.get_context("spawn").Pool(len(prefixes)) as pool:
+        pool.starmap(fill, [(str(tmp_path), prefix) for prefix in prefixes])
+    texts = [f"{prefix}-{i}-{j}" for prefix in prefixes for i in range(25) for j in range(2)]
+    assert EmbeddingCache(str(tmp_path), "model", max_entries=1000).get_many(texts) == [vector(text) for text in texts]
+
+class CountingModel:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [vector(text) for text in texts]
+
+def test_cached_embeddings_only_embed_misses(tmp_path):
+    model = CountingModel()
+    embeddings = CachedEmbeddings(model, EmbeddingCache(str(tmp_path), "model", max_entries=10))
+    embeddings.embed_documents(["a", "b"])
+    assert embeddings.embed_documents(["b", "c", "a"]) == [vector("b"), vector("c"), vector("a")]
+    assert model.calls == [["a", "b"], ["c"]]
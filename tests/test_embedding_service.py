@@ -0,0 +1,50 @@
+import socket, threading
+import numpy as np
+from scripts.embedding_service import (EmbeddingBatcher, EmbeddingServer, EmbeddingServiceClient,
+                                       _recv_header, _send)
+
+class FakeModel:
+    def embed_documents(self, texts):
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 0.0]
+
+def serve(path):
+    server = EmbeddingServer(path, EmbeddingBatcher(FakeModel(), max_wait_ms=0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "embed.sock")
+    server = serve(path)
+    try:
+        client = EmbeddingServiceClient(path, timeout=5)
+        assert client.embed_documents(["ab", "abcd"]) == [[2.0, 1.0], [4.0, 1.0]]
+        assert client.embed_query("abc") == [3.0, 0.0]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_reconnects_when_the_reply_is_cut_off(tmp_path):
+    path = str(tmp_path / "embed.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen()
+
+    def handle():
+        # First connection dies after the header, before the vectors; the second gets a full reply
+        for payload in (b"\0" * 4, np.array([[2.0, 1.0]], dtype=np.float32).tobytes()):
+            conn, _ = listener.accept()
+            with conn:
+                _recv_header(conn)
+                _send(conn, {"count": 1, "dim": 2}, payload)
+
+    thread = threading.Thread(target=handle, daemon=True)
+    thread.start()
+    client = EmbeddingServiceClient(path, timeout=5)
+    first_socket = client._connection()
+    assert client.embed_documents(["ab"]) == [[2.0, 1.0]]
+    assert first_socket.fileno() == -1  # the broken connection was closed, not leaked
+    thread.join(timeout=5)
+    listener.close()
@@ -0,0 +1,83 @@
+import threading, time
+import pytest
+from scripts import evaluation_queue
+from scripts.evaluation_queue import EvaluationQueue
+
+@pytest.fixture
+def stored(monkeypatch):
+    rows = []
+    monkeypatch.setattr(evaluation_queue, "store_chat_metrics",
+                        lambda question, answer, context, metrics, user_id: rows.append((question, metrics)))
+    return rows
+
+@pytest.fixture
+def batches(monkeypatch):
+    calls = []
+    def evaluate(questions, answers, contexts):
+        calls.append(list(questions))
+        return [{"faithfulness": 0.9} for _ in questions]
+    monkeypatch.setattr(evaluation_queue, "evaluate_rag_metrics_batch", evaluate)
+    return calls
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+def test_jobs_are_micro_batched_and_stored(stored, batches):
+    q = EvaluationQueue(batch_size=3, batch_wait=0.5, workers=1)
+    for i in range(3):
+        assert q.submit(f"q{i}", "a", ["ctx"], "user")
+    q.close()
+    assert batches == [["q0", "q1", "q2"]]
+    assert stored == [(f"q{i}", {"faithfulness": 0.9}) for i in range(3)]
+    metrics = q.metrics()
+    assert metrics["submitted"] == metrics["evaluated"] == 3 and metrics["batches"] == 1 and metrics["failed"] == 0
+    assert 0 <= metrics["last_lag_s"] <= metrics["max_lag_s"]
+
+def test_batch_is_cut_after_batch_wait(stored, batches):
+    q = EvaluationQueue(batch_size=10, batch_wait=0.05, workers=1)
+    q.submit("first", "a", [], "user")
+    wait_until(lambda: len(batches) == 1)
+    q.submit("second", "a", [], "user")
+    q.close()
+    assert batches == [["first"], ["second"]]
+
+def test_full_queue_rejects_after_the_submit_timeout(stored, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(evaluation_queue, "evaluate_rag_metrics_batch",
+                        lambda questions, answers, contexts: release.wait(5) and [{"faithfulness": 1.0} for _ in questions])
+    q = EvaluationQueue(max_size=1, batch_size=1, batch_wait=0, workers=1, submit_timeout=0.05)
+    assert q.submit("busy", "a", [], "user")
+    wait_until(lambda: q.metrics()["depth"] == 0)  # the worker holds the first job
+    assert q.submit("queued", "a", [], "user")
+    start = time.time()
+    assert not q.submit("rejected", "a", [], "user")
+    assert time.time() - start >= 0.05  # waited for room before giving up
+    metrics = q.metrics()
+    assert metrics["rejected"] == 1 and metrics["depth"] == 1 and metrics["oldest_wait_s"] >= 0
+    release.set()
+    q.close()
+    assert [question for question, _ in stored] == ["busy", "queued"]
+
+def test_failed_evaluation_is_counted_and_stored_without_scores(stored, monkeypatch):
+    def broken(questions, answers, contexts):
+        raise RuntimeError("ragas down")
+    monkeypatch.setattr(evaluation_queue, "evaluate_rag_metrics_batch", broken)
+    q = EvaluationQueue(batch_size=2, batch_wait=0.5, workers=1)
+    q.submit("q0", "a", [], "user")
+    q.submit("q1", "a", [], "user")
+    q.close()
+    metrics = q.metrics()
+    assert metrics["failed"] == 2 and metrics["evaluated"] == 0
+    assert stored == [("q0", {"faithfulness": None}), ("q1", {"faithfulness": None})]
+
+def test_close_drains_queued_jobs_and_refuses_new_ones(stored, batches):
+    q = EvaluationQueue(batch_size=2, batch_wait=0, workers=2)
+    for i in range(7):
+        q.submit(f"q{i}", "a", [], "user")
+    q.close()
+    assert sorted(question for question, _ in stored) == [f"q{i}" for i in range(7)]
+    assert not any(worker.is_alive() for worker in q._workers)
+    assert not q.submit("late", "a", [], "user")
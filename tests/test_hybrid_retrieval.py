@@ -0,0 +1,45 @@
+from langchain_core.documents import Document
+from scripts.hybrid_retrieval import BM25Index, HybridRetriever, reciprocal_rank_fusion, tokenize
+
+def test_tokenize_keeps_decimals_together():
+    assert tokenize("HbA1c 9.90 % (4.0-5.6)") == ["hba1c", "9.90", "4.0", "5.6"]
+
+def test_rrf_scores():
+    fused = reciprocal_rank_fusion([["a", "b"], ["b", "c"]], k=1)
+    # a: 1/2, b: 1/3 + 1/2, c: 1/3
+    assert fused == ["b", "a", "c"]
+
+def test_rrf_ties_keep_first_seen_order():
+    assert reciprocal_rank_fusion([["x"], ["y"]]) == ["x", "y"]
+
+def test_bm25_ranks_exact_term_matches_first():
+    index = BM25Index()
+    index.add("1", Document(page_content="HbA1c 9.9 % glycosylated hemoglobin"))
+    index.add("2", Document(page_content="Hemoglobin 14.2"))
+    index.add("3", Document(page_content="Patient name and date"))
+    assert [doc_id for doc_id, _ in index.search("hba1c result", k=3)] == ["1"]
+    assert [doc_id for doc_id, _ in index.search("hemoglobin", k=3)] == ["2", "1"]
+
+def test_bm25_remove_drops_postings():
+    index = BM25Index()
+    index.add("1", Document(page_content="alt sgpt 30"))
+    index.add("2", Document(page_content="ast sgot 25"))
+    index.remove("1")
+    assert len(index) == 1 and "sgpt" not in index.postings
+    assert index.search("sgpt", k=5) == []
+
+class FakeVectorStore:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def similarity_search_with_score(self, query, k):
+        return [(doc, 0.0) for doc in self.documents[:k]]
+
+def test_hybrid_retriever_fuses_vector_and_keyword_hits():
+    docs = {doc_id: Document(page_content=text, id=doc_id) for doc_id, text in
+            [("a", "Lipid profile summary"), ("b", "ALT (SGPT) 30 U/L"), ("c", "Kidney function")]}
+    index = BM25Index()
+    for doc_id, doc in docs.items():
+        index.add(doc_id, doc)
+    retriever = HybridRetriever(vector_db=FakeVectorStore([docs["a"], docs["c"]]), keyword_index=index, k=2, fetch_k=2)
+    assert [doc.id for doc in retriever.invoke("What was my SGPT?")] == ["a", "b"]
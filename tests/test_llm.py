@@ -0,0 +1,36 @@
+import pytest
+import scripts.config as CONFIG
+from scripts import llm
+from scripts.llm_cache import LLMResponseCache
+
+MESSAGES = llm.create_llm_prompt("system", "task", "input")
+
+@pytest.fixture
+def memory_cache(fake_llm, monkeypatch):
+    cache = LLMResponseCache(max_entries=8)
+    monkeypatch.setattr(CONFIG, "LLM_CACHE_MAX_ENTRIES", 8)
+    monkeypatch.setattr(llm, "_llm_cache", cache)
+    return cache
+
+def test_cache_serves_repeated_prompts_at_temperature_zero(fake_llm, memory_cache):
+    first = llm.invoke_with_retry("explanation", MESSAGES)
+    assert llm.invoke_with_retry("explanation", MESSAGES) == first
+    assert len(fake_llm.prompts) == 1
+
+def test_cache_is_skipped_when_sampling(fake_llm, memory_cache, monkeypatch):
+    monkeypatch.setattr(fake_llm, "temperature", 0.3, raising=False)
+    llm.invoke_with_retry("explanation", MESSAGES)
+    llm.invoke_with_retry("explanation", MESSAGES)
+    assert len(fake_llm.prompts) == 2
+    assert memory_cache.stats().get("misses", 0) == 0
+
+@pytest.mark.parametrize("retries", [-3, 0])
+def test_negative_retries_still_make_one_attempt(fake_llm, monkeypatch, retries):
+    monkeypatch.setattr(CONFIG, "LLM_MAX_RETRIES", retries)
+
+    def broken(content):
+        raise ValueError("unparseable")
+
+    with pytest.raises(ValueError, match="unparseable"):
+        llm.invoke_with_retry("structuring", MESSAGES, broken, backoff=0)
+    assert len(fake_llm.prompts) == 1
@@ -0,0 +1,88 @@
+import mongomock
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+from scripts import mongo
+from scripts.mongo import BufferedWriter
+
+@pytest.fixture
+def client():
+    client = mongomock.MongoClient()
+    mongo.set_mongo_client(client)
+    yield client
+    mongo.set_mongo_client(None)
+
+def use_insert(monkeypatch, insert_many):
+    """Route the writer to a collection whose insert_many is `insert_many`."""
+    collection = type("FakeCollection", (), {"insert_many": staticmethod(insert_many)})()
+    monkeypatch.setattr(mongo, "get_collection", lambda db_name, collection_name: collection)
+
+def writer(**kwargs):
+    return BufferedWriter("db", "chats", flush_seconds=0, **kwargs)
+
+def test_flushes_a_full_batch(client):
+    w = writer(batch_size=3)
+    for i in range(3):
+        w.add({"n": i})
+    assert w.pending() == 0
+    assert client.db.chats.count_documents({}) == 3
+
+def test_partial_failure_drops_stored_documents(client):
+    client.db.chats.insert_one({"_id": 1})
+    w = writer(batch_size=10)
+    for doc_id in (1, 2, 3):
+        w.add({"_id": doc_id})
+    assert w.flush() == 2
+    assert w.pending() == 0
+    assert sorted(doc["_id"] for doc in client.db.chats.find()) == [1, 2, 3]
+
+def test_retry_after_connection_error_skips_documents_that_made_it(client, monkeypatch):
+    collection = client.db.chats
+    real_insert = collection.insert_many
+    calls = []
+
+    def flaky_insert(documents, ordered=True):
+        calls.append(len(documents))
+        if len(calls) == 1:
+            real_insert(documents[:1], ordered=ordered)  # first document lands, then the connection drops
+            raise AutoReconnect("connection reset")
+        return real_insert(documents, ordered=ordered)
+
+    use_insert(monkeypatch, flaky_insert)
+    w = writer(batch_size=10)
+    w.add({"_id": "a"})
+    w.add({"_id": "b"})
+    assert w.flush() == 0 and w.pending() == 2
+    assert w.flush() == 1 and w.pending() == 0
+    assert sorted(doc["_id"] for doc in collection.find()) == ["a", "b"]
+
+def test_transient_failures_are_dropped_after_max_retries(client, monkeypatch):
+    def failing_insert(documents, ordered=True):
+        raise BulkWriteError({"writeErrors": [{"index": i, "code": 91, "errmsg": "shutting down"} for i in range(len(documents))]})
+
+    use_insert(monkeypatch, failing_insert)
+    w = writer(batch_size=10, max_retries=3)
+    w.add({"_id": 1})
+    for expected_pending in (1, 1, 0):
+        w.flush()
+        assert w.pending() == expected_pending
+
+def test_permanent_write_errors_are_not_retried(client, monkeypatch):
+    def rejecting_insert(documents, ordered=True):
+        raise BulkWriteError({"writeErrors": [{"index": 0, "code": 121, "errmsg": "Document failed validation"}]})
+
+    use_insert(monkeypatch, rejecting_insert)
+    w = writer(batch_size=10)
+    w.add({"_id": 1})
+    w.add({"_id": 2})
+    assert w.flush() == 1
+    assert w.pending() == 0
+
+def test_buffer_is_capped(client, monkeypatch):
+    def unreachable(documents, ordered=True):
+        raise AutoReconnect("down")
+
+    use_insert(monkeypatch, unreachable)
+    w = writer(batch_size=2, max_buffer=4, max_retries=100)
+    for i in range(10):
+        w.add({"_id": i})
+    assert w.pending() <= 4
@@ -0,0 +1,32 @@
+import os, sys
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from scripts.ocr import extract_pages, extract_text
+
+ASSETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+PDFS = [os.path.join(ASSETS, "sample_report.pdf"), os.path.join(ASSETS, "medical_summary.pdf")]
+
+def test_extract_pages_reports_each_page():
+    pages = extract_pages(PDFS[0])
+    assert [page.page for page in pages] == list(range(1, len(pages) + 1))
+    assert all(page.method == "text" and page.seconds >= 0 for page in pages)
+    assert "HBA1C" in pages[0].text
+
+def test_concurrent_extraction_returns_each_files_own_text():
+    expected = {path: extract_text(path) for path in PDFS}
+    assert expected[PDFS[0]] != expected[PDFS[1]]
+    paths = PDFS * 60
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads often so shared reader state would be caught
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(extract_text, paths))
+    finally:
+        sys.setswitchinterval(interval)
+    assert results == [expected[path] for path in paths]
+
+def test_rejects_non_pdf(tmp_path):
+    path = tmp_path / "report.txt"
+    path.write_text("not a pdf")
+    with pytest.raises(ValueError):
+        extract_text(str(path))
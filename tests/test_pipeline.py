@@ -0,0 +1,18 @@
+from scripts.processing import analyze_report, process_medical_report
+
+TEXT = "Patient: John Doe, 45\nHbA1c 9.9 % (4.0-5.6)\nHemoglobin 14.2 g/dL (13.5-17.5)\nESR 25 mm/hr (0-20)"
+
+def test_dag_and_serial_analysis_match(fake_llm):
+    serial = analyze_report(TEXT, mode="serial")
+    dag = analyze_report(TEXT, mode="dag")
+    assert dag == serial
+    assert [row["status"] for row in dag["test_results"]] == ["Critical", "Normal", "Borderline"]
+
+def test_dag_summary_is_built_from_the_explanations(fake_llm):
+    result = analyze_report(TEXT, mode="dag")
+    summary_prompt = fake_llm.prompts[-1][-1].content
+    assert "medical explanations" in summary_prompt
+    assert result["explanation"] in summary_prompt
+
+def test_dag_and_serial_processing_match(fake_llm):
+    assert process_medical_report(TEXT, mode="dag") == process_medical_report(TEXT, mode="serial")
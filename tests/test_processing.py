@@ -0,0 +1,21 @@
+import json
+from scripts.processing import parse_single_pass_response
+
+def response(*rows):
+    return json.dumps({"metadata": [{"patient": "John"}], "test_results": [
+        {"test_name": name, "value": value, "unit": "", "normal_range": normal_range, "status": status}
+        for name, value, normal_range, status in rows
+    ]})
+
+def test_llm_statuses_are_kept():
+    tests, metadata = parse_single_pass_response(response(("ESR", "25", "0-20", "Critical"), ("Hb", "14", "13.5-17.5", "Normal")))
+    assert [row["status"] for row in tests] == ["Critical", "Normal"]
+    assert metadata == [{"patient": "John"}]
+
+def test_rule_engine_fills_only_unknown_statuses():
+    tests, _ = parse_single_pass_response(response(
+        ("ESR", "25", "0-20", "Unknown"),
+        ("HbA1c", "9.9", "4.0-5.6", "Borderline"),
+        ("Vitamin D", "12", "see note", "Unknown"),
+    ))
+    assert [row["status"] for row in tests] == ["Borderline", "Borderline", "Unknown"]
@@ -0,0 +1,15 @@
+import pytest
+from scripts import ragas_evaluator
+
+def test_batch_evaluation_keeps_missing_scores_as_none(monkeypatch):
+    monkeypatch.setattr(ragas_evaluator, "score_rag_dataset",
+                        lambda questions, answers, contexts, names: [{"faithfulness": 0.8}, {"faithfulness": None}])
+    assert ragas_evaluator.evaluate_rag_metrics_batch(["q0", "q1"], ["a", "a"], [[], []]) == [
+        {"faithfulness": 0.8}, {"faithfulness": None}]
+
+def test_batch_evaluation_errors_reach_the_caller(monkeypatch):
+    def broken(questions, answers, contexts, names):
+        raise RuntimeError("ragas down")
+    monkeypatch.setattr(ragas_evaluator, "score_rag_dataset", broken)
+    with pytest.raises(RuntimeError, match="ragas down"):
+        ragas_evaluator.evaluate_rag_metrics_batch(["q"], ["a"], [[]])
@@ -0,0 +1,73 @@
+import pytest
+from scripts import streaming
+from scripts.streaming import StreamHandler
+
+class FakeContainer:
+    """Records what a Streamlit `st.empty()` would have rendered."""
+    def __init__(self):
+        self.renders = []
+
+    def markdown(self, text):
+        self.renders.append(text)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def perf_counter(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(streaming, "time", clock)
+    return clock
+
+def test_flushes_every_flush_tokens(clock):
+    container = FakeContainer()
+    handler = StreamHandler(container, flush_interval_ms=10_000, flush_tokens=20)
+    for i in range(100):
+        handler.on_llm_new_token(f"t{i} ")
+    assert handler.render_count == len(container.renders) == 5
+    handler.on_llm_end(None)
+    assert handler.render_count == 5  # nothing left to render
+    assert container.renders[-1] == handler.text == "".join(f"t{i} " for i in range(100))
+
+def test_flushes_when_the_interval_passes(clock):
+    container = FakeContainer()
+    handler = StreamHandler(container, flush_interval_ms=50, flush_tokens=1000)
+    handler.on_llm_new_token("a")
+    clock.now += 0.01
+    handler.on_llm_new_token("b")
+    assert container.renders == []
+    clock.now += 0.05
+    handler.on_llm_new_token("c")
+    assert container.renders == ["abc"]
+
+@pytest.mark.parametrize("finish", ["on_llm_end", "on_llm_error"])
+def test_final_flush_renders_the_buffered_tail(clock, finish):
+    container = FakeContainer()
+    handler = StreamHandler(container, initial_text="> ", flush_interval_ms=10_000, flush_tokens=20)
+    for token in ["partial", " answer"]:
+        handler.on_llm_new_token(token)
+    assert container.renders == []
+    getattr(handler, finish)(RuntimeError("boom") if finish == "on_llm_error" else None)
+    assert container.renders == ["> partial answer"] and handler.render_count == 1
+
+def test_latency_metrics(clock):
+    handler = StreamHandler(FakeContainer(), flush_interval_ms=10_000, flush_tokens=20)
+    handler.on_chat_model_start({}, [])
+    clock.now += 0.5  # time to first token
+    handler.on_llm_new_token("first")
+    for _ in range(10):
+        clock.now += 0.1
+        handler.on_llm_new_token("x")
+    handler.on_llm_end(None)
+    metrics = handler.metrics
+    assert metrics["tokens"] == 11 and metrics["renders"] == 1
+    assert metrics["ttft_s"] == pytest.approx(0.5)
+    assert metrics["tokens_per_s"] == pytest.approx(10.0)
+
+def test_metrics_before_any_token(clock):
+    metrics = StreamHandler(FakeContainer()).metrics
+    assert metrics == {"tokens": 0, "renders": 0, "ttft_s": None, "tokens_per_s": 0.0}
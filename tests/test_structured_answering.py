@@ -0,0 +1,43 @@
+import pytest
+from scripts.structured_answering import StructuredResultIndex, canonical_tests
+
+REPORTS = {"abc": {"name": "report.pdf", "test_results": [
+    {"test_name": "HbA1c (Glycosylated Hemoglobin)", "value": "9.9", "status": "Critical"},
+    {"test_name": "Hemoglobin", "value": "14.2", "status": "Normal"},
+    {"test_name": "ESR", "value": "25", "status": "Borderline"},
+    {"test_name": "SGPT", "value": "30", "status": "Normal"},
+]}}
+
+@pytest.fixture
+def index():
+    return StructuredResultIndex(REPORTS)
+
+def names(rows):
+    return [row["test_name"] for row in rows]
+
+def test_synonyms_resolve_to_canonical_tests():
+    assert canonical_tests("is my A1c ok?") == {"hba1c"}
+    assert canonical_tests("what about glycosylated hemoglobin and hb") == {"hba1c", "hemoglobin"}
+
+def test_named_test(index):
+    assert names(index.match("What was my ALT?")) == ["SGPT"]
+
+@pytest.mark.parametrize("question", ["Are my results normal?", "Is everything normal?", "Do I have anything abnormal?"])
+def test_yes_no_status_check_uses_every_row(index, question):
+    assert len(index.match(question)) == 4
+
+@pytest.mark.parametrize("question, expected", [
+    ("Which tests are high?", ["HbA1c (Glycosylated Hemoglobin)", "ESR"]),
+    ("What results are critical?", ["HbA1c (Glycosylated Hemoglobin)"]),
+    ("Show my borderline values", ["ESR"]),
+    ("Which results are normal?", ["Hemoglobin", "SGPT"]),
+])
+def test_which_questions_filter_by_status(index, question, expected):
+    assert names(index.match(question)) == expected
+
+def test_unrelated_question_matches_nothing(index):
+    assert index.match("How do I book an appointment?") == []
+
+@pytest.mark.parametrize("question", ["What did the doctor's note say about my low energy?", "Is it normal to feel tired?"])
+def test_status_word_outside_a_results_question_matches_nothing(index, question):
+    assert index.match(question) == []